@@ -0,0 +1,222 @@
+"""Content-addressed on-disk cache of provider responses.
+
+Entries live under ~/.agentctl/cache/ as one JSON file per response, named by
+a hash of everything that determines the output: provider, model, messages
+(including the system prompt), temperature and max_tokens. A hit refreshes the
+file's mtime, so eviction by oldest mtime is least-recently-used.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import hashlib
+import json
+import os
+import random
+import time
+from pathlib import Path
+from typing import AsyncIterator
+
+from agentctl.paths import CACHE_DIR
+from agentctl.providers import BaseProvider, Message, Response
+
+# Fraction of writes that also run an eviction pass
+PRUNE_PROBABILITY = 0.02
+
+
+class ResponseCache:
+    """Stores full `Response` objects keyed by a hash of the request."""
+
+    def __init__(
+        self,
+        root: Path = CACHE_DIR,
+        max_bytes: int = 500 * 1024 * 1024,
+        max_age: float = 30 * 86400,
+    ):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+
+    @staticmethod
+    def key(
+        provider: str,
+        model: str | None,
+        messages: list[Message],
+        temperature: float | None = None,
+        max_tokens: int | None = None,
+    ) -> str:
+        """Hash of everything that determines a response."""
+        request = {
+            "provider": provider,
+            "model": model,
+            "messages": [[m.role, m.content, m.name] for m in messages],
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+        }
+        canonical = json.dumps(request, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(canonical.encode()).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Response | None:
+        """Look up a cached response, refreshing its LRU position on a hit."""
+        path = self._path(key)
+        try:
+            # Another process may evict or expire the entry at any point here
+            if time.time() - path.stat().st_mtime > self.max_age:
+                path.unlink(missing_ok=True)
+                return None
+            response = Response(**json.loads(path.read_text()))
+        except (OSError, ValueError, TypeError):
+            # Gone, corrupt, or written with fields Response no longer has
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return response
+
+    def put(self, key: str, response: Response) -> None:
+        """Store a response, written atomically so readers never see half an entry."""
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(dataclasses.asdict(response)))
+        os.replace(tmp, path)
+
+        if random.random() < PRUNE_PROBABILITY:
+            self.prune()
+
+    def _entries(self) -> list[tuple[Path, os.stat_result]]:
+        if not self.root.exists():
+            return []
+        entries = []
+        for path in self.root.glob("*/*.json"):
+            try:
+                entries.append((path, path.stat()))
+            except FileNotFoundError:
+                pass  # evicted by another process since the listing
+        return entries
+
+    def stats(self) -> dict:
+        entries = self._entries()
+        mtimes = [st.st_mtime for _, st in entries]
+        return {
+            "entries": len(entries),
+            "bytes": sum(st.st_size for _, st in entries),
+            "oldest": min(mtimes) if mtimes else None,
+            "newest": max(mtimes) if mtimes else None,
+        }
+
+    def prune(self, max_bytes: int | None = None, max_age: float | None = None) -> tuple[int, int]:
+        """Evict expired entries, then least-recently-used ones until under the size cap.
+
+        Returns (entries removed, bytes freed).
+        """
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        max_age = self.max_age if max_age is None else max_age
+        now = time.time()
+
+        entries = sorted(self._entries(), key=lambda e: e[1].st_mtime)
+        total = sum(st.st_size for _, st in entries)
+        removed = freed = 0
+        for path, st in entries:
+            if now - st.st_mtime <= max_age and total <= max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= st.st_size
+            removed += 1
+            freed += st.st_size
+        return removed, freed
+
+    def clear(self) -> tuple[int, int]:
+        """Remove every entry. Returns (entries removed, bytes freed)."""
+        return self.prune(max_bytes=0, max_age=0)
+
+
+class CachedProvider(BaseProvider):
+    """Serves repeated requests from a `ResponseCache`.
+
+    With `enabled=None` only deterministic (temperature 0) requests are
+    cached; True caches everything and False bypasses the cache.
+
+    Hits come back with cost 0.0, `metadata["cache_hit"] = True` and the
+    original cost in `metadata["original_cost"]`.
+    """
+
+    def __init__(self, inner: BaseProvider, cache: ResponseCache, enabled: bool | None = None):
+        self.inner = inner
+        self.name = inner.name
+        self.cache = cache
+        self.enabled = enabled
+
+    def _key(self, messages: list[Message], kwargs: dict) -> str | None:
+        temperature = kwargs.get("temperature")
+        if self.enabled is False or (self.enabled is None and temperature != 0):
+            return None
+        return self.cache.key(
+            self.name, kwargs.get("model"), messages, temperature, kwargs.get("max_tokens")
+        )
+
+    def _hit(self, cached: Response, started: float) -> Response:
+        cached.metadata.update(cache_hit=True, original_cost=cached.cost)
+        cached.cost = 0.0
+        cached.latency_ms = (time.monotonic() - started) * 1000
+        return cached
+
+    async def complete(self, messages: list[Message], **kwargs) -> Response:
+        started = time.monotonic()
+        key = self._key(messages, kwargs)
+        if key is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return self._hit(cached, started)
+
+        response = await self.inner.complete(messages, **kwargs)
+        if key is not None:
+            self.cache.put(key, response)
+        return response
+
+    async def stream(self, messages: list[Message], **kwargs) -> AsyncIterator[str | Response]:
+        started = time.monotonic()
+        key = self._key(messages, kwargs)
+        if key is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                yield cached.content
+                yield self._hit(cached, started)
+                return
+
+        chunks = []
+        final: Response | None = None
+        async for chunk in self.inner.stream(messages, **kwargs):
+            if isinstance(chunk, Response):
+                final = chunk
+            else:
+                chunks.append(chunk)
+            yield chunk
+
+        if key is not None:
+            response = final or Response(
+                content="", model=kwargs.get("model", ""), provider=self.name
+            )
+            self.cache.put(
+                key,
+                dataclasses.replace(
+                    response,
+                    content="".join(chunks),
+                    latency_ms=(time.monotonic() - started) * 1000,
+                    metadata=dict(response.metadata),
+                ),
+            )
+
+    async def list_models(self) -> list[str]:
+        return await self.inner.list_models()
+
+    @property
+    def unwrapped(self) -> BaseProvider:
+        return self.inner.unwrapped
+
+    async def aclose(self) -> None:
+        await self.inner.aclose()
@@ -1,39 +1,119 @@
 """Main CLI entrypoint for agentctl."""
 
+import importlib
+import itertools
+import sys
+
 import click
-from rich.console import Console
 
 from agentctl import __version__
-from agentctl.commands.config_cmd import config
-from agentctl.commands.models import models
-from agentctl.commands.run import run
-from agentctl.commands.session import session
-from agentctl.commands.costs import costs
-from agentctl.commands.compare import compare
-from agentctl.commands.logs import logs
 
-console = Console()
+# Subcommands are resolved by name on first use so that `agentctl --version`,
+# `--help` and light commands like `costs` don't pay for importing providers,
+# httpx, pydantic or the rich renderers used by the heavier commands.
+# name -> ("module:attribute", short help shown in `agentctl --help`)
+LAZY_COMMANDS: dict[str, tuple[str, str]] = {
+    "batch": ("agentctl.commands.batch:batch", "Run every prompt in a JSONL file."),
+    "cache": ("agentctl.commands.cache_cmd:cache", "Manage the response cache."),
+    "compare": ("agentctl.commands.compare:compare", "Compare outputs from multiple models."),
+    "config": ("agentctl.commands.config_cmd:config", "Manage provider configurations."),
+    "costs": ("agentctl.commands.costs:costs", "View cost tracking data."),
+    "daemon": ("agentctl.commands.daemon_cmd:daemon", "Serve commands from a warm process."),
+    "logs": ("agentctl.commands.logs:logs", "Stream logs from a session."),
+    "models": (
+        "agentctl.commands.models:models",
+        "List available models; pull and load Ollama models.",
+    ),
+    "run": ("agentctl.commands.run:run", "Run a one-shot completion."),
+    "session": ("agentctl.commands.session:session", "Manage conversation sessions."),
+    "stats": ("agentctl.commands.stats:stats", "Show request latency and throughput."),
+}
+
+
+class LazyGroup(click.Group):
+    """A click group that imports subcommands only when they are invoked."""
+
+    def __init__(self, *args, lazy_commands: dict[str, tuple[str, str]] | None = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lazy_commands = lazy_commands or {}
+
+    def main(self, args=None, **kwargs):
+        """Hand the command to a running `agentctl daemon` when there is one."""
+        if args is None:
+            args = sys.argv[1:]
+        from agentctl import tracing
+        from agentctl.paths import DAEMON_SOCKET
+
+        if DAEMON_SOCKET.exists():
+            from agentctl import daemon
+
+            if daemon.should_forward(args):
+                status = daemon.forward(args)
+                if status is not None:
+                    sys.exit(status)
+
+        tracing.enable_from_env()
+        # --profile is read here, ahead of click, so the trace covers parsing
+        # and importing the command too
+        options = list(itertools.takewhile(lambda arg: arg.startswith("-"), args))
+        profiler = tracing.Profiler() if "--profile" in options else None
+        if profiler:
+            tracing.enable(profiler)
+        try:
+            command = next((arg for arg in args if not arg.startswith("-")), "")
+            with tracing.span(f"agentctl {command}".strip(), argv=" ".join(args)):
+                return super().main(args, **kwargs)
+        finally:
+            if profiler:
+                tracing.disable(profiler)
 
+    def list_commands(self, ctx: click.Context) -> list[str]:
+        return sorted(set(super().list_commands(ctx)) | set(self.lazy_commands))
 
-@click.group()
+    def get_command(self, ctx: click.Context, cmd_name: str) -> click.Command | None:
+        if cmd_name not in self.commands and cmd_name in self.lazy_commands:
+            import_path, _ = self.lazy_commands[cmd_name]
+            module_name, attr = import_path.split(":", 1)
+            from agentctl import tracing
+
+            with tracing.span("command.import", module=module_name):
+                module = importlib.import_module(module_name)
+            self.add_command(getattr(module, attr), cmd_name)
+        return super().get_command(ctx, cmd_name)
+
+    def format_commands(self, ctx: click.Context, formatter: click.HelpFormatter) -> None:
+        """List subcommands using the registered short help, without importing them."""
+        rows = []
+        for name in self.list_commands(ctx):
+            if name in self.commands:
+                cmd = self.commands[name]
+                if cmd.hidden:
+                    continue
+                rows.append((name, cmd.get_short_help_str(formatter.width)))
+            else:
+                rows.append((name, self.lazy_commands[name][1]))
+
+        if rows:
+            with formatter.section("Commands"):
+                formatter.write_dl(rows)
+
+
+@click.group(cls=LazyGroup, lazy_commands=LAZY_COMMANDS)
 @click.version_option(version=__version__, prog_name="agentctl")
+@click.option(
+    "--profile", is_flag=True, help="Print where the time of this command went, by phase."
+)
 @click.pass_context
-def main(ctx: click.Context) -> None:
+def main(ctx: click.Context, profile: bool) -> None:
     """agentctl — kubectl for AI agents.
 
     Manage, monitor, and debug AI agents across providers from one CLI.
+    Set AGENTCTL_TRACE=jsonl or otlp to export traces of every command.
     """
-    ctx.ensure_object(dict)
-    ctx.obj["console"] = console
+    from rich.console import Console
 
-
-main.add_command(config)
-main.add_command(models)
-main.add_command(run)
-main.add_command(session)
-main.add_command(costs)
-main.add_command(compare)
-main.add_command(logs)
+    ctx.ensure_object(dict)
+    ctx.obj["console"] = Console()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,331 @@
+"""Batch command — run many prompts from a JSONL file in one process."""
+
+import asyncio
+import json
+import os
+import time
+from pathlib import Path
+from typing import Iterator
+
+import click
+from rich.console import Console
+
+from agentctl.cache import CachedProvider
+from agentctl.ledger import record_costs, response_entry
+from agentctl.config import AgentctlConfig
+from agentctl.providers import BaseProvider, Message, get_provider
+from agentctl.runtime import run_async
+
+# Cost entries are appended to the ledger in chunks of this size
+COST_FLUSH_EVERY = 200
+
+
+@click.command()
+@click.argument("input_file", type=click.Path(exists=True, dir_okay=False, path_type=Path))
+@click.option(
+    "--out", "-o", "out_file", required=True,
+    type=click.Path(dir_okay=False, path_type=Path), help="Where to write results (JSONL)",
+)
+@click.option("--provider", "-p", help="Provider for records that don't name one")
+@click.option("--model", "-m", help="Model for records that don't name one")
+@click.option("--system", "-s", help="System prompt for records that don't set one")
+@click.option(
+    "--concurrency", "-j", type=click.IntRange(min=1), default=8, show_default=True,
+    help="Maximum in-flight requests per provider",
+)
+@click.option(
+    "--order", type=click.Choice(["input", "completion"]), default="input", show_default=True,
+    help="Write results in input order or as they complete",
+)
+@click.option(
+    "--cache/--no-cache", default=None,
+    help="Serve repeats from the response cache (default: temperature 0 only)",
+)
+@click.option(
+    "--resume/--restart", default=True, show_default=True,
+    help="Skip records already completed in the output file; failed ones are retried",
+)
+def batch(
+    input_file: Path,
+    out_file: Path,
+    provider: str | None,
+    model: str | None,
+    system: str | None,
+    concurrency: int,
+    order: str,
+    cache: bool | None,
+    resume: bool,
+):
+    """Run every prompt in a JSONL file.
+
+    Each input line is an object with a "prompt" (or a "messages" list) and
+    optional "id", "provider", "model", "system", "temperature" and
+    "max_tokens" fields. Results are written incrementally, so an interrupted
+    batch picks up where it left off when run again, retrying the records
+    that failed. A line that isn't a valid record gets an error result.
+
+    Example:
+
+        agentctl batch evals.jsonl --out results.jsonl -p openai -m gpt-4o-mini -j 16
+    """
+    run_async(
+        _batch(input_file, out_file, provider, model, system, concurrency, order, cache, resume)
+    )
+
+
+def _read_input(input_file: Path) -> Iterator[tuple[int, dict | str]]:
+    """Lazily yield (index, record) for each non-blank input line.
+
+    A line that isn't a valid record yields an error message instead, so one
+    bad line doesn't stop the rest of the batch.
+    """
+    with open(input_file) as f:
+        index = 0
+        for lineno, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                record = f"Invalid JSON on line {lineno}: {e}"
+            else:
+                problem = _invalid(record)
+                if problem:
+                    record = f"Line {lineno} {problem}"
+            yield index, record
+            index += 1
+
+
+def _invalid(record) -> str | None:
+    """What is wrong with an input record, or None if it can be sent."""
+    if not isinstance(record, dict):
+        return "is not a JSON object"
+    if "messages" not in record:
+        if not isinstance(record.get("prompt"), str):
+            return 'has no "prompt" string or "messages" list'
+        return None
+    messages = record["messages"]
+    if not isinstance(messages, list) or not messages:
+        return 'has a "messages" field that is not a non-empty list'
+    for i, m in enumerate(messages, 1):
+        fields = (m.get("role"), m.get("content")) if isinstance(m, dict) else (None,)
+        if not all(isinstance(f, str) for f in fields):
+            return f'has a message {i} without a "role" and "content" string'
+    return None
+
+
+def _completed_indices(out_file: Path) -> tuple[set[int], int]:
+    """Indices completed in `out_file`, and the number of failed ones dropped.
+
+    A torn trailing line is cut off. Results that failed are removed from the
+    file, so the records are retried and their new results take their place.
+    """
+    done: set[int] = set()
+    if not out_file.exists():
+        return done, 0
+
+    kept: list[bytes] = []
+    failed = 0
+    with open(out_file, "rb+") as f:
+        good_end = 0
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            try:
+                result = json.loads(line)
+                index = result["index"]
+            except (ValueError, KeyError):
+                break
+            good_end += len(line)
+            if "error" in result:
+                failed += 1
+            else:
+                done.add(index)
+                kept.append(line)
+        # Anything after the last complete record was cut off by a crash
+        f.truncate(good_end)
+
+    if failed:
+        tmp = out_file.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_bytes(b"".join(kept))
+        os.replace(tmp, out_file)
+    return done, failed
+
+
+def _sort_results(out_file: Path) -> None:
+    """Rewrite `out_file` in input order, if it isn't already.
+
+    Only each result's index and position are held, not its content.
+    """
+    spans: list[tuple[int, int, int]] = []
+    with open(out_file, "rb") as f:
+        offset = 0
+        for line in f:
+            spans.append((json.loads(line)["index"], offset, len(line)))
+            offset += len(line)
+        if all(a[0] < b[0] for a, b in zip(spans, spans[1:])):
+            return
+        spans.sort()
+        tmp = out_file.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp, "wb") as sorted_out:
+            for _, offset, length in spans:
+                f.seek(offset)
+                sorted_out.write(f.read(length))
+    os.replace(tmp, out_file)
+
+
+def _build_messages(record: dict, system: str | None) -> list[Message]:
+    if "messages" in record:
+        return [Message(role=m["role"], content=m["content"]) for m in record["messages"]]
+
+    messages = []
+    system = record.get("system", system)
+    if system:
+        messages.append(Message(role="system", content=system))
+    messages.append(Message(role="user", content=record["prompt"]))
+    return messages
+
+
+async def _batch(
+    input_file: Path,
+    out_file: Path,
+    provider_name: str | None,
+    model: str | None,
+    system: str | None,
+    concurrency: int,
+    order: str,
+    cache: bool | None,
+    resume: bool,
+):
+    console = Console(stderr=True)
+    cfg = AgentctlConfig.load()
+    response_cache = cfg.cache.open()
+    use_cache = cfg.cache.enabled if cache is None else cache
+
+    done, failed = _completed_indices(out_file) if resume else (set(), 0)
+    if done or failed:
+        retrying = f"; retrying {failed} that failed" if failed else ""
+        console.print(
+            f"[dim]Resuming: {len(done)} records already in {out_file}{retrying}[/dim]"
+        )
+
+    instances: dict[str, BaseProvider] = {}
+    limits: dict[str, asyncio.Semaphore] = {}
+    # Bounds in-flight requests plus results waiting to be written in order,
+    # so memory stays flat no matter how large the input is.
+    window = asyncio.Semaphore(concurrency * 4)
+
+    pending: dict[int, dict] = {}
+    next_index = 0
+    cost_entries: list[dict] = []
+    stats = {"ok": 0, "errors": 0, "cost": 0.0}
+    start = time.monotonic()
+
+    out = open(out_file, "a" if resume else "w")
+
+    def write(result: dict):
+        out.write(json.dumps(result) + "\n")
+        out.flush()
+        window.release()
+
+    def flush_in_order():
+        nonlocal next_index
+        while True:
+            if next_index in done:
+                next_index += 1
+            elif next_index in pending:
+                write(pending.pop(next_index))
+                next_index += 1
+            else:
+                break
+
+    def get_instance(pname: str) -> BaseProvider:
+        if pname not in instances:
+            _, pcfg = cfg.get_provider(pname)
+            instances[pname] = CachedProvider(
+                pcfg.create(get_provider(pname)), response_cache, use_cache
+            )
+            limits[pname] = asyncio.Semaphore(concurrency)
+        return instances[pname]
+
+    async def process(index: int, record: dict):
+        pname, pcfg = cfg.get_provider(record.get("provider", provider_name))
+        result = {"index": index, "id": record.get("id", index), "provider": pname}
+        try:
+            instance = get_instance(pname)
+            kwargs = {"model": record.get("model", model) or pcfg.default_model}
+            if kwargs["model"] is None:
+                del kwargs["model"]
+            for key in ("temperature", "max_tokens"):
+                if key in record:
+                    kwargs[key] = record[key]
+
+            async with limits[pname]:
+                resp = await instance.complete(_build_messages(record, system), **kwargs)
+
+            result.update(
+                model=resp.model,
+                content=resp.content,
+                input_tokens=resp.input_tokens,
+                output_tokens=resp.output_tokens,
+                cost=resp.cost,
+                latency_ms=round(resp.latency_ms, 1),
+            )
+            if resp.metadata.get("cache_hit"):
+                result["cache_hit"] = True
+            stats["ok"] += 1
+            stats["cost"] += resp.cost
+            if cfg.costs.track:
+                cost_entries.append(response_entry(resp))
+                if len(cost_entries) >= COST_FLUSH_EVERY:
+                    record_costs(cost_entries)
+                    cost_entries.clear()
+        except Exception as e:
+            result["error"] = str(e)
+            stats["errors"] += 1
+        finish(index, result)
+
+    def finish(index: int, result: dict):
+        if order == "completion":
+            write(result)
+        else:
+            pending[index] = result
+            flush_in_order()
+        status.update(
+            f"[cyan]{stats['ok']} done, {stats['errors']} failed, "
+            f"{len(tasks)} in flight | ${stats['cost']:.4f}[/cyan]"
+        )
+
+    tasks: set[asyncio.Task] = set()
+    status = console.status("[cyan]Starting...[/cyan]")
+    status.start()
+    try:
+        for index, record in _read_input(input_file):
+            if index in done:
+                continue
+            await window.acquire()
+            if isinstance(record, str):
+                stats["errors"] += 1
+                finish(index, {"index": index, "id": index, "error": record})
+                continue
+            task = asyncio.create_task(process(index, record))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        if tasks:
+            await asyncio.gather(*tasks)
+    finally:
+        status.stop()
+        record_costs(cost_entries)
+        out.close()
+        for instance in instances.values():
+            await instance.aclose()
+
+    # Results of this run were appended after those kept from earlier ones
+    if order == "input" and (done or failed):
+        _sort_results(out_file)
+
+    elapsed = time.monotonic() - start
+    console.print(
+        f"✓ {stats['ok']} completed, {stats['errors']} failed in {elapsed:.1f}s "
+        f"| Cost: ${stats['cost']:.4f} | Results: {out_file}"
+    )
@@ -0,0 +1,68 @@
+"""Response cache commands."""
+
+from datetime import datetime
+
+import click
+from rich.console import Console
+
+from agentctl.config import AgentctlConfig
+from agentctl.ledger import Totals, load_rollup
+
+
+def _size(n: float) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if n < 1024 or unit == "GB":
+            return f"{n:.1f} {unit}" if unit != "B" else f"{int(n)} B"
+        n /= 1024
+
+
+@click.group()
+def cache():
+    """Manage the response cache."""
+    pass
+
+
+@cache.command("stats")
+def cache_stats():
+    """Show cache size and this month's savings."""
+    console = Console()
+    cfg = AgentctlConfig.load()
+    stats = cfg.cache.open().stats()
+
+    console.print(f"[bold]Entries:[/bold] {stats['entries']}")
+    console.print(f"[bold]Size:[/bold] {_size(stats['bytes'])} / {cfg.cache.max_size_mb:.0f} MB")
+    if stats["oldest"]:
+        oldest = datetime.fromtimestamp(stats["oldest"]).isoformat(timespec="seconds")
+        newest = datetime.fromtimestamp(stats["newest"]).isoformat(timespec="seconds")
+        console.print(f"[bold]Last used:[/bold] {oldest} … {newest}")
+
+    total = Totals()
+    for totals in load_rollup(datetime.now().strftime("%Y-%m")).values():
+        total.merge(totals)
+    ratio = total.cache_hits / total.calls if total.calls else 0.0
+    console.print(
+        f"[bold]This month:[/bold] {total.cache_hits} hits of {total.calls} calls "
+        f"({ratio:.0%}), saved ${total.saved:.4f}"
+    )
+
+
+@cache.command("prune")
+@click.option("--max-size-mb", type=float, help="Evict least recently used entries above this size")
+@click.option("--max-age-days", type=float, help="Evict entries unused for this many days")
+def cache_prune(max_size_mb: float | None, max_age_days: float | None):
+    """Evict expired and least recently used entries."""
+    cfg = AgentctlConfig.load()
+    removed, freed = cfg.cache.open().prune(
+        max_bytes=int(max_size_mb * 1024 * 1024) if max_size_mb is not None else None,
+        max_age=max_age_days * 86400 if max_age_days is not None else None,
+    )
+    click.echo(f"✓ Removed {removed} entries ({_size(freed)}).")
+
+
+@cache.command("clear")
+@click.confirmation_option(prompt="Remove every cached response?")
+def cache_clear():
+    """Remove every cached response."""
+    cfg = AgentctlConfig.load()
+    removed, freed = cfg.cache.open().clear()
+    click.echo(f"✓ Removed {removed} entries ({_size(freed)}).")
@@ -1,37 +1,90 @@
 """Compare command — run same prompt across multiple models."""
 
 import asyncio
+import time
+from dataclasses import dataclass, field
+from functools import partial
 
 import click
 from rich.console import Console
 from rich.panel import Panel
 from rich.table import Table
+from rich.text import Text
 
+from agentctl.cache import CachedProvider
+from agentctl.ledger import record_response
 from agentctl.config import AgentctlConfig
-from agentctl.providers import Message, get_provider
+from agentctl.providers import BaseProvider, Message, Response, get_provider
+from agentctl.runtime import run_async
 
-import agentctl.providers.ollama  # noqa: F401
-import agentctl.providers.anthropic_provider  # noqa: F401
-import agentctl.providers.openai_provider  # noqa: F401
+
+@dataclass
+class _Result:
+    """Outcome of querying one model."""
+
+    pname: str
+    model: str
+    chunks: list[str] = field(default_factory=list)
+    response: Response | None = None
+    ttft_ms: float | None = None
+    latency_ms: float | None = None
+    error: str | None = None
+    done: bool = False
+
+    @property
+    def label(self) -> str:
+        return f"{self.pname}:{self.model}"
+
+    @property
+    def content(self) -> str:
+        return self.response.content if self.response else "".join(self.chunks)
 
 
 @click.command()
 @click.argument("prompt")
 @click.option("--models", "-m", required=True, help="Comma-separated list of provider:model pairs")
 @click.option("--system", "-s", help="System prompt")
-def compare(prompt: str, models: str, system: str | None):
+@click.option(
+    "--max-concurrency", "-j", type=click.IntRange(min=1),
+    help="Maximum number of models queried at once (default: all)",
+)
+@click.option("--stream", is_flag=True, help="Stream every model's output live, side by side")
+@click.option(
+    "--cache/--no-cache", default=None,
+    help="Serve repeats from the response cache (default: temperature 0 only)",
+)
+def compare(
+    prompt: str,
+    models: str,
+    system: str | None,
+    max_concurrency: int | None,
+    stream: bool,
+    cache: bool | None,
+):
     """Compare outputs from multiple models.
 
+    Models are queried concurrently, so the comparison takes about as long as
+    the slowest model rather than the sum of all of them.
+
     Example:
 
         agentctl compare "Explain TCP" --models anthropic:claude-sonnet,openai:gpt-4o,ollama:llama3.1:8b
     """
-    asyncio.run(_compare(prompt, models, system))
+    run_async(_compare(prompt, models, system, max_concurrency, stream, cache))
 
 
-async def _compare(prompt: str, models_str: str, system: str | None):
+async def _compare(
+    prompt: str,
+    models_str: str,
+    system: str | None,
+    max_concurrency: int | None = None,
+    stream: bool = False,
+    cache: bool | None = None,
+):
     console = Console()
     cfg = AgentctlConfig.load()
+    response_cache = cfg.cache.open()
+    use_cache = cfg.cache.enabled if cache is None else cache
 
     model_specs = []
     for spec in models_str.split(","):
@@ -50,51 +103,153 @@ async def _compare(prompt: str, models_str: str, system: str | None):
 
     console.print(f"\n[bold]Prompt:[/bold] {prompt}\n")
 
-    results = []
+    results: list[_Result] = []
+    jobs = []
 
     for pname, model in model_specs:
+        result = _Result(pname, model)
+        results.append(result)
         try:
-            pcfg = cfg.providers.get(pname)
+            _, pcfg = cfg.get_provider(pname)
             provider_cls = get_provider(pname)
-
-            init_kwargs = {}
-            if pcfg:
-                if pcfg.api_key:
-                    init_kwargs["api_key"] = pcfg.api_key
-                if pcfg.endpoint:
-                    init_kwargs["endpoint"] = pcfg.endpoint
-
-            instance = provider_cls(**init_kwargs)
-
-            with console.status(f"[cyan]Querying {pname}:{model}...[/cyan]"):
-                response = await instance.complete(messages, model=model)
-
-            results.append((pname, model, response))
-
+            instance = CachedProvider(pcfg.create(provider_cls), response_cache, use_cache)
+            jobs.append((result, instance))
+        except Exception as e:
+            result.error = str(e)
+            result.done = True
+
+    semaphore = asyncio.Semaphore(max_concurrency or max(len(jobs), 1))
+    query = _query_stream if stream else _query
+    wall_start = time.monotonic()
+
+    async def run_all():
+        await asyncio.gather(*(query(r, inst, messages, semaphore) for r, inst in jobs))
+
+    if stream:
+        from rich.live import Live
+
+        renderable = partial(_render_live, results)
+        with Live(get_renderable=renderable, console=console, refresh_per_second=10):
+            await run_all()
+        console.print()
+    else:
+        with console.status(f"[cyan]Querying {len(jobs)} models...[/cyan]"):
+            await run_all()
+
+    wall_ms = (time.monotonic() - wall_start) * 1000
+
+    for _, instance in jobs:
+        await instance.aclose()
+
+    ok = []
+    for r in results:
+        if r.error:
+            console.print(f"[red]Error with {r.label}: {r.error}[/red]")
+            continue
+        ok.append(r)
+        if r.response and cfg.costs.track:
+            record_response(r.response)
+        if not stream:
+            resp = r.response
+            stats = (
+                f"{resp.input_tokens}→{resp.output_tokens} tokens | "
+                f"${resp.cost:.4f} | {resp.latency_ms:.0f}ms"
+            )
             console.print(
                 Panel(
-                    response.content,
-                    title=f"[bold cyan]{pname}:{model}[/bold cyan]",
-                    subtitle=f"[dim]{response.input_tokens}→{response.output_tokens} tokens | ${response.cost:.4f} | {response.latency_ms:.0f}ms[/dim]",
+                    resp.content,
+                    title=f"[bold cyan]{r.label}[/bold cyan]",
+                    subtitle=f"[dim]{stats}[/dim]",
                 )
             )
-        except Exception as e:
-            console.print(f"[red]Error with {pname}:{model}: {e}[/red]")
 
     # Summary table
-    if len(results) > 1:
-        table = Table(title="Comparison Summary")
+    if len(ok) > 1:
+        total_latency = sum(r.latency_ms for r in ok)
+        table = Table(
+            title="Comparison Summary",
+            caption=(
+                f"Wall clock: {wall_ms:.0f}ms | Sum of latencies: {total_latency:.0f}ms | "
+                f"Speedup: {total_latency / wall_ms if wall_ms else 1:.1f}x"
+            ),
+        )
         table.add_column("Model", style="cyan")
         table.add_column("Output Tokens", justify="right")
         table.add_column("Cost", justify="right", style="green")
+        # Time to first token is only known when streaming
+        if stream:
+            table.add_column("TTFT", justify="right")
         table.add_column("Latency", justify="right")
 
-        for pname, model, resp in results:
-            table.add_row(
-                f"{pname}:{model}",
-                str(resp.output_tokens),
-                f"${resp.cost:.4f}",
-                f"{resp.latency_ms:.0f}ms",
-            )
+        for r in ok:
+            resp = r.response
+            row = [
+                r.label,
+                str(resp.output_tokens) if resp else "—",
+                f"${resp.cost:.4f}" if resp else "—",
+            ]
+            if stream:
+                row.append(f"{r.ttft_ms:.0f}ms" if r.ttft_ms is not None else "—")
+            table.add_row(*row, f"{r.latency_ms:.0f}ms")
 
         console.print(table)
+
+
+async def _query(
+    result: _Result, instance: BaseProvider, messages: list[Message], semaphore: asyncio.Semaphore
+):
+    """Run one non-streaming completion, recording its outcome on `result`."""
+    async with semaphore:
+        try:
+            result.response = await instance.complete(messages, model=result.model)
+            result.latency_ms = result.response.latency_ms
+        except Exception as e:
+            result.error = str(e)
+        finally:
+            result.done = True
+
+
+async def _query_stream(
+    result: _Result, instance: BaseProvider, messages: list[Message], semaphore: asyncio.Semaphore
+):
+    """Stream one completion into `result`, timing the first token and the whole reply."""
+    async with semaphore:
+        start = time.monotonic()
+        reply = instance.stream_response(messages, model=result.model)
+        try:
+            async for chunk in reply:
+                if result.ttft_ms is None:
+                    result.ttft_ms = reply.ttft_ms
+                result.chunks.append(chunk)
+            result.response = reply.response
+        except Exception as e:
+            result.error = str(e)
+        finally:
+            result.latency_ms = (time.monotonic() - start) * 1000
+            result.done = True
+
+
+def _render_live(results: list[_Result]) -> Table:
+    """Lay out one panel per model, side by side."""
+    grid = Table.grid(expand=True, padding=(0, 1))
+    for _ in results:
+        grid.add_column(ratio=1)
+
+    panels = []
+    for r in results:
+        if r.error:
+            body, status = Text(r.error, style="red"), "error"
+        else:
+            body = Text(r.content)
+            if r.done:
+                status = f"{r.latency_ms:.0f}ms"
+            elif r.ttft_ms is not None:
+                status = "streaming..."
+            else:
+                status = "waiting..."
+        panels.append(
+            Panel(body, title=f"[bold cyan]{r.label}[/bold cyan]", subtitle=f"[dim]{status}[/dim]")
+        )
+
+    grid.add_row(*panels)
+    return grid
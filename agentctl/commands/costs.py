@@ -1,105 +1,273 @@
 """Cost tracking commands."""
 
+import calendar
+import csv
+import dataclasses
 import json
-from datetime import datetime
-from pathlib import Path
+import sys
+from datetime import date, datetime
+from typing import Iterable, Iterator
 
 import click
 from rich.console import Console
 from rich.table import Table
 
-from agentctl.config import COSTS_DIR
+from agentctl.ledger import (
+    Totals,
+    iter_records,
+    months,
+    records_between,
+    reindex,
+    rewrite,
+    rollups_between,
+)
+# Ledger writers used to live here; keep the old import path working
+from agentctl.ledger import record_cost, record_costs, record_response  # noqa: F401
 
+GROUPINGS = ("provider", "model", "day", "session")
 
-def _load_costs(month: str | None = None) -> list[dict]:
-    """Load cost records for a given month."""
-    COSTS_DIR.mkdir(parents=True, exist_ok=True)
-    month = month or datetime.now().strftime("%Y-%m")
-    costs_file = COSTS_DIR / f"{month}.jsonl"
+# Position of each rollup-backed grouping in a (day, provider, model) key
+_ROLLUP_KEY = {"day": 0, "provider": 1, "model": 2}
 
-    if not costs_file.exists():
-        return []
 
-    records = []
-    for line in costs_file.read_text().strip().split("\n"):
-        if line.strip():
-            records.append(json.loads(line))
-    return records
+def _period(
+    today: bool, month: str | None, since: date | None, until: date | None
+) -> tuple[str | None, str | None, str]:
+    """Resolve the period flags to an inclusive (since, until) day range and a label."""
+    if today:
+        day = date.today().isoformat()
+        return day, day, day
+    if since or until:
+        start, end = since and since.isoformat(), until and until.isoformat()
+        return start, end, f"{start or 'start'} → {end or 'now'}"
+    month = month or date.today().strftime("%Y-%m")
+    try:
+        year, mon = (int(part) for part in month.split("-"))
+        last = calendar.monthrange(year, mon)[1]
+    except ValueError:
+        raise click.BadParameter(f"expected YYYY-MM, got '{month}'", param_hint="--month")
+    return f"{month}-01", f"{month}-{last:02d}", month
+
 
+def _grouped(
+    by: str | None, since: str | None, until: str | None
+) -> Iterator[tuple[str, Totals]]:
+    """(group, totals) pairs for the range, one per rollup row or ledger entry.
 
-def record_cost(model: str, provider: str, input_tokens: int, output_tokens: int, cost: float):
-    """Record a cost entry."""
-    COSTS_DIR.mkdir(parents=True, exist_ok=True)
-    month = datetime.now().strftime("%Y-%m")
-    costs_file = COSTS_DIR / f"{month}.jsonl"
+    Provider/model/day groupings come from the pre-aggregated rollups; only
+    per-session totals need the raw ledger.
+    """
+    if by == "session":
+        for entry in records_between(since, until):
+            totals = Totals()
+            totals.add(entry)
+            yield entry.get("session") or "-", totals
+    else:
+        index = _ROLLUP_KEY.get(by)
+        for key, totals in rollups_between(since, until):
+            yield ("" if index is None else key[index]), totals
 
-    entry = {
-        "timestamp": datetime.now().isoformat(),
-        "model": model,
-        "provider": provider,
-        "input_tokens": input_tokens,
-        "output_tokens": output_tokens,
-        "cost": cost,
-    }
 
-    with open(costs_file, "a") as f:
-        f.write(json.dumps(entry) + "\n")
+def _aggregate(pairs: Iterable[tuple[str, Totals]]) -> tuple[dict[str, Totals], Totals]:
+    groups: dict[str, Totals] = {}
+    total = Totals()
+    for name, totals in pairs:
+        groups.setdefault(name, Totals()).merge(totals)
+        total.merge(totals)
+    return groups, total
 
 
-@click.command()
+@click.group(invoke_without_command=True)
 @click.option("--today", is_flag=True, help="Show today's costs only")
 @click.option("--this-month", "this_month", is_flag=True, help="Show this month's costs")
 @click.option("--month", help="Show costs for a specific month (YYYY-MM)")
-@click.option("--by-model", "by_model", is_flag=True, help="Group by model")
-def costs(today: bool, this_month: bool, month: str | None, by_model: bool):
-    """View cost tracking data."""
+@click.option(
+    "--since", type=click.DateTime(["%Y-%m-%d"]), help="First day to include (YYYY-MM-DD)"
+)
+@click.option(
+    "--until", type=click.DateTime(["%Y-%m-%d"]), help="Last day to include (YYYY-MM-DD)"
+)
+@click.option("--by", type=click.Choice(GROUPINGS), help="Group totals by this field")
+@click.option("--by-model", "by_model", is_flag=True, help="Group by model (same as --by model)")
+@click.option(
+    "--format",
+    "fmt",
+    type=click.Choice(["table", "json", "csv"]),
+    default="table",
+    show_default=True,
+    help="Output format",
+)
+@click.pass_context
+def costs(
+    ctx: click.Context,
+    today: bool,
+    this_month: bool,
+    month: str | None,
+    since: datetime | None,
+    until: datetime | None,
+    by: str | None,
+    by_model: bool,
+    fmt: str,
+):
+    """View cost tracking data.
+
+    Example:
+
+        agentctl costs --since 2026-01-01 --until 2026-03-31 --by provider
+
+        agentctl costs --month 2026-02 --by session --format csv
+    """
+    if ctx.invoked_subcommand is not None:
+        return
     console = Console()
 
-    target_month = month or datetime.now().strftime("%Y-%m")
-    records = _load_costs(target_month)
+    start, end, period = _period(today, month, since and since.date(), until and until.date())
+    by = by or ("model" if by_model else None)
+    groups, total = _aggregate(_grouped(by, start, end))
 
-    if today:
-        today_str = datetime.now().strftime("%Y-%m-%d")
-        records = [r for r in records if r["timestamp"].startswith(today_str)]
+    if fmt == "json":
+        click.echo(
+            json.dumps(
+                {
+                    "since": start,
+                    "until": end,
+                    "by": by,
+                    "groups": [
+                        {by: name, **dataclasses.asdict(stats)}
+                        for name, stats in sorted(groups.items())
+                    ]
+                    if by
+                    else [],
+                    "total": dataclasses.asdict(total),
+                },
+                indent=2,
+            )
+        )
+        return
 
-    if not records:
+    if fmt == "csv":
+        fields = [field.name for field in dataclasses.fields(Totals)]
+        writer = csv.writer(sys.stdout)
+        writer.writerow([by or "period", *fields])
+        rows = sorted(groups.items()) if by else [(period, total)]
+        for name, stats in rows:
+            writer.writerow([name, *dataclasses.astuple(stats)])
+        return
+
+    if not total.calls:
         console.print("[dim]No cost data found for this period.[/dim]")
         return
 
-    if by_model:
-        # Group by model
-        model_stats: dict[str, dict] = {}
-        for r in records:
-            m = r["model"]
-            if m not in model_stats:
-                model_stats[m] = {"calls": 0, "input": 0, "output": 0, "cost": 0.0}
-            model_stats[m]["calls"] += 1
-            model_stats[m]["input"] += r["input_tokens"]
-            model_stats[m]["output"] += r["output_tokens"]
-            model_stats[m]["cost"] += r["cost"]
-
-        table = Table(title=f"Costs by Model ({target_month})")
-        table.add_column("Model", style="cyan")
+    if by:
+        table = Table(title=f"Costs by {by.capitalize()} ({period})")
+        table.add_column(by.capitalize(), style="cyan")
         table.add_column("Calls", justify="right")
         table.add_column("Tokens (in/out)", justify="right")
+        # Prompt cache hit ratio, when any provider reported cache usage
+        show_ratio = bool(total.cache_read_tokens or total.cache_write_tokens)
+        if show_ratio:
+            table.add_column("Prompt cache", justify="right")
         table.add_column("Cost", justify="right", style="green")
 
-        total_cost = 0.0
-        for m, stats in sorted(model_stats.items()):
-            tokens = f"{stats['input']:,} / {stats['output']:,}"
-            table.add_row(m, str(stats["calls"]), tokens, f"${stats['cost']:.4f}")
-            total_cost += stats["cost"]
+        for name, stats in sorted(groups.items()):
+            tokens = f"{stats.input_tokens:,} / {stats.output_tokens:,}"
+            ratio = [_ratio(stats)] if show_ratio else []
+            table.add_row(name, str(stats.calls), tokens, *ratio, f"${stats.cost:.4f}")
 
         table.add_section()
-        table.add_row("[bold]Total[/bold]", str(len(records)), "", f"[bold]${total_cost:.4f}[/bold]")
+        ratio = [_ratio(total)] if show_ratio else []
+        table.add_row(
+            "[bold]Total[/bold]", str(total.calls), "", *ratio, f"[bold]${total.cost:.4f}[/bold]"
+        )
         console.print(table)
     else:
-        total_cost = sum(r["cost"] for r in records)
-        total_calls = len(records)
-        total_input = sum(r["input_tokens"] for r in records)
-        total_output = sum(r["output_tokens"] for r in records)
-
-        console.print(f"\n[bold]Period:[/bold] {target_month}")
-        console.print(f"[bold]Total calls:[/bold] {total_calls}")
-        console.print(f"[bold]Total tokens:[/bold] {total_input:,} in / {total_output:,} out")
-        console.print(f"[bold]Total cost:[/bold] ${total_cost:.4f}")
+        console.print(f"\n[bold]Period:[/bold] {period}")
+        console.print(f"[bold]Total calls:[/bold] {total.calls}")
+        console.print(
+            f"[bold]Total tokens:[/bold] {total.input_tokens:,} in / {total.output_tokens:,} out"
+        )
+        console.print(f"[bold]Total cost:[/bold] ${total.cost:.4f}")
+
+        if total.cache_hits:
+            console.print(
+                f"[bold]Cache hits:[/bold] {total.cache_hits} (saved ${total.saved:.4f})"
+            )
+        if total.cache_read_tokens or total.cache_write_tokens:
+            console.print(
+                f"[bold]Prompt cache:[/bold] {_ratio(total)} of input read from cache "
+                f"({total.cache_read_tokens:,} read / {total.cache_write_tokens:,} written)"
+            )
+    if total.unpriced:
+        console.print(
+            f"[yellow]{total.unpriced} calls of models without a known price are counted "
+            "at $0. Add their prices to ~/.agentctl/pricing.yaml and run "
+            "`agentctl costs reprice`.[/yellow]"
+        )
+
+
+def _ratio(totals: Totals) -> str:
+    ratio = totals.prompt_cache_ratio
+    return "—" if ratio is None else f"{ratio:.0%}"
+
+
+@costs.command("reindex")
+@click.option("--month", help="Only rebuild this month (YYYY-MM); default: all months")
+def costs_reindex(month: str | None):
+    """Rebuild the cost rollups from the raw ledger."""
+    for m in [month] if month else months():
+        groups = reindex(m)
+        calls = sum(t.calls for t in groups.values())
+        click.echo(f"✓ {m}: {calls} records in {len(groups)} groups.")
+
+
+def _reprice(entry: dict) -> dict:
+    """An entry with its cost recomputed at the prices of the day it was recorded.
+
+    Cache hits stay free; their saved cost is recomputed instead. Entries of
+    models that still have no price keep their cost and their flag.
+    """
+    from agentctl.pricing import estimate_cost
+
+    cost = estimate_cost(
+        entry.get("provider", "?"),
+        entry.get("model", "?"),
+        entry.get("input_tokens", 0),
+        entry.get("output_tokens", 0),
+        entry.get("cache_read_tokens", 0),
+        entry.get("cache_write_tokens", 0),
+        batch=entry.get("batch", False),
+        at=entry["timestamp"],
+    )
+    if cost is None:
+        return entry
+    entry.pop("unpriced", None)
+    entry["saved" if entry.get("cache_hit") else "cost"] = cost
+    return entry
+
+
+@costs.command("reprice")
+@click.option("--month", help="Only reprice this month (YYYY-MM); default: all months")
+@click.option("--dry-run", is_flag=True, help="Show the new totals without changing the ledger")
+def costs_reprice(month: str | None, dry_run: bool):
+    """Recompute ledger costs from the current price table.
+
+    Each entry is priced as of the day it was recorded, using the built-in
+    prices and ~/.agentctl/pricing.yaml. Run it after adding the price of a
+    model that was used before it was known.
+    """
+    for m in [month] if month else months():
+        before = Totals()
+        for entry in iter_records(m):
+            before.add(entry)
+        after = Totals()
+        if dry_run:
+            for entry in iter_records(m):
+                after.add(_reprice(entry))
+        else:
+            for totals in rewrite(m, _reprice).values():
+                after.merge(totals)
+        unpriced = f" ({after.unpriced} still unpriced)" if after.unpriced else ""
+        click.echo(
+            f"{'~' if dry_run else '✓'} {m}: {after.calls} records, "
+            f"${before.cost:.4f} → ${after.cost:.4f}{unpriced}."
+        )
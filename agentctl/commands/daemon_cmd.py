@@ -0,0 +1,95 @@
+"""Daemon commands — run agentctl as a warm background process."""
+
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import click
+from rich.console import Console
+
+from agentctl import daemon as agentctl_daemon
+from agentctl.paths import DAEMON_LOG, DAEMON_SOCKET
+
+
+@click.group()
+def daemon():
+    """Serve commands from a warm process.
+
+    While the daemon runs, `run`, `compare`, `costs`, `models` and `session
+    send` are executed by it over ~/.agentctl/daemon.sock, skipping Python startup,
+    config parsing and TLS handshakes. Set AGENTCTL_NO_DAEMON=1 to bypass it.
+    """
+    pass
+
+
+@daemon.command("start")
+@click.option("--foreground", is_flag=True, help="Serve in this process instead of detaching")
+def daemon_start(foreground: bool):
+    """Start the daemon."""
+    console = Console()
+    status = agentctl_daemon.control("status")
+    if status is not None:
+        console.print(f"[yellow]Daemon already running (pid {status['pid']}).[/yellow]")
+        return
+
+    if foreground:
+        console.print(f"[dim]Serving on {DAEMON_SOCKET} (Ctrl+C to stop)[/dim]")
+        agentctl_daemon.serve()
+        return
+
+    DAEMON_LOG.parent.mkdir(parents=True, exist_ok=True)
+    with open(DAEMON_LOG, "a") as log:
+        proc = subprocess.Popen(
+            [sys.executable, "-m", "agentctl.daemon"],
+            stdin=subprocess.DEVNULL,
+            stdout=log,
+            stderr=log,
+            start_new_session=True,
+        )
+
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        status = agentctl_daemon.control("status")
+        if status is not None:
+            console.print(f"[green]✓[/green] Daemon started (pid {status['pid']}).")
+            return
+        if proc.poll() is not None:
+            break
+        time.sleep(0.05)
+    console.print(f"[red]Daemon failed to start; see {DAEMON_LOG}.[/red]")
+    sys.exit(1)
+
+
+@daemon.command("stop")
+def daemon_stop():
+    """Stop the daemon."""
+    console = Console()
+    if agentctl_daemon.control("stop") is None:
+        console.print("[dim]Daemon not running.[/dim]")
+        return
+
+    deadline = time.monotonic() + 10
+    while DAEMON_SOCKET.exists() and time.monotonic() < deadline:
+        time.sleep(0.05)
+    console.print("[green]✓[/green] Daemon stopped.")
+
+
+@daemon.command("status")
+def daemon_status():
+    """Show whether the daemon is running and what it holds."""
+    console = Console()
+    status = agentctl_daemon.control("status")
+    if status is None:
+        console.print("[dim]Daemon not running.[/dim]")
+        if DAEMON_SOCKET.exists() and not os.environ.get(agentctl_daemon.NO_DAEMON_ENV):
+            console.print(f"[dim]Stale socket at {DAEMON_SOCKET}; it is replaced on start.[/dim]")
+        sys.exit(1)
+
+    started = datetime.fromtimestamp(status["started"]).isoformat(timespec="seconds")
+    console.print(f"[bold]PID:[/bold] {status['pid']}")
+    console.print(f"[bold]Started:[/bold] {started}")
+    console.print(f"[bold]Requests served:[/bold] {status['requests']} ({status['active']} active)")
+    pool = status["pool"]
+    console.print(f"[bold]Connection pools:[/bold] {pool['clients']} clients")
@@ -1,63 +1,84 @@
 """Logs command — stream session logs."""
 
+import heapq
 import json
-import time
 
 import click
 from rich.console import Console
 
-from agentctl.config import SESSIONS_DIR
+from agentctl.sessions import last_lines, messages_path
+from agentctl.tail import FileTailer, watcher
 
 
 @click.command()
-@click.argument("session_name")
+@click.argument("session_names", metavar="SESSION_NAME...", nargs=-1, required=True)
 @click.option("--follow", "-f", is_flag=True, help="Follow logs in real-time")
 @click.option("--last", "-n", type=int, default=20, help="Number of recent messages")
-def logs(session_name: str, follow: bool, last: int):
-    """Stream logs from a session.
+def logs(session_names: tuple[str, ...], follow: bool, last: int):
+    """Stream logs from one or more sessions.
+
+    Messages from several sessions are interleaved by timestamp.
 
     Example:
 
         agentctl logs my-agent --follow
+
+        agentctl logs planner coder reviewer -f
     """
     console = Console()
-    messages_file = SESSIONS_DIR / session_name / "messages.jsonl"
-
-    if not messages_file.exists():
-        console.print(f"[red]Session '{session_name}' not found.[/red]")
-        return
-
-    # Print last N messages
-    lines = messages_file.read_text().strip().split("\n")
-    lines = [l for l in lines if l.strip()]
-    recent = lines[-last:]
-
-    for line in recent:
-        _print_message(console, json.loads(line))
+    label = len(session_names) > 1
+
+    tailers = {}
+    backlogs = []
+    for name in session_names:
+        messages_file = messages_path(name)
+        if not messages_file.exists():
+            console.print(f"[red]Session '{name}' not found.[/red]")
+            return
+        # Read only the last N records from the end; follow from there
+        lines, end = last_lines(name, last)
+        backlogs.append([(name, msg) for msg in _parse(lines)])
+        tailers[name] = FileTailer(messages_file, offset=end)
+
+    # Print last N messages, merged across sessions by timestamp
+    merged = list(heapq.merge(*backlogs, key=lambda m: m[1].get("timestamp", "")))
+    for name, msg in merged[-last:] if last > 0 else []:
+        _print_message(console, msg, name if label else None)
 
     if not follow:
         return
 
-    # Follow mode — tail the file
+    # Follow mode — read only what gets appended, waking on file changes
     console.print("\n[dim]Following... (Ctrl+C to stop)[/dim]\n")
-    seen = len(lines)
+    watch = watcher([t.path.parent for t in tailers.values()])
 
     try:
         while True:
-            current_lines = messages_file.read_text().strip().split("\n")
-            current_lines = [l for l in current_lines if l.strip()]
-
-            if len(current_lines) > seen:
-                for line in current_lines[seen:]:
-                    _print_message(console, json.loads(line))
-                seen = len(current_lines)
-
-            time.sleep(0.5)
+            watch.wait(timeout=1.0)
+            batch = [
+                (name, msg) for name, tailer in tailers.items() for msg in _parse(tailer.read_new())
+            ]
+            batch.sort(key=lambda m: m[1].get("timestamp", ""))
+            for name, msg in batch:
+                _print_message(console, msg, name if label else None)
+            watch.activity(bool(batch))
     except KeyboardInterrupt:
         console.print("\n[dim]Stopped following.[/dim]")
+    finally:
+        watch.close()
+
+
+def _parse(lines: list[bytes]) -> list[dict]:
+    msgs = []
+    for line in lines:
+        try:
+            msgs.append(json.loads(line))
+        except ValueError:
+            continue  # skip a corrupt record rather than stop following
+    return msgs
 
 
-def _print_message(console: Console, msg: dict):
+def _print_message(console: Console, msg: dict, session: str | None = None):
     role = msg.get("role", "?")
     content = msg.get("content", "")
     ts = msg.get("timestamp", "")
@@ -66,4 +87,6 @@ def _print_message(console: Console, msg: dict):
     color = colors.get(role, "white")
 
     prefix = f"[dim]{ts}[/dim] " if ts else ""
+    if session:
+        prefix += f"[magenta]{session}[/magenta] "
     console.print(f"{prefix}[bold {color}]{role}:[/bold {color}] {content}")
@@ -1,22 +1,38 @@
-"""Models command — list available models."""
+"""Models command — list available models, and manage local Ollama models."""
+
+import asyncio
+import sys
+from contextlib import asynccontextmanager
 
 import click
 from rich.console import Console
 from rich.table import Table
 
 from agentctl.config import AgentctlConfig
-from agentctl.providers import get_provider, list_providers
+from agentctl.providers import get_provider
+from agentctl.runtime import run_async
 
-# Import providers to trigger registration
-import agentctl.providers.ollama  # noqa: F401
-import agentctl.providers.anthropic_provider  # noqa: F401
-import agentctl.providers.openai_provider  # noqa: F401
+KEEP_ALIVE_HELP = "How long the model stays loaded: e.g. 30m, 3600 (seconds) or -1 (for ever)"
 
 
-@click.command()
+@click.group(invoke_without_command=True)
 @click.option("--provider", "-p", help="Filter by provider")
-def models(provider: str | None):
-    """List available models across all configured providers."""
+@click.pass_context
+def models(ctx: click.Context, provider: str | None):
+    """List available models across all configured providers.
+
+    Local Ollama models can also be downloaded, and loaded ahead of the first
+    request so it doesn't wait for a cold load:
+
+        agentctl models pull llama3.1:8b qwen2.5:7b
+
+        agentctl models warm llama3.1:8b --keep-alive 1h
+    """
+    if ctx.invoked_subcommand is None:
+        run_async(_list(provider))
+
+
+async def _list(provider: str | None):
     console = Console()
     cfg = AgentctlConfig.load()
 
@@ -27,27 +43,130 @@ def models(provider: str | None):
 
     providers_to_check = [provider] if provider else list(cfg.providers.keys())
 
-    for pname in providers_to_check:
-        try:
-            pcfg = cfg.providers.get(pname)
-            provider_cls = get_provider(pname)
+    async def fetch(pname: str):
+        _, pcfg = cfg.get_provider(pname)
+        async with pcfg.create(get_provider(pname)) as instance:
+            return pcfg.default_model, await instance.list_models()
+
+    # Providers that ask a server for their models are asked all at once
+    results = await asyncio.gather(
+        *(fetch(pname) for pname in providers_to_check), return_exceptions=True
+    )
+    for pname, result in zip(providers_to_check, results):
+        if isinstance(result, Exception):
+            table.add_row(pname, f"[red]Error: {result}[/red]", "")
+            continue
+        default_model, model_list = result
+        for m in model_list:
+            is_default = "✓" if m == default_model else ""
+            table.add_row(pname, m, is_default)
 
-            init_kwargs = {}
-            if pcfg:
-                if pcfg.api_key:
-                    init_kwargs["api_key"] = pcfg.api_key
-                if pcfg.endpoint:
-                    init_kwargs["endpoint"] = pcfg.endpoint
+    console.print(table)
 
-            instance = provider_cls(**init_kwargs)
-            model_list = instance.list_models()
 
-            default_model = pcfg.default_model if pcfg else None
+@asynccontextmanager
+async def _local_models(provider: str):
+    """The provider's own instance, if it manages local models (Ollama does)."""
+    _, pcfg = AgentctlConfig.load().get_provider(provider)
+    async with pcfg.create(get_provider(provider)) as instance:
+        local = instance.unwrapped
+        if not hasattr(local, "pull"):
+            raise click.UsageError(f"Provider '{provider}' has no local models to manage.")
+        yield local
 
-            for m in model_list:
-                is_default = "✓" if m == default_model else ""
-                table.add_row(pname, m, is_default)
-        except Exception as e:
-            table.add_row(pname, f"[red]Error: {e}[/red]", "")
 
-    console.print(table)
+def _report(console: Console, names: list[str], results: list, done: str) -> bool:
+    """Print one line per model; returns whether any failed."""
+    failed = False
+    for name, result in zip(names, results):
+        if isinstance(result, Exception):
+            console.print(f"[red]✗ {name}: {result}[/red]")
+            failed = True
+        else:
+            console.print(f"✓ {name} {done.format(result)}")
+    return failed
+
+
+@models.command("pull")
+@click.argument("names", nargs=-1, required=True)
+@click.option("--provider", "-p", default="ollama", show_default=True, help="Provider to pull from")
+def models_pull(names: tuple[str, ...], provider: str):
+    """Download models, all at once, with progress."""
+    if run_async(_pull(provider, list(names))):
+        sys.exit(1)
+
+
+async def _pull(provider: str, names: list[str]) -> bool:
+    from rich.progress import (
+        BarColumn,
+        DownloadColumn,
+        Progress,
+        TextColumn,
+        TransferSpeedColumn,
+    )
+
+    console = Console()
+    async with _local_models(provider) as local:
+        with Progress(
+            TextColumn("[cyan]{task.description}"),
+            BarColumn(),
+            DownloadColumn(),
+            TransferSpeedColumn(),
+            TextColumn("[dim]{task.fields[status]}"),
+            console=console,
+        ) as progress:
+
+            async def pull(name: str) -> None:
+                task = progress.add_task(name, total=None, status="")
+                # Bytes (completed, total) per layer; the bar shows their sums
+                layers: dict[str, tuple[int, int]] = {}
+                async for update in local.pull(name):
+                    if update.get("total"):
+                        layers[update["digest"]] = (update.get("completed", 0), update["total"])
+                    progress.update(
+                        task,
+                        completed=sum(completed for completed, _ in layers.values()),
+                        total=sum(total for _, total in layers.values()) or None,
+                        status=update.get("status", ""),
+                    )
+
+            results = await asyncio.gather(*(pull(name) for name in names), return_exceptions=True)
+    return _report(console, names, results, "pulled")
+
+
+@models.command("warm")
+@click.argument("names", nargs=-1, required=True)
+@click.option("--provider", "-p", default="ollama", show_default=True, help="Provider to load on")
+@click.option("--keep-alive", help=KEEP_ALIVE_HELP)
+def models_warm(names: tuple[str, ...], provider: str, keep_alive: str | None):
+    """Load models into memory ahead of their first request."""
+    if run_async(_warm(provider, list(names), keep_alive)):
+        sys.exit(1)
+
+
+async def _warm(provider: str, names: list[str], keep_alive: str | None) -> bool:
+    console = Console()
+    async with _local_models(provider) as local:
+        with console.status(f"[cyan]Loading {', '.join(names)}...[/cyan]"):
+            results = await asyncio.gather(
+                *(local.warm(name, keep_alive) for name in names), return_exceptions=True
+            )
+    return _report(console, names, results, "loaded in {:.1f}s")
+
+
+@models.command("unload")
+@click.argument("names", nargs=-1, required=True)
+@click.option("--provider", "-p", default="ollama", show_default=True, help="Provider to unload on")
+def models_unload(names: tuple[str, ...], provider: str):
+    """Free the memory of loaded models now."""
+    if run_async(_unload(provider, list(names))):
+        sys.exit(1)
+
+
+async def _unload(provider: str, names: list[str]) -> bool:
+    console = Console()
+    async with _local_models(provider) as local:
+        results = await asyncio.gather(
+            *(local.unload(name) for name in names), return_exceptions=True
+        )
+    return _report(console, names, results, "unloaded")
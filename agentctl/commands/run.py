@@ -1,19 +1,20 @@
 """Run command — one-shot agent completion."""
 
-import asyncio
+import sys
+import time
 
 import click
 from rich.console import Console
-from rich.live import Live
 from rich.markdown import Markdown
 from rich.panel import Panel
 
+from agentctl import tracing
+from agentctl.cache import CachedProvider
+from agentctl.ledger import record_response
 from agentctl.config import AgentctlConfig
 from agentctl.providers import Message, get_provider
-
-import agentctl.providers.ollama  # noqa: F401
-import agentctl.providers.anthropic_provider  # noqa: F401
-import agentctl.providers.openai_provider  # noqa: F401
+from agentctl.render import MarkdownStream, RawStream
+from agentctl.runtime import run_async
 
 
 @click.command()
@@ -24,6 +25,15 @@ import agentctl.providers.openai_provider  # noqa: F401
 @click.option("--max-tokens", type=int, help="Max output tokens")
 @click.option("--system", "-s", help="System prompt")
 @click.option("--stream/--no-stream", default=True, help="Stream output")
+@click.option(
+    "--cache/--no-cache", default=None,
+    help="Serve repeats from the response cache (default: temperature 0 only)",
+)
+@click.option("--raw", is_flag=True, help="Write the reply as plain text, no Markdown rendering")
+@click.option(
+    "--keep-alive",
+    help="Ollama: how long the model stays loaded afterwards, e.g. 30m or -1 (for ever)",
+)
 def run(
     model: str | None,
     prompt: str,
@@ -32,6 +42,9 @@ def run(
     max_tokens: int | None,
     system: str | None,
     stream: bool,
+    cache: bool | None,
+    raw: bool,
+    keep_alive: str | None,
 ):
     """Run a one-shot completion.
 
@@ -42,8 +55,14 @@ def run(
         agentctl run gpt-4o "Explain transformers"
 
         agentctl run --provider ollama llama3.1:8b "Hello"
+
+        agentctl run --raw "Write a haiku" > haiku.txt
     """
-    asyncio.run(_run(model, prompt, provider, temperature, max_tokens, system, stream))
+    run_async(
+        _run(
+            model, prompt, provider, temperature, max_tokens, system, stream, cache, raw, keep_alive
+        )
+    )
 
 
 async def _run(
@@ -54,8 +73,12 @@ async def _run(
     max_tokens: int | None,
     system: str | None,
     stream: bool,
+    cache: bool | None = None,
+    raw: bool = False,
+    keep_alive: str | None = None,
 ):
-    console = Console()
+    # With --raw, stdout carries only the reply; status goes to stderr
+    console = Console(stderr=raw)
     cfg = AgentctlConfig.load()
 
     pname, pcfg = cfg.get_provider(provider_name)
@@ -63,13 +86,9 @@ async def _run(
 
     provider_cls = get_provider(pname)
 
-    init_kwargs = {}
-    if pcfg.api_key:
-        init_kwargs["api_key"] = pcfg.api_key
-    if pcfg.endpoint:
-        init_kwargs["endpoint"] = pcfg.endpoint
-
-    instance = provider_cls(**init_kwargs)
+    instance = CachedProvider(
+        pcfg.create(provider_cls), cfg.cache.open(), cfg.cache.enabled if cache is None else cache
+    )
 
     messages = []
     if system:
@@ -83,38 +102,50 @@ async def _run(
         kwargs["temperature"] = temperature
     if max_tokens is not None:
         kwargs["max_tokens"] = max_tokens
-
-    if stream:
-        import time as _time
-
-        collected = ""
-        start = _time.monotonic()
-        with Live(console=console, refresh_per_second=10) as live:
-            async for chunk in instance.stream(messages, **kwargs):
-                collected += chunk
-                live.update(Markdown(collected))
-        latency = (_time.monotonic() - start) * 1000
-        console.print()
-        console.print(
-            Panel(
-                f"[dim]Model: {model} | "
-                f"Cost: $0.0000 | "
-                f"Latency: {latency:.0f}ms[/dim]",
-                style="dim",
-            )
-        )
-    else:
-        with console.status("[bold cyan]Thinking...[/bold cyan]"):
-            response = await instance.complete(messages, **kwargs)
-
-        console.print(Markdown(response.content))
-        console.print()
-        console.print(
-            Panel(
-                f"[dim]Model: {response.model} | "
-                f"Tokens: {response.input_tokens}→{response.output_tokens} | "
-                f"Cost: ${response.cost:.4f} | "
-                f"Latency: {response.latency_ms:.0f}ms[/dim]",
-                style="dim",
-            )
+    if keep_alive is not None:
+        kwargs["keep_alive"] = keep_alive
+
+    async with instance:
+        if stream:
+            reply = instance.stream_response(messages, **kwargs)
+            # Rendering interleaves with the stream; the span's feed_ms is
+            # the part of it spent rendering
+            with tracing.span("render", stream=True) as span:
+                feeding = 0.0
+                with RawStream() if raw else MarkdownStream(console) as renderer:
+                    async for chunk in reply:
+                        fed = time.perf_counter()
+                        renderer.feed(chunk)
+                        feeding += time.perf_counter() - fed
+                if span:
+                    span.set(feed_ms=round(feeding * 1000, 1))
+            response = reply.response
+        else:
+            with console.status("[bold cyan]Thinking...[/bold cyan]"):
+                response = await instance.complete(messages, **kwargs)
+
+            with tracing.span("render"):
+                if raw:
+                    sys.stdout.write(response.content + "\n")
+                else:
+                    console.print(Markdown(response.content))
+
+    if cfg.costs.track:
+        record_response(response)
+
+    stats = [
+        f"Model: {response.model}",
+        f"Tokens: {response.input_tokens}→{response.output_tokens}",
+        f"Cost: ${response.cost:.4f}",
+    ]
+    if response.cache_read_tokens or response.cache_write_tokens:
+        stats.append(
+            f"Prompt cache: {response.cache_read_tokens} read, "
+            f"{response.cache_write_tokens} written"
         )
+    if response.metadata.get("ttft_ms") is not None:
+        stats.append(f"TTFT: {response.metadata['ttft_ms']:.0f}ms")
+    stats.append(f"Latency: {response.latency_ms:.0f}ms")
+    cached = " (cached)" if response.metadata.get("cache_hit") else ""
+    console.print()
+    console.print(Panel(f"[dim]{' | '.join(stats)}{cached}[/dim]", style="dim"))
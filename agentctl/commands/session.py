@@ -1,14 +1,39 @@
 """Session management commands."""
 
-import json
+from __future__ import annotations
+
+import sys
+from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
+from typing import TYPE_CHECKING
 
 import click
 from rich.console import Console
 from rich.table import Table
 
-from agentctl.config import SESSIONS_DIR
+from agentctl.paths import SESSIONS_DIR
+from agentctl.sessions import (
+    append_messages,
+    create_session,
+    delete_session,
+    flatten_session,
+    fork_session,
+    iter_messages,
+    last_messages,
+    list_sessions,
+    load_meta,
+    load_summary,
+    restore_session,
+    save_summary,
+    snapshot_session,
+    touch_meta,
+)
+
+if TYPE_CHECKING:
+    from agentctl.cache import CachedProvider
+    from agentctl.config import AgentctlConfig
+    from agentctl.context import ContextManager
 
 
 @click.group()
@@ -17,66 +42,139 @@ def session():
     pass
 
 
+SORT_KEYS = {
+    "name": lambda e: e.name,
+    "created": lambda e: e.created or "",
+    "last_active": lambda e: e.last_active or "",
+    "messages": lambda e: e.inherited + e.messages,
+    "size": lambda e: e.size,
+}
+
+
 @session.command("list")
-def session_list():
-    """List all saved sessions."""
-    console = Console()
-    SESSIONS_DIR.mkdir(parents=True, exist_ok=True)
+@click.option("--model", "-m", help="Only sessions whose model contains this text")
+@click.option(
+    "--active-since",
+    type=click.DateTime(["%Y-%m-%d", "%Y-%m-%dT%H:%M:%S"]),
+    help="Only sessions active at or after this date (YYYY-MM-DD)",
+)
+@click.option(
+    "--sort",
+    type=click.Choice(list(SORT_KEYS)),
+    default="name",
+    show_default=True,
+    help="Sort order; all but name list the largest or newest first",
+)
+@click.option("--reverse", is_flag=True, help="Reverse the sort order")
+@click.option("--limit", "-n", type=click.IntRange(min=1), help="Show at most N sessions")
+@click.option("--offset", type=click.IntRange(min=0), default=0, help="Skip the first N sessions")
+def session_list(
+    model: str | None,
+    active_since: datetime | None,
+    sort: str,
+    reverse: bool,
+    limit: int | None,
+    offset: int,
+):
+    """List saved sessions.
 
-    sessions = sorted(SESSIONS_DIR.iterdir()) if SESSIONS_DIR.exists() else []
+    Reads only the session index, so listing stays fast with thousands of
+    sessions.
+
+    Examples:
+
+        agentctl session list --sort last_active --limit 20
+
+        agentctl session list --model claude --active-since 2024-06-01
+    """
+    console = Console()
+    sessions = list_sessions()
 
     if not sessions:
         console.print("[dim]No sessions found. Start one with: agentctl session new[/dim]")
         return
 
+    if model:
+        sessions = [s for s in sessions if s.model and model in s.model]
+    if active_since:
+        since = active_since.isoformat()
+        sessions = [s for s in sessions if (s.last_active or "") >= since]
+    sessions.sort(key=SORT_KEYS[sort], reverse=(sort != "name") != reverse)
+    total = len(sessions)
+    page = sessions[offset : offset + limit if limit else None]
+
     table = Table(title="Sessions")
     table.add_column("Name", style="cyan")
     table.add_column("Model", style="green")
-    table.add_column("Messages")
+    table.add_column("Messages", justify="right")
+    table.add_column("Size", justify="right")
     table.add_column("Created", style="dim")
     table.add_column("Last Active", style="dim")
 
-    for session_dir in sessions:
-        if not session_dir.is_dir():
-            continue
-        meta_file = session_dir / "session.json"
-        if not meta_file.exists():
-            continue
-
-        meta = json.loads(meta_file.read_text())
-        messages_file = session_dir / "messages.jsonl"
-        msg_count = sum(1 for _ in open(messages_file)) if messages_file.exists() else 0
-
+    for entry in page:
         table.add_row(
-            meta.get("name", session_dir.name),
-            meta.get("model", "?"),
-            str(msg_count),
-            meta.get("created", "?"),
-            meta.get("last_active", "?"),
+            entry.name,
+            entry.model or "?",
+            str(entry.inherited + entry.messages),
+            _format_size(entry.size),
+            entry.created or "?",
+            entry.last_active or "?",
         )
 
     console.print(table)
+    if len(page) < total:
+        first = offset + 1 if page else offset
+        console.print(f"[dim]Showing {first}–{offset + len(page)} of {total} sessions[/dim]")
+
+
+def _format_size(size: int) -> str:
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
 
 
 @session.command("new")
 @click.option("--name", "-n", required=True, help="Session name")
 @click.option("--model", "-m", help="Model to use")
+@click.option("--provider", "-p", help="Provider to use (default: from config)")
 @click.option("--system", "-s", help="System prompt")
-def session_new(name: str, model: str | None, system: str | None):
-    """Create a new conversation session."""
-    session_dir = SESSIONS_DIR / name
-    session_dir.mkdir(parents=True, exist_ok=True)
-
-    meta = {
-        "name": name,
-        "model": model,
-        "system": system,
-        "created": datetime.now().isoformat(),
-        "last_active": datetime.now().isoformat(),
-    }
+@click.option(
+    "--context",
+    "strategy",
+    type=click.Choice(["full", "sliding", "last_k", "summarize"]),
+    help="How history is fitted into the context window (default: sliding)",
+)
+@click.option("--budget", type=click.IntRange(min=1), help="Input tokens to send per turn")
+@click.option(
+    "--keep-alive",
+    help="Ollama: how long the model stays loaded between turns, e.g. 1h or -1 (for ever)",
+)
+def session_new(
+    name: str,
+    model: str | None,
+    provider: str | None,
+    system: str | None,
+    strategy: str | None,
+    budget: int | None,
+    keep_alive: str | None,
+):
+    """Create a new conversation session.
 
-    (session_dir / "session.json").write_text(json.dumps(meta, indent=2))
-    (session_dir / "messages.jsonl").touch()
+    The history sent each turn is kept within the model's context window, or
+    --budget tokens; see "context" in the session's session.json.
+    """
+    context = {k: v for k, v in (("strategy", strategy), ("budget", budget)) if v is not None}
+    meta = {"context": context} if context else {}
+    if keep_alive is not None:
+        meta["keep_alive"] = keep_alive
+    if (SESSIONS_DIR / name).exists():
+        _fail(f"Session '{name}' already exists.")
+    try:
+        create_session(name, provider=provider, model=model, system=system, **meta)
+    except ValueError as e:
+        _fail(str(e))
 
     click.echo(f"✓ Session '{name}' created.")
     if model:
@@ -87,18 +185,108 @@ def session_new(name: str, model: str | None, system: str | None):
 @click.argument("name")
 @click.confirmation_option(prompt="Are you sure?")
 def session_delete(name: str):
-    """Delete a session."""
-    import shutil
-
-    session_dir = SESSIONS_DIR / name
-    if not session_dir.exists():
+    """Delete a session (forks of it are flattened first)."""
+    flattened = delete_session(name)
+    if flattened is None:
         click.echo(f"Session '{name}' not found.")
         return
 
-    shutil.rmtree(session_dir)
+    for fork in flattened:
+        click.echo(f"  Flattened fork '{fork}'.")
     click.echo(f"✓ Session '{name}' deleted.")
 
 
+def _fail(message: str):
+    Console(stderr=True).print(f"[red]{message}[/red]")
+    sys.exit(1)
+
+
+def _free_name(base: str) -> str:
+    name, n = base, 1
+    while (SESSIONS_DIR / name).exists():
+        n += 1
+        name = f"{base}-{n}"
+    return name
+
+
+@session.command("fork")
+@click.argument("name")
+@click.option(
+    "--from-message", "upto", type=click.IntRange(min=0),
+    help="Keep messages 1..N of the history (default: all)",
+)
+@click.option("--name", "-n", "new_name", help="Name of the fork (default: NAME-fork)")
+def session_fork(name: str, upto: int | None, new_name: str | None):
+    """Branch a session, sharing its history up to a message.
+
+    The fork references the parent's history instead of copying it; only
+    messages sent to the fork are stored with it.
+
+    Example:
+
+        agentctl session fork research-agent --from-message 5
+    """
+    new_name = new_name or _free_name(f"{name}-fork")
+    if (SESSIONS_DIR / new_name).exists():
+        _fail(f"Session '{new_name}' already exists.")
+    try:
+        fork_session(name, new_name, upto)
+    except ValueError as e:
+        _fail(str(e))
+    click.echo(f"✓ Forked '{name}' as '{new_name}'.")
+
+
+@session.command("save")
+@click.argument("name")
+@click.option("--as", "snapshot", help="Snapshot name (default: NAME-YYYY-MM-DD)")
+def session_save(name: str, snapshot: str | None):
+    """Save a snapshot of a session to restore later."""
+    snapshot = snapshot or _free_name(f"{name}-{datetime.now():%Y-%m-%d}")
+    if (SESSIONS_DIR / snapshot).exists():
+        _fail(f"Session '{snapshot}' already exists.")
+    try:
+        snapshot_session(name, snapshot)
+    except ValueError as e:
+        _fail(str(e))
+    click.echo(f"✓ Saved '{name}' as '{snapshot}'.")
+
+
+@session.command("restore")
+@click.argument("snapshot")
+@click.option("--as", "target", help="Session to restore into (default: the saved session)")
+def session_restore(snapshot: str, target: str | None):
+    """Restore a session from a snapshot made with `session save`.
+
+    Messages sent since the snapshot are dropped from the session; forks
+    that still need them are flattened first.
+    """
+    meta = load_meta(snapshot)
+    if meta is None:
+        _fail(f"Session '{snapshot}' not found.")
+    target = target or meta.get("snapshot_of")
+    if not target:
+        _fail(f"'{snapshot}' is not a snapshot; pass --as NAME.")
+    try:
+        flattened = restore_session(snapshot, target)
+    except ValueError as e:
+        _fail(str(e))
+    for fork in flattened:
+        click.echo(f"  Flattened fork '{fork}'.")
+    click.echo(f"✓ Restored '{target}' from '{snapshot}'.")
+
+
+@session.command("flatten")
+@click.argument("name")
+def session_flatten(name: str):
+    """Copy a fork's inherited history into it, detaching it from its parent."""
+    if load_meta(name) is None:
+        _fail(f"Session '{name}' not found.")
+    if flatten_session(name):
+        click.echo(f"✓ Flattened '{name}'.")
+    else:
+        click.echo(f"Session '{name}' is not a fork.")
+
+
 @session.command("show")
 @click.argument("name")
 @click.option("--last", "-n", type=int, default=10, help="Show last N messages")
@@ -112,12 +300,7 @@ def session_show(name: str, last: int):
         console.print(f"[red]Session '{name}' not found.[/red]")
         return
 
-    lines = messages_file.read_text().strip().split("\n")
-    lines = [l for l in lines if l.strip()]
-    lines = lines[-last:]
-
-    for line in lines:
-        msg = json.loads(line)
+    for msg in last_messages(name, last):
         role = msg.get("role", "?")
         content = msg.get("content", "")
 
@@ -127,3 +310,178 @@ def session_show(name: str, last: int):
             console.print(f"\n[bold green]Agent:[/bold green] {content}")
         elif role == "system":
             console.print(f"\n[bold yellow]System:[/bold yellow] {content}")
+
+
+@session.command("send")
+@click.argument("name")
+@click.argument("message")
+@click.option("--raw", is_flag=True, help="Write the reply as plain text, no Markdown rendering")
+def session_send(name: str, message: str, raw: bool):
+    """Send one message to a session and stream the reply.
+
+    Example:
+
+        agentctl session send research-agent "Summarise what we found so far"
+    """
+    from agentctl.runtime import run_async
+
+    run_async(_chat(name, message, raw))
+
+
+@session.command("chat")
+@click.argument("name")
+def session_chat(name: str):
+    """Chat with a session interactively (exit with /exit or Ctrl+D)."""
+    from agentctl.runtime import run_async
+
+    try:
+        run_async(_chat(name))
+    except KeyboardInterrupt:
+        click.echo()
+
+
+@dataclass
+class _Chat:
+    """What every exchange of one chat needs: the session and its provider."""
+
+    name: str
+    meta: dict
+    cfg: AgentctlConfig
+    instance: CachedProvider
+    context: ContextManager
+    history: list[dict]
+    kwargs: dict
+
+
+async def _chat(name: str, message: str | None = None, raw: bool = False):
+    """Send `message`, or read messages from the terminal until EOF if None."""
+    import httpx
+
+    from agentctl.cache import CachedProvider
+    from agentctl.config import AgentctlConfig
+    from agentctl.context import ContextManager, ContextPolicy
+    from agentctl.providers import get_provider
+
+    console = Console(stderr=raw)
+    meta = load_meta(name)
+    if meta is None:
+        console.print(f"[red]Session '{name}' not found.[/red]")
+        return
+
+    cfg = AgentctlConfig.load()
+    pname, pcfg = cfg.get_provider(meta.get("provider"))
+    instance = CachedProvider(pcfg.create(get_provider(pname)), cfg.cache.open(), cfg.cache.enabled)
+    kwargs = {}
+    if meta.get("model") or pcfg.default_model:
+        kwargs["model"] = meta.get("model") or pcfg.default_model
+    if meta.get("keep_alive") is not None:
+        kwargs["keep_alive"] = meta["keep_alive"]
+
+    context = ContextManager(
+        instance,
+        ContextPolicy.from_meta(meta),
+        model=kwargs.get("model"),
+        max_tokens=cfg.defaults.max_tokens,
+        summary=load_summary(name),
+    )
+    chat = _Chat(
+        name=name,
+        meta=meta,
+        cfg=cfg,
+        instance=instance,
+        context=context,
+        history=[m for m in iter_messages(name) if m.get("role") in ("user", "assistant")],
+        kwargs=kwargs,
+    )
+
+    async with instance:
+        while True:
+            text = message
+            if text is None:
+                try:
+                    text = console.input("[bold cyan]You:[/bold cyan] ")
+                except EOFError:
+                    console.print()
+                    return
+                if text.strip() in ("/exit", "/quit"):
+                    return
+                if not text.strip():
+                    continue
+
+            try:
+                await _exchange(chat, text, console=console, raw=raw)
+            except httpx.HTTPError as e:
+                # Nothing was recorded; the message can simply be sent again
+                if message is not None:
+                    raise click.ClickException(str(e))
+                console.print(f"[red]Error: {e}[/red]")
+                continue
+            if message is not None:
+                return
+
+
+async def _exchange(chat: _Chat, text: str, *, console: Console, raw: bool) -> None:
+    """Stream the reply to the user's message, then append both with the usage.
+
+    `chat.history` holds the session's user/assistant records; the context
+    manager picks which of them are sent. Nothing is written if the request
+    fails, so a failed message never leaves the session with an unanswered turn.
+    """
+    from agentctl.context import estimate_tokens
+    from agentctl.ledger import record_response
+    from agentctl.render import MarkdownStream, RawStream
+
+    name, cfg, history = chat.name, chat.cfg, chat.history
+    fsync = cfg.sessions.fsync == "always"
+    prompt = {
+        "role": "user",
+        "content": text,
+        "timestamp": datetime.now().isoformat(),
+        "tokens": estimate_tokens(text),
+    }
+
+    plan = await chat.context.prepare(chat.meta.get("system"), history + [prompt])
+    if plan.summaries:
+        save_summary(name, chat.context.summary)
+        if cfg.costs.track:
+            for summary in plan.summaries:
+                record_response(summary, session=name, purpose="summary")
+
+    reply = chat.instance.stream_response(plan.messages, **chat.kwargs)
+    if not raw:
+        console.print("[bold green]Agent:[/bold green]")
+    with RawStream() if raw else MarkdownStream(console) as renderer:
+        async for chunk in reply:
+            renderer.feed(chunk)
+    response = reply.response
+
+    record = {
+        "role": "assistant",
+        "content": response.content,
+        "timestamp": datetime.now().isoformat(),
+        "tokens": response.output_tokens or estimate_tokens(response.content),
+        "provider": response.provider,
+        "model": response.model,
+        "input_tokens": response.input_tokens,
+        "output_tokens": response.output_tokens,
+        "cost": response.cost,
+        "latency_ms": round(response.latency_ms, 1),
+    }
+    append_messages(name, [prompt, record], fsync)
+    history += [prompt, record]
+    touch_meta(name)
+
+    if cfg.costs.track:
+        record_response(response, session=name)
+    stats = [
+        f"{response.input_tokens}→{response.output_tokens} tokens",
+        f"${response.cost:.4f}",
+        f"{response.latency_ms:.0f}ms",
+    ]
+    if plan.dropped:
+        sent = len(history) - 1 - plan.dropped
+        note = f"{sent}/{len(history) - 1} messages in context"
+        if plan.summarized:
+            note += f", {plan.summarized} summarized"
+        stats.append(note)
+    console.print(f"[dim]{' | '.join(stats)}[/dim]")
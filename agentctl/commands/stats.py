@@ -0,0 +1,127 @@
+"""Latency and throughput statistics."""
+
+import json
+import re
+import time
+from datetime import datetime
+
+import click
+from rich.console import Console
+from rich.table import Table
+
+from agentctl.metrics import QuantileSketch, SeriesStats, query
+
+QUANTILES = (0.5, 0.9, 0.99)
+
+_DURATION = re.compile(r"^(\d+(?:\.\d+)?)([mhdw])$")
+_DURATION_UNITS = {"m": 60, "h": 3600, "d": 86400, "w": 7 * 86400}
+
+
+def _window_start(since: str) -> float:
+    """Epoch seconds of a --since value: a duration back from now, or a day."""
+    match = _DURATION.match(since)
+    if match:
+        return time.time() - float(match[1]) * _DURATION_UNITS[match[2]]
+    try:
+        return datetime.strptime(since, "%Y-%m-%d").timestamp()
+    except ValueError:
+        raise click.BadParameter(
+            f"expected a duration like 1h, 7d or a day YYYY-MM-DD, got '{since}'",
+            param_hint="--since",
+        )
+
+
+def _quantiles(sketch: QuantileSketch) -> list[float | None]:
+    return [sketch.quantile(q) for q in QUANTILES]
+
+
+def _cell(values: list[float | None], fmt: str = "{:.0f}") -> str:
+    if values[0] is None:
+        return "—"
+    return " / ".join(fmt.format(v) for v in values)
+
+
+@click.command()
+@click.option(
+    "--since",
+    default="24h",
+    show_default=True,
+    help="Window start: a duration back from now (30m, 24h, 7d) or a day (YYYY-MM-DD)",
+)
+@click.option("--provider", "-p", help="Only this provider")
+@click.option("--model", "-m", help="Only this model")
+@click.option(
+    "--format",
+    "fmt",
+    type=click.Choice(["table", "json"]),
+    default="table",
+    show_default=True,
+    help="Output format",
+)
+def stats(since: str, provider: str | None, model: str | None, fmt: str):
+    """Show request latency, time to first token and throughput percentiles.
+
+    Example:
+
+        agentctl stats --since 7d -p openai
+    """
+    series = {
+        key: s
+        for key, s in query(_window_start(since)).items()
+        if (not provider or key[0] == provider) and (not model or key[1] == model)
+    }
+
+    if fmt == "json":
+        click.echo(
+            json.dumps(
+                [_as_json(key, s) for key, s in sorted(series.items())],
+                indent=2,
+            )
+        )
+        return
+
+    console = Console()
+    if not series:
+        console.print(f"[dim]No requests recorded since {since}.[/dim]")
+        return
+
+    table = Table(title=f"Request stats (since {since}; p50 / p90 / p99)")
+    table.add_column("Provider", style="cyan")
+    table.add_column("Model", style="cyan")
+    table.add_column("Requests", justify="right")
+    table.add_column("Errors", justify="right")
+    table.add_column("Retries", justify="right")
+    table.add_column("Latency ms", justify="right")
+    table.add_column("TTFT ms", justify="right")
+    table.add_column("Tokens/s", justify="right")
+    for (pname, mname), s in sorted(series.items()):
+        errors = f"[red]{s.errors}[/red]" if s.errors else "0"
+        table.add_row(
+            pname,
+            mname,
+            str(s.requests),
+            errors,
+            str(s.retries),
+            _cell(_quantiles(s.latency_ms)),
+            _cell(_quantiles(s.ttft_ms)),
+            _cell(_quantiles(s.tokens_per_s), "{:.1f}"),
+        )
+    console.print(table)
+
+
+def _as_json(key: tuple[str, str], s: SeriesStats) -> dict:
+    def percentiles(sketch: QuantileSketch) -> dict:
+        return {f"p{round(q * 100)}": v for q, v in zip(QUANTILES, _quantiles(sketch))}
+
+    return {
+        "provider": key[0],
+        "model": key[1],
+        "requests": s.requests,
+        "errors": s.errors,
+        "retries": s.retries,
+        "request_bytes": s.request_bytes,
+        "response_bytes": s.response_bytes,
+        "latency_ms": percentiles(s.latency_ms),
+        "ttft_ms": percentiles(s.ttft_ms),
+        "tokens_per_s": percentiles(s.tokens_per_s),
+    }
@@ -1,17 +1,55 @@
 """Configuration management for agentctl."""
 
-from pathlib import Path
-from typing import Any
+import os
+import pickle
+from typing import Any, Literal
 
-import yaml
 from pydantic import BaseModel, Field
 
+from agentctl import __version__, tracing
+from agentctl.paths import (  # noqa: F401 — re-exported for existing importers
+    AGENTCTL_DIR,
+    CONFIG_FILE,
+    CONFIG_SNAPSHOT,
+    COSTS_DIR,
+    PLUGINS_DIR,
+    SESSIONS_DIR,
+)
 
-AGENTCTL_DIR = Path.home() / ".agentctl"
-CONFIG_FILE = AGENTCTL_DIR / "config.yaml"
-SESSIONS_DIR = AGENTCTL_DIR / "sessions"
-COSTS_DIR = AGENTCTL_DIR / "costs"
-PLUGINS_DIR = AGENTCTL_DIR / "plugins"
+
+class PoolConfig(BaseModel):
+    """HTTP connection pool settings for a provider."""
+
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 30.0
+    http2: bool = False
+
+
+class RateLimitConfig(BaseModel):
+    """Rate limits and retry behaviour for a provider.
+
+    Entries under `models` override the provider-wide values for one model.
+    """
+
+    requests_per_minute: float | None = None
+    tokens_per_minute: float | None = None
+    max_concurrency: int = 16
+    max_retries: int = 5
+    backoff_base: float = 0.5
+    backoff_max: float = 60.0
+    models: dict[str, "RateLimitConfig"] = Field(default_factory=dict)
+
+    def policies(self):
+        """Return the provider-wide RateLimitPolicy and the per-model overrides."""
+        from agentctl.providers.scheduler import RateLimitPolicy
+
+        base = self.model_dump(exclude={"models"})
+        per_model = {}
+        for model, override in self.models.items():
+            overridden = override.model_dump(include=override.model_fields_set - {"models"})
+            per_model[model] = RateLimitPolicy(**{**base, **overridden})
+        return RateLimitPolicy(**base), per_model
 
 
 class ProviderConfig(BaseModel):
@@ -20,8 +58,48 @@ class ProviderConfig(BaseModel):
     api_key: str | None = None
     endpoint: str | None = None
     default_model: str | None = None
+    # Mark stable prompt prefixes for the provider's prompt cache
+    prompt_caching: bool = True
+    pool: PoolConfig = Field(default_factory=PoolConfig)
+    rate_limits: RateLimitConfig = Field(default_factory=RateLimitConfig)
     extra: dict[str, Any] = Field(default_factory=dict)
 
+    def provider_kwargs(self) -> dict[str, Any]:
+        """Keyword arguments for constructing a provider from this config."""
+        from agentctl.providers.pool import PoolLimits
+
+        kwargs: dict[str, Any] = {"limits": PoolLimits(**self.pool.model_dump())}
+        if self.api_key:
+            kwargs["api_key"] = self.api_key
+        if self.endpoint:
+            kwargs["endpoint"] = self.endpoint
+        if not self.prompt_caching:
+            kwargs["prompt_caching"] = False
+        # Provider-specific settings, e.g. the mock provider's pacing
+        kwargs.update(self.extra)
+        return kwargs
+
+    def create(self, provider_cls):
+        """Instantiate `provider_cls` from this config, behind the rate-limit scheduler.
+
+        Instances are shared within the process: asking again for the same
+        provider with the same settings returns the one already built. Every
+        caller must aclose() what it got; the last aclose() releases it.
+        """
+        from agentctl.providers.scheduler import ScheduledProvider
+
+        key = (provider_cls, self.model_dump_json())
+        instance = _instances.get(key)
+        if instance is not None and instance.users > 0:
+            instance.users += 1
+            return instance
+
+        policy, model_policies = self.rate_limits.policies()
+        with tracing.span("provider.init", provider=provider_cls.name):
+            inner = provider_cls(**self.provider_kwargs())
+        instance = _instances[key] = ScheduledProvider(inner, policy, model_policies)
+        return instance
+
 
 class DefaultsConfig(BaseModel):
     """Default settings."""
@@ -38,27 +116,129 @@ class CostsConfig(BaseModel):
     alert_threshold: float = 50.0
 
 
+class SessionsConfig(BaseModel):
+    """Session storage settings."""
+
+    # "always" fsyncs every append to messages.jsonl; "never" leaves it to the OS
+    fsync: Literal["always", "never"] = "always"
+
+
+class CacheConfig(BaseModel):
+    """Response cache settings."""
+
+    # None caches deterministic (temperature 0) requests only
+    enabled: bool | None = None
+    max_size_mb: float = 500.0
+    max_age_days: float = 30.0
+
+    def open(self):
+        """The on-disk ResponseCache with these limits."""
+        from agentctl.cache import ResponseCache
+
+        return ResponseCache(
+            max_bytes=int(self.max_size_mb * 1024 * 1024), max_age=self.max_age_days * 86400
+        )
+
+
+# ((mtime_ns, size), config) of the last config file read by AgentctlConfig.load()
+_loaded: tuple[tuple[int, int], "AgentctlConfig"] | None = None
+
+# Providers built by ProviderConfig.create(), by class and settings
+_instances: dict[tuple, Any] = {}
+
+
+def _read_snapshot(key: tuple) -> "AgentctlConfig | None":
+    """The validated config pickled for this version of the config file, if any."""
+    try:
+        with open(CONFIG_SNAPSHOT, "rb") as f:
+            snapshot_key, config = pickle.load(f)
+    except Exception:
+        # Missing, or written by an agentctl whose models no longer unpickle
+        return None
+    return config if snapshot_key == key else None
+
+
+def _write_snapshot(key: tuple, config: "AgentctlConfig") -> None:
+    tmp = CONFIG_SNAPSHOT.with_suffix(f".{os.getpid()}.tmp")
+    try:
+        # Holds the API keys too, so readable by the owner only
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump((key, config), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, CONFIG_SNAPSHOT)
+    except OSError:
+        # Only a speed-up; a read-only ~/.agentctl just means parsing each time
+        tmp.unlink(missing_ok=True)
+
+
 class AgentctlConfig(BaseModel):
     """Root configuration."""
 
     providers: dict[str, ProviderConfig] = Field(default_factory=dict)
     defaults: DefaultsConfig = Field(default_factory=DefaultsConfig)
     costs: CostsConfig = Field(default_factory=CostsConfig)
+    cache: CacheConfig = Field(default_factory=CacheConfig)
+    sessions: SessionsConfig = Field(default_factory=SessionsConfig)
 
     @classmethod
     def load(cls) -> "AgentctlConfig":
-        """Load config from disk, or return defaults."""
-        if CONFIG_FILE.exists():
-            with open(CONFIG_FILE) as f:
-                data = yaml.safe_load(f) or {}
-            return cls.model_validate(data)
-        return cls()
+        """Load config from disk, or return defaults.
+
+        The parsed config is kept for as long as the file is unchanged, so a
+        long-lived process (agentctl daemon) re-reads it only after edits.
+        Across processes, the validated config is pickled to
+        ~/.agentctl/config.pickle, keyed by the file's mtime and size, so
+        most commands skip YAML parsing and validation altogether.
+        """
+        global _loaded
+        with tracing.span("config.load") as span:
+            try:
+                st = CONFIG_FILE.stat()
+                key = (st.st_mtime_ns, st.st_size)
+            except FileNotFoundError:
+                return cls()
+            if span:
+                span.set(cached=_loaded is not None and _loaded[0] == key)
+            if _loaded is None or _loaded[0] != key:
+                snapshot_key = (__version__, *key)
+                config = _read_snapshot(snapshot_key)
+                if span:
+                    span.set(snapshot=config is not None)
+                if config is None:
+                    import yaml
+
+                    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+                    with open(CONFIG_FILE) as f:
+                        data = yaml.load(f, Loader=loader) or {}
+                    config = cls.model_validate(data)
+                    _write_snapshot(snapshot_key, config)
+                _loaded = (key, config)
+            # Callers may modify their copy before save()
+            return _loaded[1].model_copy(deep=True)
 
     def save(self) -> None:
-        """Persist config to disk."""
+        """Persist config to disk.
+
+        Written to a temporary file and renamed over the old one, so another
+        agentctl process reads either the old config or the new one, never
+        half of it.
+        """
+        import yaml
+
         AGENTCTL_DIR.mkdir(parents=True, exist_ok=True)
-        with open(CONFIG_FILE, "w") as f:
-            yaml.dump(self.model_dump(exclude_none=True), f, default_flow_style=False)
+        try:
+            mode = CONFIG_FILE.stat().st_mode & 0o777
+        except FileNotFoundError:
+            mode = 0o644
+        tmp = CONFIG_FILE.with_suffix(f".{os.getpid()}.tmp")
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, mode)
+        try:
+            with os.fdopen(fd, "w") as f:
+                yaml.dump(self.model_dump(exclude_none=True), f, default_flow_style=False)
+            os.replace(tmp, CONFIG_FILE)
+        except BaseException:
+            tmp.unlink(missing_ok=True)
+            raise
 
     def get_provider(self, name: str | None = None) -> tuple[str, ProviderConfig]:
         """Get a provider config by name, falling back to default."""
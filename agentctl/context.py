@@ -0,0 +1,257 @@
+"""Context-window management — choosing what of a session's history to send.
+
+Sending a whole transcript every turn fails once it outgrows the model's
+context window, and costs more each turn until then. `ContextManager` sits
+between the session store and the provider and fits the history into a token
+budget: the model's window less the room reserved for the reply, unless the
+session sets its own.
+
+Strategies, set per session under "context" in session.json:
+
+    full        the whole history (the old behaviour)
+    sliding     the newest messages that fit the budget
+    last_k      the system prompt plus the last `keep_last` messages
+    summarize   older turns folded into a running summary; the newest
+                messages are sent verbatim
+
+The system prompt is always kept. Token counts are estimated at ~4
+characters per token and cached in the message records when they are
+written; replies use the provider's reported output tokens instead.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Literal
+
+from pydantic import BaseModel
+
+from agentctl.providers import BaseProvider, Message, Response
+
+# Context windows in tokens by model name; the longest key found in the
+# model name wins
+CONTEXT_WINDOWS = {
+    "claude": 200_000,
+    "gpt-4o": 128_000,
+    "gpt-4-turbo": 128_000,
+    "gpt-4.1": 1_000_000,
+    "gpt-4": 8_192,
+    "gpt-3.5": 16_385,
+    "o1": 200_000,
+    "o3": 200_000,
+    "llama3": 8_192,
+    "llama3.1": 128_000,
+    "llama3.2": 128_000,
+    "mistral": 32_768,
+    "qwen": 32_768,
+}
+DEFAULT_CONTEXT_WINDOW = 8_192
+
+# Tokens of framing (role, separators) per message
+MESSAGE_OVERHEAD = 4
+
+SUMMARY_PROMPT = (
+    "You keep a running summary of a conversation between a user and an assistant. "
+    "Update the summary with the new messages. Keep facts, decisions, open "
+    "questions and anything the user asked to remember; drop pleasantries. "
+    "Reply with the updated summary only."
+)
+
+
+class ContextPolicy(BaseModel):
+    """How much of a session's history to send; the "context" key of session.json."""
+
+    strategy: Literal["full", "sliding", "last_k", "summarize"] = "sliding"
+    # Input tokens per turn; None uses the model's context window less max_tokens
+    budget: int | None = None
+    # Messages sent by last_k
+    keep_last: int = 20
+    # Share of the budget summarize keeps verbatim after folding older turns
+    keep_ratio: float = 0.5
+    # Longest summary, in output tokens
+    summary_tokens: int = 1024
+
+    @classmethod
+    def from_meta(cls, meta: dict) -> "ContextPolicy":
+        return cls.model_validate(meta.get("context") or {})
+
+
+def context_window(model: str | None) -> int:
+    """The context window of a model, in tokens."""
+    matches = [key for key in CONTEXT_WINDOWS if model and key in model]
+    return CONTEXT_WINDOWS[max(matches, key=len)] if matches else DEFAULT_CONTEXT_WINDOW
+
+
+def estimate_tokens(text: str) -> int:
+    # ~4 characters per token, as the scheduler estimates before a call
+    return max(1, len(text) // 4)
+
+
+def record_tokens(record: dict) -> int:
+    """Tokens a message record takes in a request, using its cached count."""
+    tokens = record.get("tokens")
+    if tokens is None:
+        tokens = estimate_tokens(record.get("content", ""))
+    return tokens + MESSAGE_OVERHEAD
+
+
+def _fingerprint(record: dict) -> str:
+    canonical = json.dumps(record, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()[:16]
+
+
+def _newest_fitting(records: list[dict], budget: int) -> int:
+    """Index of the oldest record of the longest suffix within `budget` tokens.
+
+    The newest record is always kept, even if it alone is over budget.
+    """
+    start, used = len(records), 0
+    while start > 0:
+        tokens = record_tokens(records[start - 1])
+        if used + tokens > budget and start < len(records):
+            break
+        used += tokens
+        start -= 1
+    return start
+
+
+@dataclass
+class ContextPlan:
+    """The messages for one turn and how they were chosen."""
+
+    messages: list[Message]
+    tokens: int
+    # History messages left out, and how many of those the summary covers
+    dropped: int = 0
+    summarized: int = 0
+    # Responses of summarization calls made for this turn, for cost tracking
+    summaries: list[Response] = field(default_factory=list)
+
+
+class ContextManager:
+    """Fits a session's history into a token budget before each request."""
+
+    def __init__(
+        self,
+        provider: BaseProvider,
+        policy: ContextPolicy,
+        model: str | None = None,
+        max_tokens: int = 4096,
+        summary: dict | None = None,
+    ):
+        self.provider = provider
+        self.policy = policy
+        self.model = model
+        self.budget = policy.budget or max(1024, context_window(model) - max_tokens)
+        # The cached summary: {"upto", "fingerprint", "content", "tokens", ...}
+        self.summary = summary
+
+    async def prepare(self, system: str | None, records: list[dict]) -> ContextPlan:
+        """The messages to send for a history of user/assistant records."""
+        available = self.budget
+        if system:
+            available -= estimate_tokens(system) + MESSAGE_OVERHEAD
+
+        summaries: list[Response] = []
+        summary = None
+        strategy = self.policy.strategy
+        if strategy == "full":
+            start = 0
+        elif strategy == "last_k":
+            start = max(0, len(records) - self.policy.keep_last)
+            start = max(start, _newest_fitting(records, available))
+        elif strategy == "sliding":
+            start = _newest_fitting(records, available)
+        else:
+            summaries = await self._fold(records, available)
+            summary = self._valid_summary(records)
+            covered = summary["upto"] if summary else 0
+            if summary:
+                available -= summary["tokens"] + MESSAGE_OVERHEAD
+            start = max(covered, _newest_fitting(records, available))
+
+        # A conversation sent to the model has to open with the user
+        while start < len(records) - 1 and records[start].get("role") != "user":
+            start += 1
+
+        window = records[start:]
+        messages = []
+        head = system or ""
+        if summary:
+            head += f"\n\nSummary of the earlier conversation:\n{summary['content']}"
+        if head.strip():
+            messages.append(Message(role="system", content=head.strip()))
+        messages += [Message(role=r["role"], content=r.get("content", "")) for r in window]
+
+        tokens = sum(record_tokens(r) for r in window) + self.budget - available
+        return ContextPlan(
+            messages=messages,
+            tokens=tokens,
+            dropped=start,
+            summarized=summary["upto"] if summary else 0,
+            summaries=summaries,
+        )
+
+    def _valid_summary(self, records: list[dict]) -> dict | None:
+        """The cached summary, if it still describes a prefix of this history."""
+        summary = self.summary
+        if not summary or not 0 < summary["upto"] <= len(records):
+            return None
+        if _fingerprint(records[summary["upto"] - 1]) != summary["fingerprint"]:
+            return None  # the history was restored or rewritten since
+        return summary
+
+    async def _fold(self, records: list[dict], available: int) -> list[Response]:
+        """Fold older turns into the summary once the rest no longer fits.
+
+        Afterwards the messages past the summary take at most `keep_ratio`
+        of the budget, so this runs again only after that much new
+        conversation, and folds at most about half the budget per call.
+        """
+        summary = self._valid_summary(records)
+        covered = summary["upto"] if summary else 0
+        summary_tokens = summary["tokens"] + MESSAGE_OVERHEAD if summary else 0
+        if sum(record_tokens(r) for r in records[covered:]) <= available - summary_tokens:
+            return []
+
+        keep_from = _newest_fitting(records, int(available * self.policy.keep_ratio))
+        keep_from = max(keep_from, covered)
+        # Fold whole turns, so what is sent verbatim opens with the user
+        while keep_from < len(records) - 1 and records[keep_from].get("role") != "user":
+            keep_from += 1
+        chunk_budget = max(1, available // 2)
+        responses = []
+        while covered < keep_from:
+            end = covered + 1
+            used = record_tokens(records[covered])
+            while end < keep_from and used + record_tokens(records[end]) <= chunk_budget:
+                used += record_tokens(records[end])
+                end += 1
+            response = await self._summarize(summary, records[covered:end])
+            responses.append(response)
+            summary = {
+                "upto": end,
+                "fingerprint": _fingerprint(records[end - 1]),
+                "content": response.content,
+                "tokens": response.output_tokens or estimate_tokens(response.content),
+                "model": response.model,
+                "created": datetime.now().isoformat(),
+            }
+            covered = end
+        self.summary = summary
+        return responses
+
+    async def _summarize(self, summary: dict | None, records: list[dict]) -> Response:
+        transcript = "\n\n".join(f"{r['role']}: {r.get('content', '')}" for r in records)
+        previous = summary["content"] if summary else "(none yet)"
+        prompt = f"Current summary:\n{previous}\n\nNew messages:\n{transcript}"
+        kwargs = {"max_tokens": self.policy.summary_tokens, "temperature": 0.0}
+        if self.model:
+            kwargs["model"] = self.model
+        return await self.provider.complete(
+            [Message(role="system", content=SUMMARY_PROMPT), Message(role="user", content=prompt)],
+            **kwargs,
+        )
@@ -0,0 +1,385 @@
+"""`agentctl daemon` — serve commands from one warm process over a Unix socket.
+
+A plain invocation re-imports agentctl, re-reads the config and opens fresh
+provider connections. While the daemon runs, `agentctl run`, `compare`,
+`costs`, `models` and `session send` hand their arguments and their stdin/stdout/stderr
+file descriptors to it instead (see `forward()`), and it runs the command in
+a thread of its own process. Output goes straight to the caller's terminal
+through the passed descriptors; only the exit status comes back over the
+socket. Coroutines from all commands share one event loop, so the connection
+pool, rate limiters and parsed config stay warm between commands.
+
+When the socket is missing or nobody answers, the client runs the command in
+process as usual. Set AGENTCTL_NO_DAEMON=1 to bypass a running daemon.
+
+This module is imported by the client path of every forwarded command, so
+anything heavy is imported inside the server functions.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import json
+import os
+import socket
+import sys
+
+from agentctl.paths import DAEMON_SOCKET
+
+# Argument prefixes the client forwards to a running daemon
+FORWARDED = (("run",), ("compare",), ("costs",), ("models",), ("session", "send"))
+
+NO_DAEMON_ENV = "AGENTCTL_NO_DAEMON"
+
+# Largest request message accepted by the server
+MAX_REQUEST = 1024 * 1024
+
+
+# --- client ---------------------------------------------------------------
+
+
+def should_forward(args: list[str]) -> bool:
+    """Whether these CLI arguments are for a command the daemon serves."""
+    if os.environ.get(NO_DAEMON_ENV) or not DAEMON_SOCKET.exists():
+        return False
+    return any(tuple(args[: len(prefix)]) == prefix for prefix in FORWARDED)
+
+
+def _connect(timeout: float | None = None) -> socket.socket | None:
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(str(DAEMON_SOCKET))
+    except OSError:
+        sock.close()
+        return None
+    return sock
+
+
+def _read_reply(sock: socket.socket) -> dict | None:
+    data = b""
+    while not data.endswith(b"\n"):
+        chunk = sock.recv(65536)
+        if not chunk:
+            return None
+        data += chunk
+    return json.loads(data)
+
+
+def forward(args: list[str]) -> int | None:
+    """Run a command in the daemon and return its exit status.
+
+    Returns None when no daemon is reachable, so the caller runs it in process.
+    """
+    sock = _connect()
+    if sock is None:
+        return None
+
+    request = {"argv": args}
+    if os.isatty(1):
+        size = os.get_terminal_size(1)
+        request["terminal"] = [size.columns, size.lines]
+
+    with sock:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        try:
+            socket.send_fds(sock, [json.dumps(request).encode() + b"\n"], [0, 1, 2])
+            reply = _read_reply(sock)
+        except KeyboardInterrupt:
+            # Closing the socket tells the daemon to cancel the command
+            return 130
+        except OSError:
+            return None
+    if reply is None:
+        sys.stderr.write("agentctl: the daemon closed the connection\n")
+        return 1
+    if "exit" not in reply:
+        # Refused before running anything, so it is safe to run it here
+        error = reply.get("error", "unexpected reply")
+        sys.stderr.write(f"agentctl: the daemon refused the command ({error}); running it here\n")
+        return None
+    return reply["exit"]
+
+
+def control(action: str, timeout: float = 5.0) -> dict | None:
+    """Send a control request ("status" or "stop"); None if no daemon answers."""
+    sock = _connect(timeout)
+    if sock is None:
+        return None
+    with sock:
+        try:
+            sock.sendall(json.dumps({"control": action}).encode() + b"\n")
+            return _read_reply(sock)
+        except OSError:
+            return None
+
+
+# --- server ---------------------------------------------------------------
+
+# Per-request stdin/stdout/stderr and terminal size; context variables so they
+# follow a command's coroutines onto the shared event loop (see run_async)
+_streams: contextvars.ContextVar[dict | None] = contextvars.ContextVar(
+    "agentctl_streams", default=None
+)
+_terminal: contextvars.ContextVar[tuple[int, int] | None] = contextvars.ContextVar(
+    "agentctl_terminal", default=None
+)
+
+
+class _StreamProxy:
+    """Stands in for sys.stdout & co, delegating to the current request's stream."""
+
+    def __init__(self, name: str, default):
+        self._name = name
+        self._default = default
+
+    def _target(self):
+        streams = _streams.get()
+        return streams[self._name] if streams else self._default
+
+    def __getattr__(self, attr: str):
+        return getattr(self._target(), attr)
+
+    def write(self, s: str) -> int:
+        return self._target().write(s)
+
+    def flush(self) -> None:
+        self._target().flush()
+
+    def isatty(self) -> bool:
+        return self._target().isatty()
+
+    def fileno(self) -> int:
+        return self._target().fileno()
+
+
+def _size_consoles_per_request() -> None:
+    """Make rich consoles take the caller's terminal size, not the daemon's."""
+    from rich.console import Console
+
+    original = Console.__init__
+
+    def __init__(self, *args, **kwargs):
+        terminal = _terminal.get()
+        if terminal is not None:
+            kwargs.setdefault("width", terminal[0])
+            kwargs.setdefault("height", terminal[1])
+        original(self, *args, **kwargs)
+
+    Console.__init__ = __init__
+
+
+def _invoke(argv: list[str]) -> int:
+    """Run one CLI command in this thread and return its exit status."""
+    import asyncio
+    import concurrent.futures
+    import traceback
+
+    import click
+
+    from agentctl.cli import main
+
+    try:
+        rv = main.main(args=argv, prog_name="agentctl", standalone_mode=False)
+    except click.ClickException as e:
+        e.show()
+        return e.exit_code
+    except click.exceptions.Abort:
+        click.echo("Aborted!", err=True)
+        return 1
+    except SystemExit as e:
+        return e.code if isinstance(e.code, int) else int(e.code is not None)
+    except (asyncio.CancelledError, concurrent.futures.CancelledError):
+        return 130
+    except Exception:
+        traceback.print_exc()
+        return 1
+    return rv if isinstance(rv, int) else 0
+
+
+class Daemon:
+    """Accepts connections on the socket and runs each request in a thread."""
+
+    def __init__(self):
+        import threading
+        import time
+
+        self.started = time.time()
+        self.requests = 0
+        self.active = 0
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self.loop = None
+        self.sock: socket.socket | None = None
+
+    def serve(self) -> None:
+        import asyncio
+        import threading
+
+        from agentctl import runtime
+        from agentctl.providers.pool import pool
+
+        os.environ[NO_DAEMON_ENV] = "1"  # commands run here must not forward again
+        pool.keep_idle = True
+        self._warm_up()
+        _size_consoles_per_request()
+        sys.stdin = _StreamProxy("stdin", sys.stdin)
+        sys.stdout = _StreamProxy("stdout", sys.stdout)
+        sys.stderr = _StreamProxy("stderr", sys.stderr)
+
+        self.loop = asyncio.new_event_loop()
+        threading.Thread(target=self.loop.run_forever, name="agentctl-loop", daemon=True).start()
+        runtime.use_loop(self.loop)
+
+        self.sock = _listen()
+        try:
+            while not self._stopping.is_set():
+                try:
+                    conn, _ = self.sock.accept()
+                except OSError:
+                    break  # closed by stop()
+                threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+        finally:
+            DAEMON_SOCKET.unlink(missing_ok=True)
+            asyncio.run_coroutine_threadsafe(pool.close_all(), self.loop).result(timeout=5)
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            runtime.use_loop(None)
+
+    def stop(self) -> None:
+        self._stopping.set()
+        if self.sock is not None:
+            self.sock.shutdown(socket.SHUT_RDWR)
+            self.sock.close()
+
+    def _warm_up(self) -> None:
+        """Import what the served commands need before the first request."""
+        import importlib
+
+        from agentctl.cli import LAZY_COMMANDS
+        from agentctl.config import AgentctlConfig
+        from agentctl.providers import _provider_modules
+
+        for prefix in FORWARDED:
+            if prefix[0] in LAZY_COMMANDS:
+                importlib.import_module(LAZY_COMMANDS[prefix[0]][0].split(":")[0])
+        for module in _provider_modules.values():
+            importlib.import_module(module)
+        AgentctlConfig.load()
+
+    def _handle(self, conn: socket.socket) -> None:
+        with conn:
+            try:
+                message, fds, _, _ = socket.recv_fds(conn, MAX_REQUEST, 3)
+                while not message.endswith(b"\n") and len(message) < MAX_REQUEST:
+                    more = conn.recv(MAX_REQUEST)
+                    if not more:
+                        break
+                    message += more
+                request = json.loads(message)
+            except (OSError, ValueError):
+                return
+
+            if "control" in request:
+                reply = self._control(request["control"])
+            elif len(fds) == 3:
+                reply = {"exit": self._run(conn, request, fds)}
+            else:
+                for fd in fds:
+                    os.close(fd)
+                reply = {"error": "expected stdin, stdout and stderr descriptors"}
+            try:
+                conn.sendall(json.dumps(reply).encode() + b"\n")
+            except OSError:
+                pass  # the client is gone
+
+    def _control(self, action: str) -> dict:
+        import threading
+
+        from agentctl.providers.pool import pool
+
+        if action == "stop":
+            threading.Thread(target=self.stop).start()
+            return {"stopping": True}
+        return {
+            "pid": os.getpid(),
+            "started": self.started,
+            "requests": self.requests,
+            "active": self.active,
+            "pool": pool.stats(),
+        }
+
+    def _run(self, conn: socket.socket, request: dict, fds: list[int]) -> int:
+        """Run a command with the client's streams, cancelling it if the client leaves."""
+        import select
+        import threading
+
+        from agentctl import runtime
+
+        stdin = open(fds[0], "r", closefd=True)
+        stdout = open(fds[1], "w", buffering=1, closefd=True)
+        stderr = open(fds[2], "w", buffering=1, closefd=True)
+        futures: list = []
+        done_r, done_w = os.pipe()
+
+        def watch() -> None:
+            readable, _, _ = select.select([conn, done_r], [], [])
+            if conn in readable and not conn.recv(1, socket.MSG_PEEK):
+                # Client hung up (Ctrl+C): stop the command's coroutines
+                for future in futures:
+                    future.cancel()
+
+        watcher = threading.Thread(target=watch, daemon=True)
+        watcher.start()
+        with self._lock:
+            self.requests += 1
+            self.active += 1
+        try:
+            _streams.set({"stdin": stdin, "stdout": stdout, "stderr": stderr})
+            if request.get("terminal"):
+                _terminal.set(tuple(request["terminal"]))
+            runtime.running.set(futures)
+            return _invoke(request["argv"])
+        finally:
+            with self._lock:
+                self.active -= 1
+            os.write(done_w, b"x")
+            watcher.join()
+            for fd in (done_r, done_w):
+                os.close(fd)
+            for stream in (stdin, stdout, stderr):
+                try:
+                    stream.close()
+                except OSError:
+                    pass
+
+
+def _listen() -> socket.socket:
+    DAEMON_SOCKET.parent.mkdir(parents=True, exist_ok=True)
+    # A socket file nobody listens on is left over from a daemon that died
+    DAEMON_SOCKET.unlink(missing_ok=True)
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    # Created owner-only: anyone who can connect can run commands as us
+    umask = os.umask(0o177)
+    try:
+        sock.bind(str(DAEMON_SOCKET))
+    finally:
+        os.umask(umask)
+    sock.listen(64)
+    return sock
+
+
+def serve() -> None:
+    """Run the daemon in this process until stopped."""
+    import signal
+
+    daemon = Daemon()
+    signal.signal(signal.SIGTERM, lambda *_: daemon.stop())
+    try:
+        daemon.serve()
+    except KeyboardInterrupt:
+        daemon.stop()
+
+
+if __name__ == "__main__":
+    serve()
@@ -0,0 +1,344 @@
+"""Cost ledger — append-only monthly JSONL files plus pre-aggregated rollups.
+
+Every call is appended to ~/.agentctl/costs/YYYY-MM.jsonl. Next to each month
+file, YYYY-MM.rollup.json keeps per (day, provider, model) totals and the
+byte offset of the ledger they cover. Appends update the rollup under a file
+lock and replace it atomically, so `agentctl costs` reads O(groups) instead
+of parsing every record. If the ledger grew behind the rollup's back (an
+older agentctl, a crash between the two writes) the missing tail is folded in
+on read; if it shrank, the rollup is rebuilt.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from contextlib import contextmanager
+from dataclasses import astuple, dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Iterator
+
+from agentctl import tracing
+from agentctl.paths import COSTS_DIR
+from agentctl.providers import Response
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+ROLLUP_VERSION = 3
+
+# (day "YYYY-MM-DD", provider, model)
+GroupKey = tuple[str, str, str]
+
+
+@dataclass
+class Totals:
+    """Aggregated usage for one group of ledger entries."""
+
+    calls: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cost: float = 0.0
+    cache_hits: int = 0
+    saved: float = 0.0
+    # Input tokens read from / written to the provider's prompt cache
+    cache_read_tokens: int = 0
+    cache_write_tokens: int = 0
+    # Calls of models without a known price, recorded at zero cost
+    unpriced: int = 0
+
+    def add(self, entry: dict) -> None:
+        self.calls += 1
+        self.input_tokens += entry.get("input_tokens", 0)
+        self.output_tokens += entry.get("output_tokens", 0)
+        self.cost += entry.get("cost", 0.0)
+        self.cache_read_tokens += entry.get("cache_read_tokens", 0)
+        self.cache_write_tokens += entry.get("cache_write_tokens", 0)
+        self.unpriced += bool(entry.get("unpriced"))
+        if entry.get("cache_hit"):
+            self.cache_hits += 1
+            self.saved += entry.get("saved", 0.0)
+
+    def merge(self, other: Totals) -> None:
+        self.calls += other.calls
+        self.input_tokens += other.input_tokens
+        self.output_tokens += other.output_tokens
+        self.cost += other.cost
+        self.cache_hits += other.cache_hits
+        self.saved += other.saved
+        self.cache_read_tokens += other.cache_read_tokens
+        self.cache_write_tokens += other.cache_write_tokens
+        self.unpriced += other.unpriced
+
+    @property
+    def prompt_cache_ratio(self) -> float | None:
+        """Share of input tokens served from the prompt cache; None without input."""
+        total = self.input_tokens + self.cache_read_tokens + self.cache_write_tokens
+        return self.cache_read_tokens / total if total else None
+
+
+def ledger_file(month: str) -> Path:
+    return COSTS_DIR / f"{month}.jsonl"
+
+
+def rollup_file(month: str) -> Path:
+    return COSTS_DIR / f"{month}.rollup.json"
+
+
+@contextmanager
+def _locked(month: str):
+    """Serialize ledger writers for one month across processes."""
+    COSTS_DIR.mkdir(parents=True, exist_ok=True)
+    with open(COSTS_DIR / f"{month}.lock", "a") as lock:
+        if fcntl:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _group_key(entry: dict) -> GroupKey:
+    return (entry["timestamp"][:10], entry.get("provider", "?"), entry.get("model", "?"))
+
+
+def _fold(groups: dict[GroupKey, Totals], entries) -> None:
+    for entry in entries:
+        groups.setdefault(_group_key(entry), Totals()).add(entry)
+
+
+def _parse_lines(lines) -> Iterator[dict]:
+    for line in lines:
+        if line.strip():
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue  # a torn write; nothing sensible to count
+
+
+def _read_rollup(month: str) -> tuple[dict[GroupKey, Totals], int] | None:
+    try:
+        data = json.loads(rollup_file(month).read_text())
+    except (OSError, ValueError):
+        return None
+    if data.get("version") != ROLLUP_VERSION:
+        return None
+    groups = {tuple(row[:3]): Totals(*row[3:]) for row in data["groups"]}
+    return groups, data["offset"]
+
+
+def _write_rollup(month: str, groups: dict[GroupKey, Totals], offset: int) -> None:
+    data = {
+        "version": ROLLUP_VERSION,
+        "offset": offset,
+        "groups": [[*key, *astuple(totals)] for key, totals in sorted(groups.items())],
+    }
+    path = rollup_file(month)
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(data, separators=(",", ":")))
+    os.replace(tmp, path)
+
+
+def _sync_rollup(month: str) -> tuple[dict[GroupKey, Totals], int]:
+    """Bring the rollup up to date with the ledger. Caller holds the lock.
+
+    Returns the totals and the ledger offset they cover.
+    """
+    ledger = ledger_file(month)
+    size = ledger.stat().st_size if ledger.exists() else 0
+
+    state = _read_rollup(month)
+    groups, offset = state if state and state[1] <= size else ({}, 0)
+    if (offset == size and state is not None) or not ledger.exists():
+        return groups, offset
+
+    with open(ledger, "rb") as f:
+        f.seek(offset)
+        tail = f.read(size - offset)
+    # Only whole lines count; a torn final line is picked up once completed
+    complete = tail[: tail.rfind(b"\n") + 1]
+    _fold(groups, _parse_lines(complete.split(b"\n")))
+    offset += len(complete)
+    _write_rollup(month, groups, offset)
+    return groups, offset
+
+
+def load_rollup(month: str) -> dict[GroupKey, Totals]:
+    """Per (day, provider, model) totals for a month."""
+    if not ledger_file(month).exists():
+        return {}
+    with _locked(month):
+        return _sync_rollup(month)[0]
+
+
+def reindex(month: str) -> dict[GroupKey, Totals]:
+    """Rebuild a month's rollup from the raw ledger."""
+    with _locked(month):
+        rollup_file(month).unlink(missing_ok=True)
+        if not ledger_file(month).exists():
+            return {}
+        return _sync_rollup(month)[0]
+
+
+def rewrite(month: str, transform: Callable[[dict], dict]) -> dict[GroupKey, Totals]:
+    """Pass every entry of a month's ledger through `transform` and rebuild its rollup.
+
+    One streaming pass under the ledger lock into a new file, which then
+    replaces the ledger atomically. Lines that don't parse are kept as they
+    are.
+    """
+    with _locked(month):
+        path = ledger_file(month)
+        if not path.exists():
+            return {}
+        groups: dict[GroupKey, Totals] = {}
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(path, "rb") as src, open(tmp, "wb") as out:
+            for line in src:
+                if not line.strip():
+                    continue
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    out.write(line.rstrip(b"\n") + b"\n")
+                    continue
+                entry = transform(entry)
+                out.write(json.dumps(entry).encode() + b"\n")
+                _fold(groups, [entry])
+            out.flush()
+            os.fsync(out.fileno())
+            offset = out.tell()
+        os.replace(tmp, path)
+        _write_rollup(month, groups, offset)
+        return groups
+
+
+def months() -> list[str]:
+    """Months that have a ledger file, oldest first."""
+    if not COSTS_DIR.exists():
+        return []
+    return sorted(p.stem for p in COSTS_DIR.glob("*.jsonl"))
+
+
+def iter_records(month: str) -> Iterator[dict]:
+    """Stream the raw ledger entries of a month."""
+    path = ledger_file(month)
+    if not path.exists():
+        return
+    with open(path, "rb") as f:
+        yield from _parse_lines(f)
+
+
+def _months_between(since: str | None, until: str | None) -> Iterator[str]:
+    """Ledger months overlapping the inclusive day range [since, until]."""
+    for month in months():
+        if since and month < since[:7]:
+            continue
+        if until and month > until[:7]:
+            break
+        yield month
+
+
+def _in_range(day: str, since: str | None, until: str | None) -> bool:
+    return (not since or day >= since) and (not until or day <= until)
+
+
+def records_between(since: str | None = None, until: str | None = None) -> Iterator[dict]:
+    """Stream raw ledger entries whose day falls in [since, until] (YYYY-MM-DD).
+
+    Month files entirely outside the range are never opened.
+    """
+    for month in _months_between(since, until):
+        for entry in iter_records(month):
+            if _in_range(entry["timestamp"][:10], since, until):
+                yield entry
+
+
+def rollups_between(
+    since: str | None = None, until: str | None = None
+) -> Iterator[tuple[GroupKey, Totals]]:
+    """Stream (day, provider, model) totals for days in [since, until]."""
+    for month in _months_between(since, until):
+        for key, totals in load_rollup(month).items():
+            if _in_range(key[0], since, until):
+                yield key, totals
+
+
+def cost_entry(
+    model: str, provider: str, input_tokens: int, output_tokens: int, cost: float, **extra
+) -> dict:
+    """Build a ledger entry timestamped now."""
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "model": model,
+        "provider": provider,
+        "input_tokens": input_tokens,
+        "output_tokens": output_tokens,
+        "cost": cost,
+        **extra,
+    }
+
+
+def response_entry(response: Response, **extra) -> dict:
+    """Build a ledger entry for a provider response.
+
+    Cache hits are recorded at zero cost with the cost they saved, so
+    `agentctl costs` can report the savings.
+    """
+    if response.metadata.get("cache_hit"):
+        extra.update(cache_hit=True, saved=response.metadata.get("original_cost", 0.0))
+    if response.cache_read_tokens or response.cache_write_tokens:
+        extra.update(
+            cache_read_tokens=response.cache_read_tokens,
+            cache_write_tokens=response.cache_write_tokens,
+        )
+    if response.metadata.get("unpriced"):
+        extra["unpriced"] = True
+    return cost_entry(
+        response.model,
+        response.provider,
+        response.input_tokens,
+        response.output_tokens,
+        response.cost,
+        **extra,
+    )
+
+
+def record_costs(entries: list[dict]):
+    """Append many cost entries to the ledger with one write per month file,
+    and fold them into that month's rollup."""
+    if not entries:
+        return
+
+    by_month: dict[str, list[dict]] = {}
+    for entry in entries:
+        by_month.setdefault(entry["timestamp"][:7], []).append(entry)
+
+    for month, month_entries in by_month.items():
+        with tracing.span("ledger.record", entries=len(month_entries)), _locked(month):
+            groups, offset = _sync_rollup(month)
+            data = "".join(json.dumps(entry) + "\n" for entry in month_entries).encode()
+            with open(ledger_file(month), "ab") as f:
+                if f.tell() != offset:
+                    # A crashed writer left a torn line; end it so ours parse cleanly
+                    data = b"\n" + data
+                f.write(data)
+                offset = f.tell()
+            _fold(groups, month_entries)
+            _write_rollup(month, groups, offset)
+
+
+def record_cost(
+    model: str, provider: str, input_tokens: int, output_tokens: int, cost: float, **extra
+):
+    """Record a cost entry."""
+    record_costs([cost_entry(model, provider, input_tokens, output_tokens, cost, **extra)])
+
+
+def record_response(response: Response, **extra):
+    """Record the cost of a provider response."""
+    record_costs([response_entry(response, **extra)])
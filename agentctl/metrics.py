@@ -0,0 +1,349 @@
+"""Request telemetry — latency, throughput and errors of every provider call.
+
+`ScheduledProvider` records one sample per request it sends (retries
+included in the sample, not as samples of their own) into a daily file of
+fixed-size binary records under ~/.agentctl/metrics/:
+
+    2026-03-14.bin          36-byte records, appended with one write each
+    2026-03-14.rollup.json  per-series totals and quantile sketches,
+                            and the file offset they cover
+    series.tsv              provider<TAB>model; a series' id is its line number
+
+Appends are single O_APPEND writes smaller than a page, so concurrent
+processes never interleave records and need no lock. `agentctl stats`
+answers from the rollups, which like the cost rollups catch up with new
+records on read; only a day cut by the start of the window is scanned.
+Quantiles come from log-bucketed sketches (as in DDSketch) that merge
+across days and series with a bounded relative error.
+
+Payload bytes are the UTF-8 size of the prompt and reply text, not of the
+HTTP exchange, so they mean the same for every provider.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+import struct
+import time
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Iterator
+
+from agentctl.paths import METRICS_DIR
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+ROLLUP_VERSION = 1
+
+# time (epoch s), latency ms, time to first token ms (NaN unless streamed),
+# output tokens/s (NaN if unknown), request bytes, response bytes, series id,
+# HTTP status (0: transport error), retries, flags
+RECORD = struct.Struct("<dfffIIHHBBxx")
+FLAG_STREAM = 1
+
+# Relative error of the quantiles reported by `agentctl stats`
+SKETCH_ACCURACY = 0.01
+
+
+class QuantileSketch:
+    """Quantiles of positive values within a relative error, in bounded memory.
+
+    Values fall into buckets whose bounds grow geometrically by `gamma`; a
+    quantile is reported as the middle of its bucket, at most `accuracy` off
+    the true value. Sketches with the same accuracy merge exactly.
+    """
+
+    def __init__(self, accuracy: float = SKETCH_ACCURACY):
+        self.accuracy = accuracy
+        self.gamma = (1 + accuracy) / (1 - accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.bins: dict[int, int] = {}
+        self.zeros = 0
+        self.count = 0
+
+    def add(self, value: float) -> None:
+        if math.isnan(value):
+            return
+        self.count += 1
+        if value <= 1e-9:
+            self.zeros += 1
+            return
+        key = math.ceil(math.log(value) / self._log_gamma)
+        self.bins[key] = self.bins.get(key, 0) + 1
+
+    def merge(self, other: QuantileSketch) -> None:
+        self.count += other.count
+        self.zeros += other.zeros
+        for key, n in other.bins.items():
+            self.bins[key] = self.bins.get(key, 0) + n
+
+    def quantile(self, q: float) -> float | None:
+        """The value at quantile `q` (0..1), or None if the sketch is empty."""
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zeros
+        if rank < seen:
+            return 0.0
+        for key in sorted(self.bins):
+            seen += self.bins[key]
+            if rank < seen:
+                return 2 * self.gamma**key / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.bins) / (self.gamma + 1)
+
+    def to_dict(self) -> dict:
+        return {"accuracy": self.accuracy, "zeros": self.zeros, "bins": self.bins}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> QuantileSketch:
+        sketch = cls(data["accuracy"])
+        sketch.zeros = data["zeros"]
+        sketch.bins = {int(key): n for key, n in data["bins"].items()}
+        sketch.count = sketch.zeros + sum(sketch.bins.values())
+        return sketch
+
+
+@dataclass
+class SeriesStats:
+    """Totals and latency sketches of one provider/model's requests.
+
+    Sketches hold successful requests only; failed ones are counted in
+    `errors`.
+    """
+
+    requests: int = 0
+    errors: int = 0
+    retries: int = 0
+    request_bytes: int = 0
+    response_bytes: int = 0
+    latency_ms: QuantileSketch = field(default_factory=QuantileSketch)
+    ttft_ms: QuantileSketch = field(default_factory=QuantileSketch)
+    tokens_per_s: QuantileSketch = field(default_factory=QuantileSketch)
+
+    def add(self, sample: tuple) -> None:
+        _, latency, ttft, tps, sent, received, _, status, retries, _ = sample
+        self.requests += 1
+        self.retries += retries
+        self.request_bytes += sent
+        self.response_bytes += received
+        if not 200 <= status < 300:
+            self.errors += 1
+            return
+        self.latency_ms.add(latency)
+        self.ttft_ms.add(ttft)
+        self.tokens_per_s.add(tps)
+
+    def merge(self, other: SeriesStats) -> None:
+        self.requests += other.requests
+        self.errors += other.errors
+        self.retries += other.retries
+        self.request_bytes += other.request_bytes
+        self.response_bytes += other.response_bytes
+        self.latency_ms.merge(other.latency_ms)
+        self.ttft_ms.merge(other.ttft_ms)
+        self.tokens_per_s.merge(other.tokens_per_s)
+
+    def to_dict(self) -> dict:
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "retries": self.retries,
+            "request_bytes": self.request_bytes,
+            "response_bytes": self.response_bytes,
+            "latency_ms": self.latency_ms.to_dict(),
+            "ttft_ms": self.ttft_ms.to_dict(),
+            "tokens_per_s": self.tokens_per_s.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> SeriesStats:
+        sketches = ("latency_ms", "ttft_ms", "tokens_per_s")
+        return cls(
+            **{key: value for key, value in data.items() if key not in sketches},
+            **{key: QuantileSketch.from_dict(data[key]) for key in sketches},
+        )
+
+
+# --- series ---------------------------------------------------------------
+
+# (provider, model) <-> id, as read from series.tsv at _series_path
+_series: list[tuple[str, str]] = []
+_series_ids: dict[tuple[str, str], int] = {}
+_series_path = None
+
+
+def _series_file():
+    return METRICS_DIR / "series.tsv"
+
+
+def _load_series() -> None:
+    global _series_path
+    _series_path = _series_file()
+    try:
+        lines = _series_path.read_text().splitlines()
+    except FileNotFoundError:
+        lines = []
+    _series[:] = [tuple(line.split("\t", 1)) for line in lines]
+    _series_ids.clear()
+    _series_ids.update((key, i) for i, key in enumerate(_series))
+
+
+def _series_id(provider: str, model: str) -> int:
+    key = (provider.replace("\t", " "), model.replace("\t", " ").replace("\n", " "))
+    if key not in _series_ids or _series_path != _series_file():
+        METRICS_DIR.mkdir(parents=True, exist_ok=True)
+        with open(_series_file(), "a") as f:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            # Another process may have added it since we last looked
+            _load_series()
+            if key not in _series_ids:
+                f.write("\t".join(key) + "\n")
+                f.flush()
+                _series_ids[key] = len(_series)
+                _series.append(key)
+    return _series_ids[key]
+
+
+def series_name(series_id: int) -> tuple[str, str]:
+    if series_id >= len(_series) or _series_path != _series_file():
+        _load_series()
+    return _series[series_id] if series_id < len(_series) else ("?", "?")
+
+
+# --- writing --------------------------------------------------------------
+
+
+def day_file(day: str):
+    return METRICS_DIR / f"{day}.bin"
+
+
+def rollup_file(day: str):
+    return METRICS_DIR / f"{day}.rollup.json"
+
+
+def record(
+    provider: str,
+    model: str,
+    latency_ms: float,
+    *,
+    ttft_ms: float | None = None,
+    tokens_per_s: float | None = None,
+    request_bytes: int = 0,
+    response_bytes: int = 0,
+    status: int = 200,
+    retries: int = 0,
+    stream: bool = False,
+    at: float | None = None,
+) -> None:
+    """Append one request sample. Telemetry never fails a request: errors
+    writing it are ignored."""
+    at = time.time() if at is None else at
+    try:
+        data = RECORD.pack(
+            at,
+            latency_ms,
+            math.nan if ttft_ms is None else ttft_ms,
+            math.nan if tokens_per_s is None else tokens_per_s,
+            min(request_bytes, 0xFFFFFFFF),
+            min(response_bytes, 0xFFFFFFFF),
+            _series_id(provider, model),
+            status,
+            min(retries, 0xFF),
+            FLAG_STREAM if stream else 0,
+        )
+        fd = os.open(
+            day_file(datetime.fromtimestamp(at).date().isoformat()),
+            os.O_WRONLY | os.O_APPEND | os.O_CREAT,
+            0o644,
+        )
+        try:
+            os.write(fd, data)
+        finally:
+            os.close(fd)
+    except (OSError, struct.error):
+        pass
+
+
+# --- reading --------------------------------------------------------------
+
+
+def iter_samples(day: str, offset: int = 0) -> Iterator[tuple]:
+    """Unpacked records of a day from a byte offset on."""
+    try:
+        with open(day_file(day), "rb") as f:
+            f.seek(offset)
+            data = f.read()
+    except FileNotFoundError:
+        return
+    yield from RECORD.iter_unpack(data[: len(data) - len(data) % RECORD.size])
+
+
+def _fold(stats: dict[int, SeriesStats], samples) -> None:
+    for sample in samples:
+        stats.setdefault(sample[6], SeriesStats()).add(sample)
+
+
+def load_rollup(day: str) -> dict[int, SeriesStats]:
+    """Per-series stats of a whole day, brought up to date with its records."""
+    path = day_file(day)
+    size = path.stat().st_size if path.exists() else 0
+    size -= size % RECORD.size
+    try:
+        data = json.loads(rollup_file(day).read_text())
+        if data.get("version") != ROLLUP_VERSION or data["offset"] > size:
+            raise ValueError
+        stats = {int(sid): SeriesStats.from_dict(s) for sid, s in data["series"].items()}
+        offset = data["offset"]
+    except (OSError, ValueError, KeyError):
+        stats, offset = {}, 0
+    if offset == size and offset:
+        return stats
+
+    _fold(stats, iter_samples(day, offset))
+    data = {
+        "version": ROLLUP_VERSION,
+        "offset": size,
+        "series": {sid: s.to_dict() for sid, s in stats.items()},
+    }
+    tmp = rollup_file(day).with_suffix(f".{os.getpid()}.tmp")
+    try:
+        tmp.write_text(json.dumps(data, separators=(",", ":")))
+        os.replace(tmp, rollup_file(day))
+    except OSError:
+        pass  # a read-only store is still readable
+    return stats
+
+
+def _day_start(day: date) -> float:
+    return datetime.combine(day, datetime.min.time()).timestamp()
+
+
+def query(since: float, until: float | None = None) -> dict[tuple[str, str], SeriesStats]:
+    """Stats per (provider, model) of the requests made in [since, until).
+
+    Whole days come from their rollups; days cut by the window are scanned.
+    Without `until` the window runs to now, and today counts as whole.
+    """
+    open_ended = until is None
+    until = time.time() if until is None else until
+    result: dict[tuple[str, str], SeriesStats] = {}
+    day = datetime.fromtimestamp(since).date()
+    while _day_start(day) < until:
+        name = day.isoformat()
+        if day_file(name).exists():
+            start, end = _day_start(day), _day_start(day + timedelta(days=1))
+            if since <= start and (end <= until or open_ended):
+                stats = load_rollup(name)
+            else:
+                stats = {}
+                _fold(stats, (s for s in iter_samples(name) if since <= s[0] < until))
+            for sid, s in stats.items():
+                result.setdefault(series_name(sid), SeriesStats()).merge(s)
+        day += timedelta(days=1)
+    return result
@@ -0,0 +1,20 @@
+"""Filesystem layout for agentctl's local state.
+
+Kept free of heavy imports so light commands can locate their data without
+loading the config models.
+"""
+
+from pathlib import Path
+
+AGENTCTL_DIR = Path.home() / ".agentctl"
+CONFIG_FILE = AGENTCTL_DIR / "config.yaml"
+CONFIG_SNAPSHOT = AGENTCTL_DIR / "config.pickle"
+PRICING_FILE = AGENTCTL_DIR / "pricing.yaml"
+SESSIONS_DIR = AGENTCTL_DIR / "sessions"
+COSTS_DIR = AGENTCTL_DIR / "costs"
+METRICS_DIR = AGENTCTL_DIR / "metrics"
+TRACES_DIR = AGENTCTL_DIR / "traces"
+PLUGINS_DIR = AGENTCTL_DIR / "plugins"
+CACHE_DIR = AGENTCTL_DIR / "cache"
+DAEMON_SOCKET = AGENTCTL_DIR / "daemon.sock"
+DAEMON_LOG = AGENTCTL_DIR / "daemon.log"
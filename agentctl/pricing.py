@@ -0,0 +1,279 @@
+"""Model prices — one table for every provider, versioned over time.
+
+Prices are per 1M tokens, keyed by provider and model ID prefix. A model is
+priced by the longest prefix that matches it, found by walking a trie, so
+`gpt-4o-mini-2024-07-18` gets the gpt-4o-mini price and not gpt-4o's. Each
+prefix holds a list of versions, each effective from a date on, so ledger
+entries can be re-priced with the prices of the day they were recorded
+(`agentctl costs reprice`).
+
+Entries in ~/.agentctl/pricing.yaml override or extend the built-in table,
+in the same shape as BUILTIN_PRICES:
+
+    openai:
+      gpt-4o:
+        - since: 2024-10-02
+          input: 2.50
+          output: 10.00
+          cache_read: 1.25
+    ollama:
+      llama3.1: {input: 0.02, output: 0.02}   # one version, always in effect
+"""
+
+from __future__ import annotations
+
+import bisect
+import sys
+from dataclasses import MISSING, dataclass, fields
+from datetime import date, datetime
+
+from agentctl.paths import PRICING_FILE
+from agentctl.providers import Response
+
+# Effective date of a version without "since"
+EPOCH = "0001-01-01"
+
+
+@dataclass(frozen=True)
+class Price:
+    """Prices of one model version, in USD per 1M tokens unless noted."""
+
+    input: float
+    output: float
+    # Input read from / written to the prompt cache; None bills it as input
+    cache_read: float | None = None
+    cache_write: float | None = None
+    # Fraction taken off token prices for batch API requests
+    batch_discount: float = 0.0
+    # USD per request, on top of tokens
+    per_request: float = 0.0
+
+    def cost(
+        self,
+        input_tokens: int,
+        output_tokens: int,
+        cache_read_tokens: int = 0,
+        cache_write_tokens: int = 0,
+        batch: bool = False,
+    ) -> float:
+        cache_read = self.input if self.cache_read is None else self.cache_read
+        cache_write = self.input if self.cache_write is None else self.cache_write
+        tokens = (
+            input_tokens * self.input
+            + output_tokens * self.output
+            + cache_read_tokens * cache_read
+            + cache_write_tokens * cache_write
+        ) / 1_000_000
+        if batch:
+            tokens *= 1 - self.batch_discount
+        return tokens + self.per_request
+
+
+def _anthropic(input: float, output: float) -> dict:
+    # Prompt cache writes cost 1.25x input, reads 0.1x; the batch API halves prices
+    return {
+        "input": input,
+        "output": output,
+        "cache_write": input * 1.25,
+        "cache_read": input * 0.1,
+        "batch_discount": 0.5,
+    }
+
+
+def _openai(input: float, output: float, cache_read: float | None = None) -> dict:
+    # Cached input has its own price where OpenAI caches prompts; the batch API halves prices
+    return {"input": input, "output": output, "cache_read": cache_read, "batch_discount": 0.5}
+
+
+BUILTIN_PRICES: dict[str, dict[str, dict | list[dict]]] = {
+    "anthropic": {
+        "claude-sonnet": _anthropic(3.0, 15.0),
+        "claude-3-5-sonnet": _anthropic(3.0, 15.0),
+        "claude-3-7-sonnet": _anthropic(3.0, 15.0),
+        "claude-haiku": _anthropic(0.25, 1.25),
+        "claude-3-haiku": _anthropic(0.25, 1.25),
+        "claude-3-5-haiku": _anthropic(0.80, 4.0),
+        "claude-haiku-4-5": _anthropic(1.0, 5.0),
+        "claude-opus": _anthropic(15.0, 75.0),
+        "claude-3-opus": _anthropic(15.0, 75.0),
+        "claude-opus-4-5": _anthropic(5.0, 25.0),
+    },
+    "openai": {
+        "gpt-4o": [
+            _openai(5.0, 15.0),
+            # The gpt-4o alias moved to the cheaper 2024-08-06 snapshot
+            {"since": "2024-10-02", **_openai(2.50, 10.0, 1.25)},
+        ],
+        "gpt-4o-mini": _openai(0.15, 0.60, 0.075),
+        "gpt-4-turbo": _openai(10.0, 30.0),
+        "gpt-4.1": _openai(2.0, 8.0, 0.50),
+        "gpt-4.1-mini": _openai(0.40, 1.60, 0.10),
+        "o1": _openai(15.0, 60.0, 7.50),
+        "o1-mini": _openai(1.10, 4.40, 0.55),
+    },
+    # Local models are free unless priced in pricing.yaml
+    "ollama": {"": {"input": 0.0, "output": 0.0}},
+    "mock": {"": {"input": 0.0, "output": 0.0}},
+}
+
+
+class _Node:
+    __slots__ = ("children", "versions")
+
+    def __init__(self):
+        self.children: dict[str, _Node] = {}
+        # [(since "YYYY-MM-DD", Price)], sorted by date
+        self.versions: list[tuple[str, Price]] = []
+
+
+class PriceTable:
+    """Longest-prefix lookup of versioned prices, one trie per provider."""
+
+    def __init__(self, *sheets: dict):
+        self._roots: dict[str, _Node] = {}
+        for sheet in sheets:
+            self.update(sheet)
+
+    def update(self, sheet: dict) -> None:
+        """Add a {provider: {prefix: version | [versions]}} sheet, overriding
+        versions with the same prefix and date.
+
+        Raises ValueError naming the first malformed entry; nothing is added then.
+        """
+        entries = []
+        for provider, models in _mapping(sheet or {}, "the price sheet").items():
+            for prefix, versions in _mapping(models or {}, str(provider)).items():
+                where = f"{provider}.{prefix}"
+                for version in versions if isinstance(versions, list) else [versions]:
+                    version = dict(_mapping(version, where))
+                    since = version.pop("since", None) or EPOCH
+                    price = _price(version, where)
+                    entries.append((str(provider), str(prefix), _day(since), price))
+        for entry in entries:
+            self.add(*entry)
+
+    def add(self, provider: str, prefix: str, since: str, price: Price) -> None:
+        node = self._roots.setdefault(provider, _Node())
+        for char in prefix:
+            node = node.children.setdefault(char, _Node())
+        dates = [d for d, _ in node.versions]
+        i = bisect.bisect_left(dates, since)
+        if i < len(dates) and dates[i] == since:
+            node.versions[i] = (since, price)
+        else:
+            node.versions.insert(i, (since, price))
+
+    def lookup(self, provider: str, model: str, at: str | date | None = None) -> Price | None:
+        """The price of `model` in effect on day `at` (default: today), or None.
+
+        Before a prefix's first version, that first version applies.
+        """
+        node = self._roots.get(provider)
+        match = node if node and node.versions else None
+        for char in model:
+            if node is None:
+                break
+            node = node.children.get(char)
+            if node is not None and node.versions:
+                match = node
+        if match is None:
+            return None
+        day = _day(at or date.today())
+        i = bisect.bisect_right([d for d, _ in match.versions], day)
+        return match.versions[max(i - 1, 0)][1]
+
+
+def _mapping(value, where: str) -> dict:
+    if not isinstance(value, dict):
+        raise ValueError(f"{where}: expected a mapping, got {value!r}")
+    return value
+
+
+def _price(version: dict, where: str) -> Price:
+    known = {f.name: f for f in fields(Price)}
+    for key, value in version.items():
+        if key not in known:
+            raise ValueError(f"{where}: unknown field '{key}' (known: {', '.join(known)})")
+        optional = known[key].default is None
+        numeric = isinstance(value, (int, float)) and not isinstance(value, bool)
+        if not numeric and not (optional and value is None):
+            raise ValueError(f"{where}: {key} must be a number, got {value!r}")
+    missing = [key for key, f in known.items() if f.default is MISSING and key not in version]
+    if missing:
+        raise ValueError(f"{where}: missing {', '.join(missing)}")
+    return Price(**version)
+
+
+def _day(value: str | date | datetime) -> str:
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()[:10]
+    return str(value)[:10]
+
+
+# ((mtime_ns, size) of pricing.yaml or None, table) of the last load
+_loaded: tuple[tuple[int, int] | None, PriceTable] | None = None
+
+
+def load_table() -> PriceTable:
+    """The built-in prices with ~/.agentctl/pricing.yaml applied.
+
+    Kept for as long as pricing.yaml is unchanged. A pricing.yaml that can't
+    be read or applied is reported and ignored: this runs after a provider
+    call has been billed, and its cost should still be recorded.
+    """
+    global _loaded
+    try:
+        st = PRICING_FILE.stat()
+        key = (st.st_mtime_ns, st.st_size)
+    except FileNotFoundError:
+        key = None
+    if _loaded is None or _loaded[0] != key:
+        table = PriceTable(BUILTIN_PRICES)
+        if key is not None:
+            import yaml
+
+            try:
+                with open(PRICING_FILE) as f:
+                    table.update(yaml.safe_load(f) or {})
+            except (OSError, yaml.YAMLError, ValueError) as e:
+                sys.stderr.write(f"agentctl: ignoring {PRICING_FILE}: {e}\n")
+        _loaded = (key, table)
+    return _loaded[1]
+
+
+def estimate_cost(
+    provider: str,
+    model: str,
+    input_tokens: int,
+    output_tokens: int,
+    cache_read_tokens: int = 0,
+    cache_write_tokens: int = 0,
+    batch: bool = False,
+    at: str | date | None = None,
+) -> float | None:
+    """Cost in USD of one request, or None if the model has no known price."""
+    price = load_table().lookup(provider, model, at)
+    if price is None:
+        return None
+    return price.cost(input_tokens, output_tokens, cache_read_tokens, cache_write_tokens, batch)
+
+
+def price_response(response: Response) -> Response:
+    """Set a response's cost from its usage.
+
+    A model without a known price costs 0.0 and is flagged "unpriced" in the
+    metadata, so its ledger entries can be fixed with `costs reprice` once
+    the price is added to pricing.yaml.
+    """
+    cost = estimate_cost(
+        response.provider,
+        response.model,
+        response.input_tokens,
+        response.output_tokens,
+        response.cache_read_tokens,
+        response.cache_write_tokens,
+    )
+    if cost is None:
+        response.metadata["unpriced"] = True
+    response.cost = cost or 0.0
+    return response
@@ -2,6 +2,8 @@
 
 from __future__ import annotations
 
+import importlib
+import time
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
 from typing import AsyncIterator
@@ -19,7 +21,11 @@ class Message:
 
 @dataclass
 class Response:
-    """A response from an AI provider."""
+    """A response from an AI provider.
+
+    `input_tokens` counts input billed at the full rate; input read from or
+    written to the provider's prompt cache is counted separately.
+    """
 
     content: str
     model: str
@@ -29,6 +35,52 @@ class Response:
     cost: float = 0.0
     latency_ms: float = 0.0
     metadata: dict = field(default_factory=dict)
+    cache_read_tokens: int = 0
+    cache_write_tokens: int = 0
+
+
+class ResponseStream:
+    """The text chunks of a streamed reply; `response` is set once they are exhausted.
+
+    The final response has the provider's usage and cost when it reports
+    them, the joined content, the total latency, and in its metadata the time
+    to first token (`ttft_ms`) and mean inter-token latency (`itl_ms`).
+    """
+
+    def __init__(self, events: AsyncIterator[str | Response], provider: str, model: str):
+        self._events = events
+        self.provider = provider
+        self.model = model
+        self.ttft_ms: float | None = None
+        self.response: Response | None = None
+
+    def __aiter__(self) -> AsyncIterator[str]:
+        return self._iterate()
+
+    async def _iterate(self) -> AsyncIterator[str]:
+        start = time.monotonic()
+        chunks: list[str] = []
+        final: Response | None = None
+        last = gaps = 0.0
+        async for event in self._events:
+            if isinstance(event, Response):
+                final = event
+                continue
+            now = time.monotonic()
+            if self.ttft_ms is None:
+                self.ttft_ms = (now - start) * 1000
+            else:
+                gaps += now - last
+            last = now
+            chunks.append(event)
+            yield event
+
+        response = final or Response(content="", model=self.model, provider=self.provider)
+        response.content = "".join(chunks)
+        response.latency_ms = (time.monotonic() - start) * 1000
+        response.metadata["ttft_ms"] = self.ttft_ms
+        response.metadata["itl_ms"] = gaps * 1000 / (len(chunks) - 1) if len(chunks) > 1 else None
+        self.response = response
 
 
 class BaseProvider(ABC):
@@ -42,19 +94,54 @@ class BaseProvider(ABC):
         ...
 
     @abstractmethod
-    async def stream(self, messages: list[Message], **kwargs) -> AsyncIterator[str]:
-        """Stream response chunks."""
+    async def stream(self, messages: list[Message], **kwargs) -> AsyncIterator[str | Response]:
+        """Stream response chunks.
+
+        Yields text chunks, optionally followed by one `Response` carrying the
+        usage and cost of the whole reply. Use `stream_response()` to get the
+        text alone and the final response separately.
+        """
         ...
 
+    def stream_response(self, messages: list[Message], **kwargs) -> ResponseStream:
+        """Stream a reply as text chunks, collecting its final `Response`."""
+        return ResponseStream(self.stream(messages, **kwargs), self.name, kwargs.get("model", ""))
+
     @abstractmethod
-    def list_models(self) -> list[str]:
+    async def list_models(self) -> list[str]:
         """List available models for this provider."""
         ...
 
+    @property
+    def unwrapped(self) -> BaseProvider:
+        """The provider itself, beneath any wrappers (response cache, scheduler).
+
+        For provider-specific operations beyond this interface, such as
+        Ollama's model management.
+        """
+        return self
+
+    async def aclose(self) -> None:
+        """Release network resources held by this provider."""
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
 
 # Registry of available providers
 _providers: dict[str, type[BaseProvider]] = {}
 
+# Built-in providers, imported on first use by get_provider()
+_provider_modules: dict[str, str] = {
+    "anthropic": "agentctl.providers.anthropic_provider",
+    "openai": "agentctl.providers.openai_provider",
+    "ollama": "agentctl.providers.ollama",
+    "mock": "agentctl.providers.mock",
+}
+
 
 def register_provider(cls: type[BaseProvider]) -> type[BaseProvider]:
     """Register a provider class."""
@@ -63,13 +150,15 @@ def register_provider(cls: type[BaseProvider]) -> type[BaseProvider]:
 
 
 def get_provider(name: str) -> type[BaseProvider]:
-    """Get a registered provider by name."""
+    """Get a registered provider by name, importing its module if needed."""
+    if name not in _providers and name in _provider_modules:
+        importlib.import_module(_provider_modules[name])
     if name not in _providers:
-        available = ", ".join(_providers.keys()) or "none"
+        available = ", ".join(list_providers()) or "none"
         raise ValueError(f"Unknown provider '{name}'. Available: {available}")
     return _providers[name]
 
 
 def list_providers() -> list[str]:
-    """List registered provider names."""
-    return list(_providers.keys())
+    """List registered provider names, including built-ins not yet imported."""
+    return list(dict.fromkeys([*_provider_modules, *_providers]))
@@ -5,24 +5,98 @@ from __future__ import annotations
 import time
 from typing import AsyncIterator
 
-import httpx
-
+from agentctl.pricing import price_response
 from agentctl.providers import BaseProvider, Message, Response, register_provider
-
-# Pricing per 1M tokens (as of Feb 2026)
-PRICING = {
-    "claude-sonnet": {"input": 3.0, "output": 15.0},
-    "claude-haiku": {"input": 0.25, "output": 1.25},
-    "claude-opus": {"input": 15.0, "output": 75.0},
+from agentctl.providers.pool import PoolLimits, pool
+from agentctl.providers.streaming import iter_sse
+
+# Shortest prefix, in tokens, the API will cache; shorter ones are left
+# unmarked. Keyed by model ID prefix, the longest matching one applies (as in
+# the price table); other models (Sonnet, Opus up to 4.1) take the default.
+MIN_CACHEABLE_TOKENS = {
+    "claude-3-haiku": 2048,
+    "claude-3-5-haiku": 2048,
+    "claude-haiku": 2048,
+    "claude-haiku-4-5": 4096,
+    "claude-opus-4-5": 4096,
 }
-
-
-def _estimate_cost(model: str, input_tokens: int, output_tokens: int) -> float:
-    """Estimate cost based on token usage."""
-    for key, prices in PRICING.items():
-        if key in model:
-            return (input_tokens * prices["input"] + output_tokens * prices["output"]) / 1_000_000
-    return 0.0
+DEFAULT_MIN_CACHEABLE_TOKENS = 1024
+
+_EPHEMERAL = {"type": "ephemeral"}
+
+
+def _text(content: str, cache: bool) -> str | list[dict]:
+    if not cache:
+        return content
+    return [{"type": "text", "text": content, "cache_control": _EPHEMERAL}]
+
+
+def _min_cacheable_tokens(model: str) -> int:
+    """The shortest prompt prefix, in tokens, `model` caches."""
+    prefix = max((p for p in MIN_CACHEABLE_TOKENS if model.startswith(p)), key=len, default=None)
+    return DEFAULT_MIN_CACHEABLE_TOKENS if prefix is None else MIN_CACHEABLE_TOKENS[prefix]
+
+
+def _prompt(
+    messages: list[Message], model: str, prompt_caching: bool
+) -> tuple[str | list[dict] | None, list[dict]]:
+    """The system prompt and chat messages of a request.
+
+    With prompt caching, cache breakpoints go on the system prompt, on the
+    last message (caching the whole prompt for the next turn) and on the
+    user message before it (reading what the previous turn cached), each
+    only once the prefix up to it is long enough to be cached.
+    """
+    system = None
+    chat = []
+    for m in messages:
+        if m.role == "system":
+            system = m.content
+        else:
+            chat.append({"role": m.role, "content": m.content})
+    if not prompt_caching:
+        return system, chat
+
+    minimum = _min_cacheable_tokens(model)
+    # ~4 characters per token
+    prefix = len(system) // 4 if system else 0
+    if system and prefix >= minimum:
+        system = _text(system, True)
+    previous_user = max((i for i, m in enumerate(chat[:-1]) if m["role"] == "user"), default=None)
+    for i, message in enumerate(chat):
+        prefix += len(message["content"]) // 4
+        if i in (previous_user, len(chat) - 1) and prefix >= minimum:
+            message["content"] = _text(message["content"], True)
+    return system, chat
+
+
+def _usage_response(model: str, usage: dict, **fields) -> Response:
+    """A Response with the token counts and cost of an API `usage` object.
+
+    `input_tokens` excludes tokens read from or written to the prompt cache,
+    which the API reports separately.
+    """
+    response = Response(
+        model=model,
+        provider="anthropic",
+        input_tokens=usage.get("input_tokens", 0),
+        output_tokens=usage.get("output_tokens", 0),
+        cache_read_tokens=usage.get("cache_read_input_tokens") or 0,
+        cache_write_tokens=usage.get("cache_creation_input_tokens") or 0,
+        **fields,
+    )
+    return price_response(response)
+
+
+# Stream events that carry neither text nor usage
+_NO_CONTENT_EVENTS = frozenset(
+    {
+        "ping",
+        "content_block_start",
+        "content_block_stop",
+        "message_stop",
+    }
+)
 
 
 @register_provider
@@ -31,31 +105,36 @@ class AnthropicProvider(BaseProvider):
 
     name = "anthropic"
 
-    def __init__(self, api_key: str | None = None, **kwargs):
+    def __init__(
+        self,
+        api_key: str | None = None,
+        endpoint: str | None = None,
+        limits: PoolLimits | None = None,
+        prompt_caching: bool = True,
+        **kwargs,
+    ):
         self.api_key = api_key
-        self.client = httpx.AsyncClient(
-            base_url="https://api.anthropic.com",
+        self.prompt_caching = prompt_caching
+        self.client = pool.acquire(
+            endpoint or "https://api.anthropic.com",
             headers={
                 "x-api-key": api_key or "",
                 "anthropic-version": "2023-06-01",
                 "content-type": "application/json",
             },
             timeout=120.0,
+            limits=limits,
         )
 
+    async def aclose(self) -> None:
+        await pool.release(self.client)
+
     async def complete(self, messages: list[Message], **kwargs) -> Response:
         model = kwargs.get("model", "claude-sonnet-4-20250514")
         max_tokens = kwargs.get("max_tokens", 4096)
         temperature = kwargs.get("temperature", 0.7)
 
-        # Extract system message if present
-        system = None
-        chat_messages = []
-        for m in messages:
-            if m.role == "system":
-                system = m.content
-            else:
-                chat_messages.append({"role": m.role, "content": m.content})
+        system, chat_messages = _prompt(messages, model, self.prompt_caching)
 
         payload = {
             "model": model,
@@ -72,53 +151,46 @@ class AnthropicProvider(BaseProvider):
         data = resp.json()
         latency = (time.monotonic() - start) * 1000
 
-        input_tokens = data.get("usage", {}).get("input_tokens", 0)
-        output_tokens = data.get("usage", {}).get("output_tokens", 0)
-
-        return Response(
-            content=data["content"][0]["text"],
-            model=model,
-            provider="anthropic",
-            input_tokens=input_tokens,
-            output_tokens=output_tokens,
-            cost=_estimate_cost(model, input_tokens, output_tokens),
-            latency_ms=latency,
+        return _usage_response(
+            model, data.get("usage", {}), content=data["content"][0]["text"], latency_ms=latency
         )
 
-    async def stream(self, messages: list[Message], **kwargs) -> AsyncIterator[str]:
+    async def stream(self, messages: list[Message], **kwargs) -> AsyncIterator[str | Response]:
         model = kwargs.get("model", "claude-sonnet-4-20250514")
         max_tokens = kwargs.get("max_tokens", 4096)
+        temperature = kwargs.get("temperature", 0.7)
 
-        system = None
-        chat_messages = []
-        for m in messages:
-            if m.role == "system":
-                system = m.content
-            else:
-                chat_messages.append({"role": m.role, "content": m.content})
+        system, chat_messages = _prompt(messages, model, self.prompt_caching)
 
         payload = {
             "model": model,
             "max_tokens": max_tokens,
+            "temperature": temperature,
             "messages": chat_messages,
             "stream": True,
         }
         if system:
             payload["system"] = system
 
+        usage: dict = {}
         async with self.client.stream("POST", "/v1/messages", json=payload) as resp:
             resp.raise_for_status()
-            async for line in resp.aiter_lines():
-                if line.startswith("data: "):
-                    import json
-
-                    event = json.loads(line[6:])
-                    if event.get("type") == "content_block_delta":
-                        delta = event.get("delta", {})
-                        if "text" in delta:
-                            yield delta["text"]
-
-    def list_models(self) -> list[str]:
+            async for _, event in iter_sse(resp.aiter_bytes(), skip=_NO_CONTENT_EVENTS):
+                kind = event.get("type")
+                if kind == "content_block_delta":
+                    delta = event.get("delta", {})
+                    if "text" in delta:
+                        yield delta["text"]
+                elif kind == "message_start":
+                    # Input and prompt cache counts; output so far
+                    usage.update(event.get("message", {}).get("usage", {}))
+                elif kind == "message_delta":
+                    # Cumulative output count for the whole message
+                    usage.update(event.get("usage", {}))
+
+        yield _usage_response(model, usage, content="")
+
+    async def list_models(self) -> list[str]:
         return [
             "claude-sonnet-4-20250514",
             "claude-haiku-3-5-20241022",
@@ -0,0 +1,170 @@
+"""Mock provider — canned replies at a configurable pace, without a network.
+
+For benchmarking agentctl's own overhead and for trying commands offline:
+
+    providers:
+      mock:
+        default_model: mock
+        extra:
+          fixture: tests/fixtures/streams/openai.sse   # replay a recorded stream
+          ttft_ms: 300          # delay before the first token
+          token_rate: 80        # tokens per second after it; unset: no delay
+          error_rate: 0.1       # share of requests failing with error_status
+          error_status: 503
+
+A fixture is a recorded Anthropic or OpenAI SSE stream or an Ollama NDJSON
+stream; its text deltas are replayed one chunk per token, and its reported
+usage is used when it has any. Without one, a built-in reply is streamed
+word by word. Injected errors are raised as `httpx.HTTPStatusError`, so the
+scheduler retries them as it would a real provider's.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import random
+import time
+from pathlib import Path
+from typing import AsyncIterator
+
+import httpx
+
+from agentctl.pricing import price_response
+from agentctl.providers import BaseProvider, Message, Response, register_provider
+from agentctl.providers.streaming import SSEDecoder
+
+DEFAULT_REPLY = (
+    "This is a reply from the mock provider. It streams one word at a time, "
+    "at the pace set by ttft_ms and token_rate, so that agentctl's own "
+    "overhead can be measured apart from a real provider's latency."
+)
+
+
+def load_fixture(path: str | Path) -> tuple[list[str], dict]:
+    """The text chunks and usage of a recorded stream.
+
+    Usage is returned as {"input_tokens", "output_tokens"} when the stream
+    reports it, else empty.
+    """
+    data = Path(path).read_bytes()
+    if _is_ndjson(path, data):
+        events = [json.loads(line) for line in data.splitlines() if line.strip()]
+    else:
+        decoder = SSEDecoder()
+        blocks = decoder.feed(data) + decoder.flush()
+        events = [json.loads(body) for _, body in blocks if body != b"[DONE]"]
+
+    chunks: list[str] = []
+    usage: dict = {}
+    for event in events:
+        # Anthropic
+        if event.get("type") == "content_block_delta":
+            chunks.append(event["delta"].get("text", ""))
+        elif event.get("type") == "message_start":
+            usage["input_tokens"] = event["message"].get("usage", {}).get("input_tokens", 0)
+        elif event.get("type") == "message_delta":
+            usage["output_tokens"] = event.get("usage", {}).get("output_tokens", 0)
+        # OpenAI
+        elif "choices" in event:
+            if event["choices"]:
+                chunks.append(event["choices"][0].get("delta", {}).get("content") or "")
+            if event.get("usage"):
+                usage["input_tokens"] = event["usage"].get("prompt_tokens", 0)
+                usage["output_tokens"] = event["usage"].get("completion_tokens", 0)
+        # Ollama
+        elif "message" in event:
+            chunks.append(event["message"].get("content", ""))
+            if event.get("done"):
+                usage["input_tokens"] = event.get("prompt_eval_count", 0)
+                usage["output_tokens"] = event.get("eval_count", 0)
+    return [chunk for chunk in chunks if chunk], usage
+
+
+def _is_ndjson(path: str | Path, data: bytes) -> bool:
+    return str(path).endswith((".ndjson", ".jsonl")) or data.lstrip().startswith(b"{")
+
+
+@register_provider
+class MockProvider(BaseProvider):
+    """Replays a canned or recorded reply; see the module docstring for options."""
+
+    name = "mock"
+
+    def __init__(
+        self,
+        fixture: str | None = None,
+        reply: str | None = None,
+        ttft_ms: float = 0.0,
+        token_rate: float | None = None,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        seed: int | None = None,
+        **kwargs,
+    ):
+        if fixture:
+            self.chunks, self.usage = load_fixture(fixture)
+        else:
+            words = (reply or DEFAULT_REPLY).split(" ")
+            self.chunks = [word + " " for word in words[:-1]] + words[-1:]
+            self.usage = {}
+        self.ttft_ms = ttft_ms
+        self.token_rate = token_rate
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self._random = random.Random(seed)
+        self.requests = 0
+
+    def _maybe_fail(self, model: str) -> None:
+        self.requests += 1
+        if self.error_rate and self._random.random() < self.error_rate:
+            request = httpx.Request("POST", f"mock://{model}")
+            response = httpx.Response(self.error_status, request=request)
+            raise httpx.HTTPStatusError(
+                f"Injected error {self.error_status}", request=request, response=response
+            )
+
+    def _response(self, model: str, messages: list[Message], content: str, latency: float):
+        input_tokens = self.usage.get("input_tokens")
+        if input_tokens is None:
+            input_tokens = max(1, sum(len(m.content) for m in messages) // 4)
+        response = Response(
+            content=content,
+            model=model,
+            provider=self.name,
+            input_tokens=input_tokens,
+            output_tokens=self.usage.get("output_tokens") or len(self.chunks),
+            latency_ms=latency,
+        )
+        return price_response(response)
+
+    async def complete(self, messages: list[Message], **kwargs) -> Response:
+        model = kwargs.get("model") or "mock"
+        start = time.monotonic()
+        self._maybe_fail(model)
+        delay = self.ttft_ms / 1000
+        if self.token_rate:
+            delay += (len(self.chunks) - 1) / self.token_rate
+        if delay > 0:
+            await asyncio.sleep(delay)
+        latency = (time.monotonic() - start) * 1000
+        return self._response(model, messages, "".join(self.chunks), latency)
+
+    async def stream(self, messages: list[Message], **kwargs) -> AsyncIterator[str | Response]:
+        model = kwargs.get("model") or "mock"
+        start = time.monotonic()
+        self._maybe_fail(model)
+        if self.ttft_ms:
+            await asyncio.sleep(self.ttft_ms / 1000)
+        interval = 1 / self.token_rate if self.token_rate else 0.0
+        for i, chunk in enumerate(self.chunks):
+            if i and interval:
+                # Pace against the clock so sleep overshoot doesn't add up
+                wait = start + self.ttft_ms / 1000 + i * interval - time.monotonic()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+            yield chunk
+        yield self._response(model, messages, "", (time.monotonic() - start) * 1000)
+
+    async def list_models(self) -> list[str]:
+        return ["mock"]
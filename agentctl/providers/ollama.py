@@ -1,13 +1,34 @@
-"""Ollama provider — local model inference."""
+"""Ollama provider — local model inference.
+
+Loading a model into memory takes seconds, and Ollama unloads idle models
+after five minutes. `keep_alive` sets how long a model stays loaded after a
+request: a duration such as "30m", seconds, -1 for ever or 0 to unload at
+once. It can be set per provider in config.yaml (`extra: keep_alive: 30m`),
+per session or per `run`. `warm()` loads a model ahead of the first request.
+"""
 
 from __future__ import annotations
 
 import time
 from typing import AsyncIterator
 
-import httpx
-
+from agentctl.pricing import price_response
 from agentctl.providers import BaseProvider, Message, Response, register_provider
+from agentctl.providers.pool import PoolLimits, pool
+from agentctl.providers.streaming import iter_ndjson
+
+# Seconds a model list fetched from a server is reused
+MODELS_TTL = 30.0
+
+# endpoint -> (fetched at, model names)
+_models_cache: dict[str, tuple[float, list[str]]] = {}
+
+
+def _keep_alive(value: str | int | float) -> str | int | float:
+    """Ollama takes durations as strings with a unit and plain numbers as seconds."""
+    if isinstance(value, str) and value.lstrip("-").isdigit():
+        return int(value)
+    return value
 
 
 @register_provider
@@ -16,20 +37,40 @@ class OllamaProvider(BaseProvider):
 
     name = "ollama"
 
-    def __init__(self, endpoint: str = "http://localhost:11434", **kwargs):
+    def __init__(
+        self,
+        endpoint: str = "http://localhost:11434",
+        limits: PoolLimits | None = None,
+        keep_alive: str | int | None = None,
+        **kwargs,
+    ):
         self.endpoint = endpoint.rstrip("/")
-        self.client = httpx.AsyncClient(base_url=self.endpoint, timeout=300.0)
+        self.limits = limits
+        self.keep_alive = keep_alive
+        self.client = pool.acquire(self.endpoint, timeout=300.0, limits=limits)
+
+    def _payload(self, model: str, keep_alive: str | int | None = None, **fields) -> dict:
+        """A request body, with this provider's keep_alive unless one is given."""
+        payload = {"model": model, **fields}
+        keep_alive = self.keep_alive if keep_alive is None else keep_alive
+        if keep_alive is not None:
+            payload["keep_alive"] = _keep_alive(keep_alive)
+        return payload
+
+    async def aclose(self) -> None:
+        await pool.release(self.client)
 
     async def complete(self, messages: list[Message], **kwargs) -> Response:
         model = kwargs.get("model", "llama3.1:8b")
         temperature = kwargs.get("temperature", 0.7)
 
-        payload = {
-            "model": model,
-            "messages": [{"role": m.role, "content": m.content} for m in messages],
-            "stream": False,
-            "options": {"temperature": temperature},
-        }
+        payload = self._payload(
+            model,
+            messages=[{"role": m.role, "content": m.content} for m in messages],
+            stream=False,
+            options={"temperature": temperature},
+            keep_alive=kwargs.get("keep_alive"),
+        )
 
         start = time.monotonic()
         resp = await self.client.post("/api/chat", json=payload)
@@ -37,40 +78,77 @@ class OllamaProvider(BaseProvider):
         data = resp.json()
         latency = (time.monotonic() - start) * 1000
 
-        return Response(
+        response = Response(
             content=data["message"]["content"],
             model=model,
             provider="ollama",
             input_tokens=data.get("prompt_eval_count", 0),
             output_tokens=data.get("eval_count", 0),
-            cost=0.0,  # Local models are free
             latency_ms=latency,
         )
+        return price_response(response)  # free unless priced in pricing.yaml
 
-    async def stream(self, messages: list[Message], **kwargs) -> AsyncIterator[str]:
+    async def stream(self, messages: list[Message], **kwargs) -> AsyncIterator[str | Response]:
         model = kwargs.get("model", "llama3.1:8b")
         temperature = kwargs.get("temperature", 0.7)
 
-        payload = {
-            "model": model,
-            "messages": [{"role": m.role, "content": m.content} for m in messages],
-            "stream": True,
-            "options": {"temperature": temperature},
-        }
+        payload = self._payload(
+            model,
+            messages=[{"role": m.role, "content": m.content} for m in messages],
+            stream=True,
+            options={"temperature": temperature},
+            keep_alive=kwargs.get("keep_alive"),
+        )
 
         async with self.client.stream("POST", "/api/chat", json=payload) as resp:
             resp.raise_for_status()
-            async for line in resp.aiter_lines():
-                import json
-
-                chunk = json.loads(line)
-                if "message" in chunk and "content" in chunk["message"]:
+            async for chunk in iter_ndjson(resp.aiter_bytes()):
+                if "message" in chunk and chunk["message"].get("content"):
                     yield chunk["message"]["content"]
+                if chunk.get("done"):
+                    # The last chunk carries the token counts
+                    response = Response(
+                        content="",
+                        model=model,
+                        provider="ollama",
+                        input_tokens=chunk.get("prompt_eval_count", 0),
+                        output_tokens=chunk.get("eval_count", 0),
+                    )
+                    yield price_response(response)
+
+    async def list_models(self) -> list[str]:
+        """List models available in Ollama, reusing a list fetched in the last MODELS_TTL s."""
+        cached = _models_cache.get(self.endpoint)
+        if cached and time.monotonic() - cached[0] < MODELS_TTL:
+            return cached[1]
+        resp = await self.client.get("/api/tags")
+        resp.raise_for_status()
+        names = [m["name"] for m in resp.json().get("models", [])]
+        _models_cache[self.endpoint] = (time.monotonic(), names)
+        return names
+
+    async def pull(self, model: str) -> AsyncIterator[dict]:
+        """Download a model, yielding Ollama's progress updates.
 
-    def list_models(self) -> list[str]:
-        """List models available in Ollama (sync for simplicity)."""
-        with httpx.Client(base_url=self.endpoint) as client:
-            resp = client.get("/api/tags")
+        Each update has a "status", and while a layer downloads its "digest",
+        "total" and "completed" bytes.
+        """
+        async with self.client.stream("POST", "/api/pull", json={"model": model}) as resp:
             resp.raise_for_status()
-            data = resp.json()
-            return [m["name"] for m in data.get("models", [])]
+            async for update in iter_ndjson(resp.aiter_bytes()):
+                if "error" in update:
+                    raise RuntimeError(f"Pulling {model}: {update['error']}")
+                yield update
+        _models_cache.pop(self.endpoint, None)
+
+    async def warm(self, model: str, keep_alive: str | int | None = None) -> float:
+        """Load a model into memory with an empty generation; returns the seconds it took."""
+        start = time.monotonic()
+        resp = await self.client.post("/api/generate", json=self._payload(model, keep_alive))
+        resp.raise_for_status()
+        return time.monotonic() - start
+
+    async def unload(self, model: str) -> None:
+        """Unload a model from memory now rather than when its keep_alive runs out."""
+        resp = await self.client.post("/api/generate", json=self._payload(model, keep_alive=0))
+        resp.raise_for_status()
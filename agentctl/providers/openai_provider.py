@@ -2,26 +2,50 @@
 
 from __future__ import annotations
 
+import hashlib
 import time
 from typing import AsyncIterator
 
-import httpx
-
+from agentctl.pricing import price_response
 from agentctl.providers import BaseProvider, Message, Response, register_provider
-
-PRICING = {
-    "gpt-4o": {"input": 2.50, "output": 10.0},
-    "gpt-4o-mini": {"input": 0.15, "output": 0.60},
-    "gpt-4-turbo": {"input": 10.0, "output": 30.0},
-    "o1": {"input": 15.0, "output": 60.0},
-}
-
-
-def _estimate_cost(model: str, input_tokens: int, output_tokens: int) -> float:
-    for key, prices in PRICING.items():
-        if key in model:
-            return (input_tokens * prices["input"] + output_tokens * prices["output"]) / 1_000_000
-    return 0.0
+from agentctl.providers.pool import PoolLimits, pool
+from agentctl.providers.streaming import iter_sse
+
+# OpenAI caches prompts of at least this many tokens on its own; requests
+# sharing a prefix are routed to the same cache when they share a key
+MIN_CACHEABLE_TOKENS = 1024
+
+
+def _cache_key(model: str, messages: list[Message]) -> str | None:
+    """A `prompt_cache_key` naming the stable prefix of a long prompt.
+
+    The key covers the model and the first message (normally the system
+    prompt), so turns of one conversation and runs sharing a system prompt
+    land on the same cache. None for prompts too short to be cached.
+    """
+    if not messages or sum(len(m.content) for m in messages) // 4 < MIN_CACHEABLE_TOKENS:
+        return None
+    first = messages[0]
+    return hashlib.sha256(f"{model}\0{first.role}\0{first.content}".encode()).hexdigest()[:32]
+
+
+def _usage_response(model: str, usage: dict, **fields) -> Response:
+    """A Response with the token counts and cost of an API `usage` object.
+
+    OpenAI includes cached tokens in `prompt_tokens`; they are moved to
+    `cache_read_tokens` so `input_tokens` is the full-price part.
+    """
+    details = usage.get("prompt_tokens_details") or {}
+    cache_read = details.get("cached_tokens") or 0
+    response = Response(
+        model=model,
+        provider="openai",
+        input_tokens=usage.get("prompt_tokens", 0) - cache_read,
+        output_tokens=usage.get("completion_tokens", 0),
+        cache_read_tokens=cache_read,
+        **fields,
+    )
+    return price_response(response)
 
 
 @register_provider
@@ -30,17 +54,29 @@ class OpenAIProvider(BaseProvider):
 
     name = "openai"
 
-    def __init__(self, api_key: str | None = None, **kwargs):
+    def __init__(
+        self,
+        api_key: str | None = None,
+        endpoint: str | None = None,
+        limits: PoolLimits | None = None,
+        prompt_caching: bool = True,
+        **kwargs,
+    ):
         self.api_key = api_key
-        self.client = httpx.AsyncClient(
-            base_url="https://api.openai.com",
+        self.prompt_caching = prompt_caching
+        self.client = pool.acquire(
+            endpoint or "https://api.openai.com",
             headers={
                 "Authorization": f"Bearer {api_key or ''}",
                 "Content-Type": "application/json",
             },
             timeout=120.0,
+            limits=limits,
         )
 
+    async def aclose(self) -> None:
+        await pool.release(self.client)
+
     async def complete(self, messages: list[Message], **kwargs) -> Response:
         model = kwargs.get("model", "gpt-4o")
         max_tokens = kwargs.get("max_tokens", 4096)
@@ -52,6 +88,7 @@ class OpenAIProvider(BaseProvider):
             "max_tokens": max_tokens,
             "temperature": temperature,
         }
+        self._add_cache_key(payload, model, messages)
 
         start = time.monotonic()
         resp = await self.client.post("/v1/chat/completions", json=payload)
@@ -59,41 +96,47 @@ class OpenAIProvider(BaseProvider):
         data = resp.json()
         latency = (time.monotonic() - start) * 1000
 
-        usage = data.get("usage", {})
-        input_tokens = usage.get("prompt_tokens", 0)
-        output_tokens = usage.get("completion_tokens", 0)
-
-        return Response(
+        return _usage_response(
+            model,
+            data.get("usage", {}),
             content=data["choices"][0]["message"]["content"],
-            model=model,
-            provider="openai",
-            input_tokens=input_tokens,
-            output_tokens=output_tokens,
-            cost=_estimate_cost(model, input_tokens, output_tokens),
             latency_ms=latency,
         )
 
-    async def stream(self, messages: list[Message], **kwargs) -> AsyncIterator[str]:
+    async def stream(self, messages: list[Message], **kwargs) -> AsyncIterator[str | Response]:
         model = kwargs.get("model", "gpt-4o")
         max_tokens = kwargs.get("max_tokens", 4096)
+        temperature = kwargs.get("temperature", 0.7)
 
         payload = {
             "model": model,
             "messages": [{"role": m.role, "content": m.content} for m in messages],
             "max_tokens": max_tokens,
+            "temperature": temperature,
             "stream": True,
+            # Adds a final chunk with empty choices and the usage of the request
+            "stream_options": {"include_usage": True},
         }
+        self._add_cache_key(payload, model, messages)
 
+        usage = {}
         async with self.client.stream("POST", "/v1/chat/completions", json=payload) as resp:
             resp.raise_for_status()
-            async for line in resp.aiter_lines():
-                if line.startswith("data: ") and line.strip() != "data: [DONE]":
-                    import json
-
-                    chunk = json.loads(line[6:])
-                    delta = chunk["choices"][0].get("delta", {})
-                    if "content" in delta:
-                        yield delta["content"]
-
-    def list_models(self) -> list[str]:
+            async for _, chunk in iter_sse(resp.aiter_bytes()):
+                if chunk.get("usage"):
+                    usage = chunk["usage"]
+                if not chunk.get("choices"):
+                    continue
+                delta = chunk["choices"][0].get("delta", {})
+                if delta.get("content"):
+                    yield delta["content"]
+
+        yield _usage_response(model, usage, content="")
+
+    def _add_cache_key(self, payload: dict, model: str, messages: list[Message]) -> None:
+        key = _cache_key(model, messages) if self.prompt_caching else None
+        if key:
+            payload["prompt_cache_key"] = key
+
+    async def list_models(self) -> list[str]:
         return ["gpt-4o", "gpt-4o-mini", "gpt-4-turbo", "o1", "o1-mini"]
@@ -0,0 +1,116 @@
+"""Shared HTTP connection pools for providers.
+
+Providers used to build a private `httpx.AsyncClient` each and never close it,
+paying a TCP+TLS handshake per provider instance and leaking connections. The
+pool hands out one client per (base URL, credentials, settings) and keeps it
+alive across provider instances until the last user releases it.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import importlib.util
+from dataclasses import dataclass
+
+import httpx
+
+from agentctl import tracing
+
+
+@dataclass(frozen=True)
+class PoolLimits:
+    """Connection pool settings for one shared client."""
+
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 30.0
+    http2: bool = False
+
+
+def _http2_available() -> bool:
+    return importlib.util.find_spec("h2") is not None
+
+
+def _pool_key(base_url: str, headers: dict[str, str], timeout: float, limits: PoolLimits) -> tuple:
+    # Credentials are part of the key so two API keys never share a client;
+    # hash them so the key itself doesn't hold the secret in plain text.
+    digest = hashlib.sha256(repr(sorted(headers.items())).encode()).hexdigest()
+    return (base_url.rstrip("/"), digest, timeout, limits)
+
+
+async def _trace_request(request: httpx.Request) -> None:
+    # Connection phases (connect, TLS, first and last byte) as events of the
+    # current span; only when tracing, as httpx then reports every step
+    if tracing.enabled():
+        request.extensions["trace"] = tracing.http_trace
+
+
+class ClientPool:
+    """Hands out shared, reference-counted httpx clients."""
+
+    def __init__(self, keep_idle: bool = False):
+        # A long-lived process (agentctl daemon) keeps unused clients and their
+        # open connections for the next command instead of closing them
+        self.keep_idle = keep_idle
+        self._clients: dict[tuple, httpx.AsyncClient] = {}
+        self._refs: dict[tuple, int] = {}
+
+    def acquire(
+        self,
+        base_url: str,
+        headers: dict[str, str] | None = None,
+        timeout: float = 120.0,
+        limits: PoolLimits | None = None,
+    ) -> httpx.AsyncClient:
+        """Get the shared async client for these settings, creating it if needed.
+
+        Every acquire() must be paired with a release().
+        """
+        headers = headers or {}
+        limits = limits or PoolLimits()
+        key = _pool_key(base_url, headers, timeout, limits)
+
+        client = self._clients.get(key)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                base_url=base_url,
+                headers=headers,
+                timeout=timeout,
+                limits=httpx.Limits(
+                    max_connections=limits.max_connections,
+                    max_keepalive_connections=limits.max_keepalive_connections,
+                    keepalive_expiry=limits.keepalive_expiry,
+                ),
+                # HTTP/2 needs the optional `h2` package (pip install agentctl[http2])
+                http2=limits.http2 and _http2_available(),
+                event_hooks={"request": [_trace_request]},
+            )
+            self._clients[key] = client
+            self._refs[key] = 0
+
+        self._refs[key] += 1
+        return client
+
+    async def release(self, client: httpx.AsyncClient) -> None:
+        """Drop one reference to a client, closing it when nobody uses it anymore."""
+        for key, c in list(self._clients.items()):
+            if c is client:
+                self._refs[key] -= 1
+                if self._refs[key] <= 0 and not self.keep_idle:
+                    del self._clients[key], self._refs[key]
+                    await client.aclose()
+                return
+
+    async def close_all(self) -> None:
+        """Close every client in the pool."""
+        clients, self._clients, self._refs = list(self._clients.values()), {}, {}
+        for client in clients:
+            await client.aclose()
+
+    def stats(self) -> dict[str, int]:
+        """Number of live clients and references, for debugging and tests."""
+        return {"clients": len(self._clients), "references": sum(self._refs.values())}
+
+
+# Process-wide pool shared by all providers
+pool = ClientPool()
@@ -0,0 +1,443 @@
+"""Rate limiting and retry scheduling for provider calls.
+
+`ScheduledProvider` wraps any provider and sits between the commands and
+`complete()`/`stream()`. Per (provider, model) it applies token-bucket limits
+on requests and tokens per minute, retries 429/5xx and transport errors with
+jittered exponential backoff (honouring `Retry-After` and the providers'
+rate-limit reset headers), and adapts its concurrency: halved whenever the
+server throttles, grown back by one slot per window of successful calls.
+Every call it makes is recorded in the metrics store (see agentctl.metrics).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import inspect
+import random
+import re
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import AsyncIterator
+
+import httpx
+
+from agentctl import metrics, tracing
+from agentctl.providers import BaseProvider, Message, Response
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504, 529}
+THROTTLE_STATUS = {429, 529}
+
+# Headers that say when a rate-limit window resets
+_RESET_HEADERS = (
+    "anthropic-ratelimit-requests-reset",
+    "anthropic-ratelimit-tokens-reset",
+    "x-ratelimit-reset-requests",
+    "x-ratelimit-reset-tokens",
+)
+_DURATION = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+@dataclass
+class RateLimitPolicy:
+    """Limits and retry behaviour for one provider/model pair."""
+
+    requests_per_minute: float | None = None
+    tokens_per_minute: float | None = None
+    max_concurrency: int = 16
+    max_retries: int = 5
+    backoff_base: float = 0.5
+    backoff_max: float = 60.0
+
+
+class TokenBucket:
+    """A token bucket refilled continuously at `per_minute` tokens per minute."""
+
+    def __init__(self, per_minute: float, capacity: float | None = None):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity if capacity is not None else per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount: float = 1.0) -> None:
+        """Wait until `amount` tokens are available, then take them."""
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+
+    def consume(self, amount: float) -> None:
+        """Debit tokens after the fact; the bucket may go negative."""
+        self._refill()
+        self.tokens -= amount
+
+    def drain(self) -> None:
+        """Empty the bucket, e.g. after the server reports the window exhausted."""
+        self._refill()
+        self.tokens = min(self.tokens, 0.0)
+
+
+class AdaptiveLimiter:
+    """Concurrency limit that backs off on throttling and recovers on success (AIMD)."""
+
+    def __init__(self, max_concurrency: int):
+        self.max = max(1, max_concurrency)
+        self.limit = self.max
+        self.in_flight = 0
+        self._successes = 0
+        self._cond = asyncio.Condition()
+
+    @asynccontextmanager
+    async def slot(self):
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.in_flight < self.limit)
+            self.in_flight += 1
+        try:
+            yield
+        finally:
+            async with self._cond:
+                self.in_flight -= 1
+                self._cond.notify_all()
+
+    def on_success(self) -> None:
+        self._successes += 1
+        if self._successes >= self.limit and self.limit < self.max:
+            self.limit += 1
+            self._successes = 0
+
+    def on_throttle(self) -> None:
+        self.limit = max(1, self.limit // 2)
+        self._successes = 0
+
+
+@dataclass
+class _Limits:
+    policy: RateLimitPolicy
+    concurrency: AdaptiveLimiter
+    requests: TokenBucket | None = None
+    tokens: TokenBucket | None = None
+    paused_until: float = 0.0
+    throttled: int = 0
+
+
+def _bucket(per_minute: float | None) -> TokenBucket | None:
+    return TokenBucket(per_minute) if per_minute else None
+
+
+class Scheduler:
+    """Process-wide registry of limits keyed by (provider, model)."""
+
+    def __init__(self):
+        self._limits: dict[tuple[str, str], _Limits] = {}
+
+    def limits(self, provider: str, model: str, policy: RateLimitPolicy) -> _Limits:
+        key = (provider, model)
+        if key not in self._limits:
+            self._limits[key] = _Limits(
+                policy=policy,
+                concurrency=AdaptiveLimiter(policy.max_concurrency),
+                requests=_bucket(policy.requests_per_minute),
+                tokens=_bucket(policy.tokens_per_minute),
+            )
+        return self._limits[key]
+
+    def reset(self) -> None:
+        self._limits.clear()
+
+
+scheduler = Scheduler()
+
+
+def _parse_delay(value: str) -> float | None:
+    """Parse a delay header value: seconds, an OpenAI-style duration such as
+    "1m30s" or "250ms", or an RFC 3339 / HTTP date for the reset time."""
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    parts = _DURATION.findall(value)
+    if parts and "".join(n + u for n, u in parts) == value:
+        return sum(float(n) * _DURATION_UNITS[u] for n, u in parts)
+
+    try:
+        reset = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        try:
+            reset = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+    if reset.tzinfo is None:
+        reset = reset.replace(tzinfo=timezone.utc)
+    return max(0.0, (reset - datetime.now(timezone.utc)).total_seconds())
+
+
+def retry_after(headers: httpx.Headers) -> float | None:
+    """How long the server asked us to wait, if it said."""
+    if "retry-after-ms" in headers:
+        try:
+            return float(headers["retry-after-ms"]) / 1000
+        except ValueError:
+            pass
+    if "retry-after" in headers:
+        delay = _parse_delay(headers["retry-after"])
+        if delay is not None:
+            return delay
+
+    delays = [_parse_delay(headers[h]) for h in _RESET_HEADERS if h in headers]
+    delays = [d for d in delays if d is not None]
+    return max(delays) if delays else None
+
+
+def backoff_delay(attempt: int, policy: RateLimitPolicy) -> float:
+    """Full-jitter exponential backoff for the given retry attempt (0-based)."""
+    return random.uniform(0, min(policy.backoff_max, policy.backoff_base * 2**attempt))
+
+
+def _estimate_tokens(messages: list[Message]) -> int:
+    # ~4 characters per token; refined with the real usage after the call
+    return max(1, sum(len(m.content) for m in messages) // 4)
+
+
+def _used_tokens(response: Response) -> int:
+    # Prompt cache reads don't count against input token limits; writes do
+    return response.input_tokens + response.cache_write_tokens + response.output_tokens
+
+
+def _payload_bytes(messages: list[Message]) -> int:
+    return sum(len(m.content.encode()) for m in messages)
+
+
+def _status(error: Exception) -> int:
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code
+    return 0  # no response: a transport error
+
+
+class ScheduledProvider(BaseProvider):
+    """Wraps a provider with rate limiting, retries and adaptive concurrency."""
+
+    def __init__(
+        self,
+        inner: BaseProvider,
+        policy: RateLimitPolicy | None = None,
+        model_policies: dict[str, RateLimitPolicy] | None = None,
+    ):
+        self.inner = inner
+        self.name = inner.name
+        self.policy = policy or RateLimitPolicy()
+        self.model_policies = model_policies or {}
+        # Holders of this instance (see ProviderConfig.create); the last
+        # aclose() closes the wrapped provider
+        self.users = 1
+
+    def _limits_for(self, model: str) -> _Limits:
+        return scheduler.limits(self.name, model, self.model_policies.get(model, self.policy))
+
+    @asynccontextmanager
+    async def _admit(self, limits: _Limits, estimated_tokens: int):
+        """Wait for a concurrency slot and for room in the rate-limit buckets."""
+        async with limits.concurrency.slot():
+            wait = limits.paused_until - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            if limits.requests:
+                await limits.requests.acquire(1)
+            if limits.tokens:
+                await limits.tokens.acquire(estimated_tokens)
+            yield
+
+    def _retry_delay(self, error: Exception, attempt: int, limits: _Limits) -> float | None:
+        """Delay before retrying after `error`, or None if it shouldn't be retried."""
+        policy = limits.policy
+        if attempt >= policy.max_retries:
+            return None
+
+        if isinstance(error, httpx.HTTPStatusError):
+            status = error.response.status_code
+            if status not in RETRYABLE_STATUS:
+                return None
+            delay = backoff_delay(attempt, policy)
+            if status in THROTTLE_STATUS:
+                limits.throttled += 1
+                limits.concurrency.on_throttle()
+                for bucket in (limits.requests, limits.tokens):
+                    if bucket:
+                        bucket.drain()
+                hinted = retry_after(error.response.headers)
+                if hinted is not None:
+                    # The server knows best; add a little jitter so waiting
+                    # callers don't all come back at the same instant.
+                    delay = hinted + random.uniform(0, policy.backoff_base)
+                limits.paused_until = max(limits.paused_until, time.monotonic() + delay)
+            return delay
+
+        if isinstance(error, httpx.TransportError):
+            return backoff_delay(attempt, policy)
+        return None
+
+    def _observe(
+        self,
+        model: str,
+        messages: list[Message],
+        started: float,
+        response: Response | None = None,
+        error: Exception | None = None,
+        retries: int = 0,
+        stream: bool = False,
+        ttft_ms: float | None = None,
+        received: int | None = None,
+    ) -> None:
+        """Record a finished call, retries and rate-limit waits included."""
+        latency = (time.monotonic() - started) * 1000
+        tokens_per_s = None
+        if response is not None and response.output_tokens:
+            # Generation time: after the first token when streamed
+            generating = latency - (ttft_ms or 0.0)
+            if generating > 0:
+                tokens_per_s = response.output_tokens * 1000 / generating
+        if received is None:
+            received = len(response.content.encode()) if response is not None else 0
+        metrics.record(
+            self.name,
+            (response.model if response is not None else None) or model or "?",
+            latency,
+            ttft_ms=ttft_ms,
+            tokens_per_s=tokens_per_s,
+            request_bytes=_payload_bytes(messages),
+            response_bytes=received,
+            status=200 if error is None else _status(error),
+            retries=retries,
+            stream=stream,
+        )
+
+    async def complete(self, messages: list[Message], **kwargs) -> Response:
+        model = kwargs.get("model", "")
+        with tracing.span("provider.complete", provider=self.name, model=model) as span:
+            response = await self._complete(messages, model, kwargs)
+            if span:
+                span.set(retries=response.metadata["retries"], tokens=response.output_tokens)
+            return response
+
+    async def _complete(self, messages: list[Message], model: str, kwargs: dict) -> Response:
+        limits = self._limits_for(model)
+        estimated = _estimate_tokens(messages)
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            try:
+                async with self._admit(limits, estimated):
+                    response = await self.inner.complete(messages, **kwargs)
+            except (httpx.HTTPStatusError, httpx.TransportError) as e:
+                delay = self._retry_delay(e, attempt, limits)
+                if delay is None:
+                    self._observe(model, messages, started, error=e, retries=attempt)
+                    raise
+                attempt += 1
+                tracing.event(f"retry {attempt}")
+                await asyncio.sleep(delay)
+                continue
+
+            limits.concurrency.on_success()
+            if limits.tokens:
+                limits.tokens.consume(_used_tokens(response) - estimated)
+            response.metadata["retries"] = attempt
+            self._observe(model, messages, started, response, retries=attempt)
+            return response
+
+    async def stream(self, messages: list[Message], **kwargs) -> AsyncIterator[str | Response]:
+        model = kwargs.get("model", "")
+        with tracing.span("provider.stream", provider=self.name, model=model):
+            async for chunk in self._stream(messages, model, kwargs):
+                yield chunk
+
+    async def _stream(
+        self, messages: list[Message], model: str, kwargs: dict
+    ) -> AsyncIterator[str | Response]:
+        limits = self._limits_for(model)
+        estimated = _estimate_tokens(messages)
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            yielded = False
+            ttft_ms = None
+            received = 0
+            final = None
+            try:
+                async with self._admit(limits, estimated):
+                    async for chunk in self.inner.stream(messages, **kwargs):
+                        yielded = True
+                        if isinstance(chunk, Response):
+                            if limits.tokens:
+                                limits.tokens.consume(_used_tokens(chunk) - estimated)
+                            chunk.metadata["retries"] = attempt
+                            final = chunk
+                            span = tracing.current()
+                            if span:
+                                span.set(retries=attempt, tokens=chunk.output_tokens)
+                        else:
+                            if ttft_ms is None:
+                                ttft_ms = (time.monotonic() - started) * 1000
+                                tracing.event("first_token")
+                            received += len(chunk.encode())
+                        yield chunk
+            except (httpx.HTTPStatusError, httpx.TransportError) as e:
+                # Once text has reached the caller a retry would duplicate it
+                delay = None if yielded else self._retry_delay(e, attempt, limits)
+                if delay is None:
+                    self._observe(
+                        model,
+                        messages,
+                        started,
+                        error=e,
+                        retries=attempt,
+                        stream=True,
+                        ttft_ms=ttft_ms,
+                        received=received,
+                    )
+                    raise
+                attempt += 1
+                tracing.event(f"retry {attempt}")
+                await asyncio.sleep(delay)
+                continue
+
+            limits.concurrency.on_success()
+            self._observe(
+                model,
+                messages,
+                started,
+                final,
+                retries=attempt,
+                stream=True,
+                ttft_ms=ttft_ms,
+                received=received,
+            )
+            return
+
+    async def list_models(self) -> list[str]:
+        models = self.inner.list_models()
+        # Plugins written before list_models() became async return a list
+        return await models if inspect.isawaitable(models) else models
+
+    @property
+    def unwrapped(self) -> BaseProvider:
+        return self.inner.unwrapped
+
+    async def aclose(self) -> None:
+        self.users -= 1
+        if self.users == 0:
+            await self.inner.aclose()
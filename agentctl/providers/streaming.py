@@ -0,0 +1,115 @@
+"""Decoding of streamed provider responses.
+
+Anthropic and OpenAI stream Server-Sent Events; Ollama streams NDJSON. Both
+decoders work on raw byte chunks from `response.aiter_bytes()`, so no text
+decoding or line objects are made for bytes that are thrown away. SSE
+framing follows the spec: `data:` fields spanning several lines are joined,
+`event:` names the event, comment lines (`:`) such as keep-alives are ignored,
+and a `[DONE]` payload ends the stream. Events whose name is in `skip` are
+dropped before their JSON is parsed.
+
+JSON is parsed with orjson when it is installed (pip install agentctl[fast])
+and the standard library otherwise.
+"""
+
+from __future__ import annotations
+
+from typing import Any, AsyncIterator, Callable, Container
+
+try:
+    import orjson
+
+    loads: Callable[[bytes], Any] = orjson.loads
+except ImportError:
+    import json
+
+    def loads(data: bytes) -> Any:
+        # Faster than handing json.loads bytes, which sniffs the encoding first
+        return json.loads(data.decode())
+
+DONE = b"[DONE]"
+
+
+class SSEDecoder:
+    """Incremental Server-Sent Events parser over byte chunks."""
+
+    def __init__(self):
+        self._buf = b""
+
+    def feed(self, chunk: bytes) -> list[tuple[str, bytes]]:
+        """Return the (event name, data) pairs completed by `chunk`."""
+        data = self._buf + chunk
+        if b"\r" in data:
+            if data.endswith(b"\r"):
+                # Might be the first half of a CRLF split across chunks
+                data, chunk = data[:-1], b"\r"
+            else:
+                chunk = b""
+            data = data.replace(b"\r\n", b"\n").replace(b"\r", b"\n") + chunk
+        # Events end with a blank line; splitting on it keeps the scan in C
+        blocks = data.split(b"\n\n")
+        self._buf = blocks.pop()
+        return [event for event in map(self._parse, blocks) if event is not None]
+
+    def flush(self) -> list[tuple[str, bytes]]:
+        """Return an event left unterminated at the end of the stream."""
+        block, self._buf = self._buf.rstrip(b"\r\n"), b""
+        event = self._parse(block)
+        return [event] if event is not None else []
+
+    @staticmethod
+    def _parse(block: bytes) -> tuple[str, bytes] | None:
+        name = ""
+        data = []
+        for line in block.split(b"\n"):
+            if line.startswith(b"data:"):
+                value = line[5:]
+                data.append(value[1:] if value[:1] == b" " else value)
+            elif line.startswith(b"event:"):
+                name = line[6:].strip().decode()
+            # Comments (":..."), id and retry fields carry nothing we use
+        return (name, b"\n".join(data)) if data else None
+
+
+class NDJSONDecoder:
+    """Incremental newline-delimited JSON splitter over byte chunks."""
+
+    def __init__(self):
+        self._buf = b""
+
+    def feed(self, chunk: bytes) -> list[bytes]:
+        """Return the non-blank lines completed by `chunk`."""
+        lines = (self._buf + chunk).split(b"\n")
+        self._buf = lines.pop()
+        return [line for line in lines if line.strip()]
+
+    def flush(self) -> list[bytes]:
+        line, self._buf = self._buf, b""
+        return [line] if line.strip() else []
+
+
+async def iter_sse(
+    chunks: AsyncIterator[bytes], skip: Container[str] = ()
+) -> AsyncIterator[tuple[str, Any]]:
+    """Yield (event name, parsed data) for each SSE event until `[DONE]`."""
+    decoder = SSEDecoder()
+    async for chunk in chunks:
+        for event, data in decoder.feed(chunk):
+            if event in skip:
+                continue
+            if data == DONE:
+                return
+            yield event, loads(data)
+    for event, data in decoder.flush():
+        if event not in skip and data != DONE:
+            yield event, loads(data)
+
+
+async def iter_ndjson(chunks: AsyncIterator[bytes]) -> AsyncIterator[Any]:
+    """Yield each parsed object of an NDJSON stream, skipping blank lines."""
+    decoder = NDJSONDecoder()
+    async for chunk in chunks:
+        for line in decoder.feed(chunk):
+            yield loads(line)
+    for line in decoder.flush():
+        yield loads(line)
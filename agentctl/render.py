@@ -0,0 +1,146 @@
+"""Terminal rendering for streamed replies.
+
+`MarkdownStream` keeps chunks in a list and redraws at most once per frame,
+not once per chunk; frames are drawn on a timer, so text that arrived just
+before the stream stalls still shows within a frame. Completed Markdown
+blocks (those ended by a blank line outside a code fence) are printed once
+above the live region and never parsed again, so each frame re-parses only
+the trailing unfinished block and the total cost stays linear in the length
+of the reply. `RawStream` writes chunks straight through for piping.
+"""
+
+from __future__ import annotations
+
+import sys
+import threading
+import time
+from typing import TextIO
+
+from rich.console import Console
+from rich.live import Live
+from rich.markdown import Markdown
+
+# Seconds between redraws of the live region (20 fps)
+FRAME_INTERVAL = 0.05
+
+_FENCES = ("```", "~~~")
+
+
+class MarkdownStream:
+    """Renders a streamed Markdown reply, freezing blocks as they complete.
+
+    Use as a context manager and call `feed(chunk)` for each chunk.
+    """
+
+    def __init__(self, console: Console, frame_interval: float = FRAME_INTERVAL):
+        self.console = console
+        self.frame_interval = frame_interval
+        self._pending: list[str] = []  # chunks since the last frame
+        self._partial = ""  # unfinished last line
+        self._block: list[str] = []  # complete lines of the unfinished block
+        self._fence: str | None = None  # opening marker while inside a code fence
+        self._frozen = 0  # blocks printed so far
+        self._last_frame = 0.0
+        # Guards the fields above against the Live refresh thread reading them
+        self._lock = threading.Lock()
+        # Live redraws the unfinished block on its own timer, also while no
+        # chunks arrive; without a frame interval, feed() redraws instead
+        self._live = Live(
+            console=console,
+            get_renderable=self._frame,
+            auto_refresh=frame_interval > 0,
+            refresh_per_second=1 / frame_interval if frame_interval > 0 else 4,
+            transient=True,
+        )
+
+    def __enter__(self) -> MarkdownStream:
+        self._live.__enter__()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        completed = self._consume()
+        with self._lock:
+            tail = "\n".join([*self._block, self._partial]).strip("\n")
+            self._block, self._partial = [], ""
+        # Clear the live region; everything left is printed once it is gone
+        self._live.refresh()
+        self._live.__exit__(*exc_info)
+        for block in completed + ([tail] if tail else []):
+            self._print_block(block)
+
+    def feed(self, chunk: str) -> None:
+        with self._lock:
+            self._pending.append(chunk)
+        now = time.monotonic()
+        if now - self._last_frame >= self.frame_interval:
+            self._last_frame = now
+            completed = self._consume()
+            # Redraw before printing, so the live region drawn under each block
+            # is the short unfinished tail and not all the text that was pending.
+            # Outside the lock: printing waits for a refresh in progress, and
+            # the refresh may be waiting for the lock in _frame().
+            if completed or not self._live.auto_refresh:
+                self._live.refresh()
+            for block in completed:
+                self._print_block(block)
+
+    def _frame(self) -> Markdown:
+        """The live region: the unfinished block, with any text not consumed yet."""
+        with self._lock:
+            tail = "\n".join([*self._block, self._partial + "".join(self._pending)])
+        return Markdown(tail)
+
+    def _consume(self) -> list[str]:
+        """Split pending text into lines; return the blocks it completes."""
+        completed: list[str] = []
+        with self._lock:
+            if not self._pending:
+                return completed
+            lines = (self._partial + "".join(self._pending)).split("\n")
+            self._pending.clear()
+            self._partial = lines.pop()
+
+            for line in lines:
+                stripped = line.lstrip()
+                if self._fence is None and stripped.startswith(_FENCES):
+                    self._fence = stripped[:3]
+                elif self._fence is not None and stripped.startswith(self._fence):
+                    self._fence = None
+                elif self._fence is None and not stripped and self._block:
+                    completed.append("\n".join(self._block))
+                    self._block = []
+                    continue
+                if stripped or self._block:
+                    self._block.append(line)
+        return completed
+
+    def _print_block(self, block: str) -> None:
+        # Printing through the console while Live is active lands above the live region
+        if self._frozen:
+            self.console.print()
+        self.console.print(Markdown(block))
+        self._frozen += 1
+
+
+class RawStream:
+    """Writes chunks to a stream unparsed, flushing at most once per frame."""
+
+    def __init__(self, out: TextIO | None = None, frame_interval: float = FRAME_INTERVAL):
+        # Looked up per instance: sys.stdout may have been replaced since import
+        self.out = out or sys.stdout
+        self.frame_interval = frame_interval
+        self._last_flush = 0.0
+
+    def __enter__(self) -> RawStream:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.out.write("\n")
+        self.out.flush()
+
+    def feed(self, chunk: str) -> None:
+        self.out.write(chunk)
+        now = time.monotonic()
+        if now - self._last_flush >= self.frame_interval:
+            self._last_flush = now
+            self.out.flush()
@@ -0,0 +1,51 @@
+"""Where command coroutines run.
+
+In a normal invocation each command runs its coroutine with asyncio.run().
+Inside `agentctl daemon` they are submitted to one long-lived event loop
+instead, so the provider connection pools and rate limiters bound to that loop
+stay warm from one command to the next.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+from concurrent.futures import Future
+from typing import Any, Coroutine, TypeVar
+
+T = TypeVar("T")
+
+_loop: asyncio.AbstractEventLoop | None = None
+
+# Futures submitted on behalf of the current daemon request, so it can cancel
+# them when the client goes away
+running: contextvars.ContextVar[list[Future] | None] = contextvars.ContextVar(
+    "agentctl_running", default=None
+)
+
+
+def use_loop(loop: asyncio.AbstractEventLoop | None) -> None:
+    """Run every later run_async() call on `loop` (which runs in another thread)."""
+    global _loop
+    _loop = loop
+
+
+def run_async(coro: Coroutine[Any, Any, T]) -> T:
+    """Run a command's coroutine to completion and return its result."""
+    if _loop is None:
+        return asyncio.run(coro)
+
+    # A task on the shared loop starts from that loop's context, not ours;
+    # carry our context variables over (the daemon routes stdout through them).
+    values = list(contextvars.copy_context().items())
+
+    async def in_caller_context() -> T:
+        for var, value in values:
+            var.set(value)
+        return await coro
+
+    future = asyncio.run_coroutine_threadsafe(in_caller_context(), _loop)
+    futures = running.get()
+    if futures is not None:
+        futures.append(future)
+    return future.result()
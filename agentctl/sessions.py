@@ -0,0 +1,774 @@
+"""Session storage — reading and writing a session's messages.jsonl.
+
+messages.jsonl is append-only, one message per line. messages.idx next to it
+holds the byte offset just past each line as little-endian uint64s, so
+message N is found with one 8-byte read; it is extended under the same lock
+as every append and caught up lazily if it falls behind.
+
+A fork (and a snapshot from `session save`) copies no history: session.json
+gets a "parent" reference — the parent session, the byte offset into its
+messages.jsonl and the number of messages up to there — and only new
+messages go into the fork's own file. Since files only grow, the referenced
+prefix never changes; readers follow the chain of parents lazily.
+Flattening copies the inherited messages into the fork's own file and
+shifts the offsets of anything forked from it.
+
+Alongside the session directories, SESSIONS_DIR/index.jsonl summarizes every
+session (model, message count, size, timestamps) so `session list` never
+opens the sessions themselves. It is an append-only log: writers add one
+line per change, readers fold the lines into entries and rewrite the file
+compacted once it is mostly superseded lines. Each entry remembers the mtime
+and size of the files it was computed from; entries that no longer match,
+e.g. after a crash between an append and its index line, are recounted when
+next listed, reading only what was appended since.
+"""
+
+from __future__ import annotations
+
+import bisect
+import json
+import os
+import struct
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, fields
+from datetime import datetime
+from pathlib import Path
+
+from agentctl.paths import SESSIONS_DIR
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+BLOCK_SIZE = 64 * 1024
+
+
+def messages_path(name: str) -> Path:
+    return SESSIONS_DIR / name / "messages.jsonl"
+
+
+def meta_path(name: str) -> Path:
+    return SESSIONS_DIR / name / "session.json"
+
+
+def offsets_path(name: str) -> Path:
+    return SESSIONS_DIR / name / "messages.idx"
+
+
+def summary_path(name: str) -> Path:
+    return SESSIONS_DIR / name / "summary.json"
+
+
+def load_meta(name: str) -> dict | None:
+    """The session's session.json, or None if there is no such session."""
+    try:
+        return json.loads(meta_path(name).read_text())
+    except FileNotFoundError:
+        return None
+
+
+def _write_meta(name: str, meta: dict) -> None:
+    path = meta_path(name)
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(meta, indent=2))
+    os.replace(tmp, path)
+    _log_index([{"op": "meta", "name": name, **_meta_fields(meta, path.stat())}])
+
+
+def load_summary(name: str) -> dict | None:
+    """The session's cached summary of older turns (see agentctl.context)."""
+    try:
+        return json.loads(summary_path(name).read_text())
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def save_summary(name: str, summary: dict) -> None:
+    path = summary_path(name)
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(summary, indent=2))
+    os.replace(tmp, path)
+
+
+def touch_meta(name: str, **updates) -> None:
+    """Update fields of session.json (and last_active), replacing it atomically."""
+    meta = load_meta(name) or {"name": name}
+    meta.update(updates, last_active=datetime.now().isoformat())
+    _write_meta(name, meta)
+
+
+def create_session(name: str, **meta) -> dict:
+    """Create a session's directory, session.json and an empty messages.jsonl.
+
+    Raises ValueError if the session already has a messages.jsonl: an
+    existing history is never overwritten.
+    """
+    now = datetime.now().isoformat()
+    meta = {"name": name, **meta, "created": now, "last_active": now}
+    (SESSIONS_DIR / name).mkdir(parents=True, exist_ok=True)
+    try:
+        with open(messages_path(name), "xb"):
+            pass
+    except FileExistsError:
+        raise ValueError(f"Session '{name}' already exists.") from None
+    # Left over from an earlier session of that name, it would index the new file
+    offsets_path(name).unlink(missing_ok=True)
+    _write_meta(name, meta)
+    return meta
+
+
+def delete_session(name: str) -> list[str] | None:
+    """Remove a session, flattening its forks first so they keep their history.
+
+    Returns the forks that were flattened, or None if there was no session.
+    """
+    import shutil
+
+    session_dir = SESSIONS_DIR / name
+    if not session_dir.exists():
+        return None
+    forks = dependents(name)
+    for fork in forks:
+        flatten_session(fork)
+    shutil.rmtree(session_dir)
+    _log_index([{"op": "delete", "name": name}])
+    return forks
+
+
+def append_messages(name: str, records: list[dict], fsync: bool = True) -> None:
+    """Append records to a session's messages.jsonl.
+
+    All records go out in one write while holding an exclusive lock on the
+    file, so concurrent writers never interleave and a follower never sees
+    half a line. Nothing already written is touched; a line left torn by a
+    crashed writer is terminated first so the new records parse.
+    """
+    data = "".join(json.dumps(record) + "\n" for record in records).encode()
+    with _locked(name) as fd:
+        size = os.fstat(fd).st_size
+        if size and os.pread(fd, 1, size - 1) != b"\n":
+            data = b"\n" + data
+        lines = data.count(b"\n")
+        while data:
+            data = data[os.write(fd, data) :]
+        if fsync:
+            os.fsync(fd)
+        _sync_offsets(name, fd)
+        st = os.fstat(fd)
+        # Logged under the file lock so the index sees appends in order
+        _log_index(
+            [
+                {
+                    "op": "append",
+                    "name": name,
+                    "from": size,
+                    "to": st.st_size,
+                    "lines": lines,
+                    "mtime_ns": st.st_mtime_ns,
+                }
+            ]
+        )
+
+
+@contextmanager
+def _locked(name: str):
+    """Hold an exclusive lock on a session's messages.jsonl; yields its fd.
+
+    Flattening replaces the file, so a writer that waited on the old one
+    opens it again.
+    """
+    path = messages_path(name)
+    while True:
+        fd = os.open(path, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+        if fcntl:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        try:
+            if os.fstat(fd).st_ino == os.stat(path).st_ino:
+                break
+        except FileNotFoundError:
+            pass
+        os.close(fd)
+    try:
+        yield fd
+    finally:
+        os.close(fd)  # also releases the lock
+
+
+def _sync_offsets(name: str, fd: int) -> int:
+    """Index any lines of messages.jsonl past messages.idx; returns the line count.
+
+    The caller holds the session's lock. Only newline-terminated lines are
+    indexed, so a torn tail is picked up once a later append terminates it.
+    """
+    ifd = os.open(offsets_path(name), os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        count = os.fstat(ifd).st_size // 8
+        covered = struct.unpack("<Q", os.pread(ifd, 8, (count - 1) * 8))[0] if count else 0
+        size = os.fstat(fd).st_size
+        # Offsets that don't end a line of this file are from one it replaced
+        if covered > size or (covered and os.pread(fd, 1, covered - 1) != b"\n"):
+            count = covered = 0
+        ends = []
+        pos = covered
+        while pos < size:
+            block = os.pread(fd, min(BLOCK_SIZE * 16, size - pos), pos)
+            if not block:
+                break
+            start = 0
+            while (newline := block.find(b"\n", start)) != -1:
+                ends.append(pos + newline + 1)
+                start = newline + 1
+            pos += len(block)
+        if ends:
+            os.pwrite(ifd, struct.pack(f"<{len(ends)}Q", *ends), count * 8)
+        os.ftruncate(ifd, (count + len(ends)) * 8)
+        return count + len(ends)
+    finally:
+        os.close(ifd)
+
+
+def _line_end(name: str, n: int) -> int:
+    """Byte offset just past the session's own line `n` (1-based); 0 for n == 0."""
+    if n == 0:
+        return 0
+    with _locked(name) as fd:
+        if n > _sync_offsets(name, fd):
+            raise ValueError(f"Session '{name}' has fewer than {n} messages.")
+    with open(offsets_path(name), "rb") as f:
+        f.seek((n - 1) * 8)
+        return struct.unpack("<Q", f.read(8))[0]
+
+
+def _chain(name: str) -> list[tuple[str, int | None]]:
+    """The files making up a session's history, root first, as (session, end).
+
+    `end` is where the inherited part of that session's file stops; None for
+    the session's own file, which is read to the end.
+    """
+    chain: list[tuple[str, int | None]] = [(name, None)]
+    child = name
+    ref = (_settled_meta(name) or {}).get("parent")
+    while ref:
+        if any(session == ref["session"] for session, _ in chain):
+            raise ValueError(f"Session '{name}' has a cyclic parent chain.")
+        parent_meta = load_meta(ref["session"]) or {}
+        if parent_meta.get("flattening"):
+            parent_meta = _settled_meta(ref["session"]) or {}
+            # Finishing the flatten may have moved our offset into its new file
+            ref = load_meta(child)["parent"]
+        chain.append((ref["session"], ref["offset"]))
+        child, ref = ref["session"], parent_meta.get("parent")
+    chain.reverse()
+    return chain
+
+
+def _iter_lines(path: Path, end: int | None):
+    with open(path, "rb") as f:
+        while end is None or f.tell() < end:
+            line = f.readline()
+            if not line:
+                break
+            yield line
+
+
+def iter_messages(name: str):
+    """Every message of a session, oldest first, skipping torn lines.
+
+    Inherited messages are read from the parent chain as they are reached.
+    """
+    for session, end in _chain(name):
+        for line in _iter_lines(messages_path(session), end):
+            if line.strip():
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+
+def message_count(name: str) -> int:
+    """Messages in a session's history, inherited ones included."""
+    ref = (load_meta(name) or {}).get("parent")
+    with _locked(name) as fd:
+        return (ref["messages"] if ref else 0) + _sync_offsets(name, fd)
+
+
+def tail_lines(
+    path: Path, n: int, end: int | None = None, block_size: int = BLOCK_SIZE
+) -> tuple[list[bytes], int]:
+    """Return the last `n` complete, non-blank lines of a file, oldest first.
+
+    Reads backward from `end` (default: EOF) one block at a time, so the cost
+    depends on `n` and the line lengths, not on the size of the file. A
+    trailing line without a newline is still being written and is skipped.
+
+    Also returns the offset just past the last complete line, where a
+    follower should start reading.
+    """
+    with open(path, "rb") as f:
+        if end is None:
+            end = f.seek(0, os.SEEK_END)
+
+        chunks: list[list[bytes]] = []  # newest block first
+        count = 0
+        pos = end
+        buf = b""
+        tail_end: int | None = None  # offset just past the last complete line
+
+        while pos > 0 and (count < n or tail_end is None):
+            read = min(block_size, pos)
+            pos -= read
+            f.seek(pos)
+            buf = f.read(read) + buf
+
+            if tail_end is None:
+                newline = buf.rfind(b"\n")
+                if newline == -1:
+                    continue
+                tail_end = pos + newline + 1
+                buf = buf[: newline + 1]
+
+            # buf ends on a line boundary; unless we reached the start of the
+            # file, its first line may be cut off and waits for the next block.
+            if pos == 0:
+                head, body = b"", buf
+            else:
+                first = buf.find(b"\n")
+                head, body = buf[: first + 1], buf[first + 1 :]
+            chunk = [line for line in body.split(b"\n") if line.strip()]
+            chunks.append(chunk)
+            count += len(chunk)
+            buf = head
+
+    lines = [line for chunk in reversed(chunks) for line in chunk]
+    return lines[-n:] if n > 0 else [], tail_end or 0
+
+
+def last_lines(name: str, n: int) -> tuple[list[bytes], int]:
+    """`tail_lines` for a session: the last `n` lines of its history, and the
+    offset in its own file where a follower should start reading.
+
+    Reads back into the parent chain only as far as needed.
+    """
+    chain = _chain(name)
+    lines, tail_end = tail_lines(messages_path(name), n)
+    for session, end in reversed(chain[:-1]):
+        if len(lines) >= n:
+            break
+        more, _ = tail_lines(messages_path(session), n - len(lines), end)
+        lines = more + lines
+    return lines, tail_end
+
+
+def last_messages(name: str, n: int) -> list[dict]:
+    """The last `n` messages of a session, oldest first."""
+    lines, _ = last_lines(name, n)
+    return [json.loads(line) for line in lines]
+
+
+# --- forks ----------------------------------------------------------------
+
+
+def _ref_at(name: str, n: int) -> dict | None:
+    """A parent reference to the first `n` messages of a session's history.
+
+    Points at whichever session in the chain holds message `n`, so forks of
+    forks don't lengthen the chain needlessly.
+    """
+    while True:
+        ref = (load_meta(name) or {}).get("parent")
+        inherited = ref["messages"] if ref else 0
+        if n > inherited:
+            return {"session": name, "offset": _line_end(name, n - inherited), "messages": n}
+        if ref is None:
+            return None
+        name = ref["session"]
+
+
+def fork_session(source: str, name: str, upto: int | None = None, **meta) -> dict:
+    """Create session `name` sharing the first `upto` messages of `source`.
+
+    Nothing is copied; defaults to the whole history.
+    """
+    source_meta = load_meta(source)
+    if source_meta is None:
+        raise ValueError(f"Session '{source}' not found.")
+    total = message_count(source)
+    if upto is None:
+        upto = total
+    if not 0 <= upto <= total:
+        raise ValueError(f"Session '{source}' has only {total} messages.")
+
+    inherit = {k: source_meta.get(k) for k in ("provider", "model", "system", "context")}
+    return create_session(
+        name, **{k: v for k, v in inherit.items() if v is not None}, **meta,
+        parent=_ref_at(source, upto),
+    )
+
+
+def dependents(name: str) -> list[str]:
+    """Sessions whose parent reference points into this session's file."""
+    return [e.name for e in list_sessions() if e.parent == name]
+
+
+def flatten_session(name: str) -> bool:
+    """Copy a fork's inherited messages into its own file; False if not a fork.
+
+    The history reads the same afterwards. Forks of this session get their
+    offsets shifted by the bytes prepended.
+
+    Before the new file replaces the old one, session.json records the
+    replacement's inode and the forks' new offsets under "flattening". A
+    flatten cut short by a crash is then finished, or found never to have
+    happened, by the next reader (see `_settled_meta`).
+    """
+    meta = _settled_meta(name)
+    if meta is None or not meta.get("parent"):
+        return False
+    forks = dependents(name)
+    path = messages_path(name)
+    with _locked(name) as fd:
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp, "wb") as out:
+            for session, end in _chain(name)[:-1]:
+                with open(messages_path(session), "rb") as f:
+                    remaining = end
+                    while remaining:
+                        block = f.read(min(BLOCK_SIZE * 16, remaining))
+                        if not block:
+                            raise ValueError(f"Session '{session}' is shorter than forks expect.")
+                        out.write(block)
+                        remaining -= len(block)
+            shift = out.tell()
+            size = os.fstat(fd).st_size
+            pos = 0
+            while pos < size:
+                block = os.pread(fd, min(BLOCK_SIZE * 16, size - pos), pos)
+                out.write(block)
+                pos += len(block)
+            out.flush()
+            os.fsync(out.fileno())
+
+        meta["flattening"] = {
+            "inode": os.stat(tmp).st_ino,
+            "offsets": {fork: load_meta(fork)["parent"]["offset"] + shift for fork in forks},
+        }
+        _write_meta(name, meta)
+        os.replace(tmp, path)
+        with _locked(name) as new_fd:
+            _finish_flatten(name, meta, new_fd)
+    return True
+
+
+def _finish_flatten(name: str, meta: dict, fd: int) -> None:
+    """Point the forks at their offsets in the replaced file, then detach `name`.
+
+    Each step sets absolute values, so repeating it after a crash is harmless.
+    The caller holds the lock on the new file, `fd`.
+    """
+    for fork, offset in meta["flattening"]["offsets"].items():
+        fork_meta = load_meta(fork)
+        if fork_meta and (fork_meta.get("parent") or {}).get("session") == name:
+            fork_meta["parent"]["offset"] = offset
+            _write_meta(fork, fork_meta)
+    offsets_path(name).unlink(missing_ok=True)
+    _log_reset(name, fd, _sync_offsets(name, fd))
+    del meta["flattening"]
+    meta.pop("parent", None)
+    _write_meta(name, meta)
+
+
+def _settled_meta(name: str) -> dict | None:
+    """The session's session.json, after settling a flatten interrupted by a crash."""
+    meta = load_meta(name)
+    if not (meta and meta.get("flattening")):
+        return meta
+    with _locked(name) as fd:
+        meta = load_meta(name)
+        if meta and meta.get("flattening"):
+            if os.fstat(fd).st_ino == meta["flattening"]["inode"]:
+                _finish_flatten(name, meta, fd)
+            else:
+                # The new file never replaced the old one: nothing changed
+                del meta["flattening"]
+                _write_meta(name, meta)
+    return meta
+
+
+def snapshot_session(name: str, snapshot: str) -> dict:
+    """Save the current state of a session as `snapshot` (a fork of all of it)."""
+    return fork_session(name, snapshot, snapshot_of=name)
+
+
+def restore_session(snapshot: str, target: str) -> list[str]:
+    """Make `target`'s history equal `snapshot`'s; returns the forks flattened.
+
+    When the snapshot was taken from `target`, its file is simply cut back to
+    the snapshot's offset. Forks that depend on the part being cut off (or on
+    an inherited history that gets replaced) are flattened first.
+    """
+    smeta = load_meta(snapshot)
+    if smeta is None:
+        raise ValueError(f"Session '{snapshot}' not found.")
+    if snapshot == target:
+        raise ValueError("Cannot restore a session onto itself.")
+    if load_meta(target) is None:
+        fork_session(snapshot, target)
+        return []
+
+    flattened: list[str] = []
+    while True:
+        smeta = load_meta(snapshot)
+        with _locked(snapshot) as fd:
+            own = _sync_offsets(snapshot, fd)
+            size = os.fstat(fd).st_size
+        ref = smeta.get("parent")
+        if own:
+            inherited = ref["messages"] if ref else 0
+            ref = {"session": snapshot, "offset": size, "messages": inherited + own}
+
+        tmeta = load_meta(target)
+        if ref and ref["session"] == target:
+            keep, parent = ref["offset"], tmeta.get("parent")
+        else:
+            keep, parent = 0, ref
+        blockers = [
+            fork
+            for fork in dependents(target)
+            if parent != tmeta.get("parent") or load_meta(fork)["parent"]["offset"] > keep
+        ]
+        if not blockers:
+            break
+        for fork in blockers:
+            flatten_session(fork)
+        flattened += blockers
+
+    with _locked(target) as fd:
+        _sync_offsets(target, fd)
+        ends = [end for (end,) in struct.iter_unpack("<Q", offsets_path(target).read_bytes())]
+        kept = bisect.bisect_right(ends, keep)
+        os.truncate(offsets_path(target), kept * 8)
+        os.ftruncate(fd, keep)
+        _log_reset(target, fd, kept)
+
+    for key in ("provider", "model", "system", "context"):
+        if key in smeta:
+            tmeta[key] = smeta[key]
+    tmeta.pop("parent", None)
+    if parent:
+        tmeta["parent"] = parent
+    tmeta["last_active"] = datetime.now().isoformat()
+    _write_meta(target, tmeta)
+    return flattened
+
+
+# --- index ----------------------------------------------------------------
+
+# Rewrite the index once it holds this many lines per live entry
+COMPACT_RATIO = 4
+
+
+@dataclass
+class SessionEntry:
+    """What `session list` shows about a session, as kept in the index."""
+
+    name: str
+    model: str | None = None
+    provider: str | None = None
+    created: str | None = None
+    last_active: str | None = None
+    # Own lines of messages.jsonl and their bytes; a fork inherits the first
+    # `inherited` messages of `parent`
+    messages: int = 0
+    size: int = 0
+    parent: str | None = None
+    inherited: int = 0
+    # mtime_ns of messages.jsonl / session.json when counted / read
+    mtime_ns: int = 0
+    meta_mtime_ns: int = 0
+
+
+_ENTRY_FIELDS = frozenset(f.name for f in fields(SessionEntry))
+
+
+def index_path() -> Path:
+    return SESSIONS_DIR / "index.jsonl"
+
+
+_META_KEYS = ("model", "provider", "created", "last_active", "parent", "inherited", "meta_mtime_ns")
+
+
+def _meta_fields(meta: dict, st: os.stat_result) -> dict:
+    ref = meta.get("parent") or {}
+    return {
+        "model": meta.get("model"),
+        "provider": meta.get("provider"),
+        "created": meta.get("created"),
+        "last_active": meta.get("last_active"),
+        "parent": ref.get("session"),
+        "inherited": ref.get("messages", 0),
+        "meta_mtime_ns": st.st_mtime_ns,
+    }
+
+
+class _index_lock:
+    """Exclusive lock serializing index appends against compaction."""
+
+    def __enter__(self):
+        SESSIONS_DIR.mkdir(parents=True, exist_ok=True)
+        self.fd = os.open(SESSIONS_DIR / "index.lock", os.O_RDWR | os.O_CREAT, 0o644)
+        if fcntl:
+            fcntl.flock(self.fd, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        os.close(self.fd)
+
+
+def _log_index(records: list[dict]) -> None:
+    data = "".join(json.dumps(record) + "\n" for record in records).encode()
+    with _index_lock():
+        fd = os.open(index_path(), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            while data:
+                data = data[os.write(fd, data) :]
+        finally:
+            os.close(fd)
+
+
+def _log_reset(name: str, fd: int, lines: int) -> None:
+    """Record that a session's file was rewritten rather than appended to."""
+    st = os.fstat(fd)
+    record = {"op": "reset", "name": name, "to": st.st_size, "lines": lines}
+    _log_index([{**record, "mtime_ns": st.st_mtime_ns}])
+
+
+def _fold_index(entries: dict[str, SessionEntry], record: dict) -> None:
+    op, name = record.get("op"), record.get("name")
+    entry = entries.get(name)
+    if op == "put":
+        entries[name] = SessionEntry(**{k: v for k, v in record.items() if k in _ENTRY_FIELDS})
+    elif op == "delete":
+        entries.pop(name, None)
+    elif op == "meta":
+        if entry is None:
+            # Message counts stay at zero until validation fills them in
+            entry = entries[name] = SessionEntry(name=name, mtime_ns=-1)
+        for key in _META_KEYS:
+            setattr(entry, key, record.get(key, getattr(entry, key)))
+    elif op == "reset" and entry is not None:
+        entry.messages, entry.size = record["lines"], record["to"]
+        entry.mtime_ns = record["mtime_ns"]
+    elif op == "append" and entry is not None:
+        if entry.size == record["from"]:
+            entry.messages += record["lines"]
+            entry.size = record["to"]
+            entry.mtime_ns = record["mtime_ns"]
+        else:
+            entry.mtime_ns = -1  # missed an append; recount on validation
+
+
+def _read_index() -> tuple[dict[str, SessionEntry], int]:
+    """Fold the index log into entries; also returns the number of lines read."""
+    entries: dict[str, SessionEntry] = {}
+    lines = 0
+    try:
+        with open(index_path(), "rb") as f:
+            for line in f:
+                lines += 1
+                try:
+                    _fold_index(entries, json.loads(line))
+                except (ValueError, TypeError, KeyError):
+                    continue  # torn or foreign line
+    except FileNotFoundError:
+        pass
+    return entries, lines
+
+
+def _count_lines(path: Path, start: int, end: int) -> int:
+    count = 0
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = end - start
+        while remaining > 0:
+            block = f.read(min(BLOCK_SIZE * 16, remaining))
+            if not block:
+                break
+            count += block.count(b"\n")
+            remaining -= len(block)
+    return count
+
+
+def _validate(name: str, entry: SessionEntry | None) -> tuple[SessionEntry | None, bool]:
+    """Check an entry against the session's files, repairing it if stale.
+
+    Returns the (possibly new) entry, or None if the session is gone, and
+    whether it changed.
+    """
+    try:
+        meta_st = meta_path(name).stat()
+    except (FileNotFoundError, NotADirectoryError):
+        return None, entry is not None
+
+    changed = False
+    if entry is None:
+        entry, changed = SessionEntry(name=name, mtime_ns=-1), True
+    if entry.meta_mtime_ns != meta_st.st_mtime_ns:
+        meta = load_meta(name) or {}
+        for key, value in _meta_fields(meta, meta_st).items():
+            setattr(entry, key, value)
+        changed = True
+
+    path = messages_path(name)
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        if entry.size or entry.messages:
+            entry.messages = entry.size = entry.mtime_ns = 0
+            changed = True
+        return entry, changed
+    if st.st_mtime_ns != entry.mtime_ns or st.st_size != entry.size:
+        if entry.mtime_ns != -1 and 0 < entry.size < st.st_size:
+            # The file is append-only: count just the new tail
+            entry.messages += _count_lines(path, entry.size, st.st_size)
+        else:
+            entry.messages = _count_lines(path, 0, st.st_size)
+        entry.size, entry.mtime_ns = st.st_size, st.st_mtime_ns
+        changed = True
+    return entry, changed
+
+
+def list_sessions() -> list[SessionEntry]:
+    """Every session, from the index, repairing entries that went stale.
+
+    Costs one directory scan and two stats per session; a session's files are
+    only read when they changed without the index hearing about it.
+    """
+    if not SESSIONS_DIR.exists():
+        return []
+    with _index_lock():
+        entries, lines = _read_index()
+        names = {e.name for e in os.scandir(SESSIONS_DIR) if e.is_dir()}
+        repaired = []
+        for name in names | entries.keys():
+            entry, changed = _validate(name, entries.get(name))
+            if entry is None:
+                entries.pop(name, None)
+                if changed:
+                    repaired.append({"op": "delete", "name": name})
+            else:
+                entries[name] = entry
+                if changed:
+                    repaired.append({"op": "put", **asdict(entry)})
+
+        path = index_path()
+        if lines + len(repaired) > COMPACT_RATIO * max(len(entries), 16):
+            tmp = path.with_suffix(f".{os.getpid()}.tmp")
+            tmp.write_text(
+                "".join(json.dumps({"op": "put", **asdict(e)}) + "\n" for e in entries.values())
+            )
+            os.replace(tmp, path)
+        elif repaired:
+            with open(path, "a") as f:
+                f.write("".join(json.dumps(record) + "\n" for record in repaired))
+    return list(entries.values())
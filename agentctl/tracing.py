@@ -0,0 +1,315 @@
+"""Tracing spans around command phases and provider calls.
+
+    with tracing.span("config.load"):
+        ...
+
+Each span records its name, start and end, attributes, timed events (such
+as "first_byte" of an HTTP exchange) and its parent — the span that was
+current when it started, followed across asyncio tasks through a context
+variable. When the outermost span of a trace ends, the whole trace is handed
+to the exporters:
+
+    AGENTCTL_TRACE=jsonl      append spans to ~/.agentctl/traces/YYYY-MM-DD.jsonl
+    AGENTCTL_TRACE=otlp       send them as OTLP/HTTP JSON to a collector at
+                              $OTEL_EXPORTER_OTLP_ENDPOINT (http://localhost:4318)
+    agentctl --profile ...    print a phase breakdown of this invocation
+
+With no exporter enabled, `span()` returns a shared no-op context manager
+and nothing is measured. This module is imported on every invocation, so
+it keeps to the standard library.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import nullcontext
+from datetime import date
+
+from agentctl.paths import TRACES_DIR
+
+TRACE_ENV = "AGENTCTL_TRACE"
+OTLP_ENDPOINT_ENV = "OTEL_EXPORTER_OTLP_ENDPOINT"
+DEFAULT_OTLP_ENDPOINT = "http://localhost:4318"
+
+# httpx trace callbacks -> span events
+_HTTP_EVENTS = {
+    "connection.connect_tcp.complete": "connected",
+    "connection.start_tls.complete": "tls",
+    "http11.send_request_body.complete": "request_sent",
+    "http2.send_request_body.complete": "request_sent",
+    "http11.receive_response_headers.complete": "first_byte",
+    "http2.receive_response_headers.complete": "first_byte",
+    "http11.response_closed.complete": "last_byte",
+    "http2.response_closed.complete": "last_byte",
+}
+
+_NOOP = nullcontext()
+
+_exporters: list = []
+_current: contextvars.ContextVar[Span | None] = contextvars.ContextVar(
+    "agentctl_span", default=None
+)
+# Finished spans of traces still in progress, by trace id
+_pending: dict[str, list[Span]] = {}
+_pending_lock = threading.Lock()
+_env_loaded = False
+
+
+class Span:
+    """One timed operation. Use it through `span()`."""
+
+    __slots__ = (
+        "name",
+        "trace_id",
+        "span_id",
+        "parent_id",
+        "start_ns",
+        "end_ns",
+        "attributes",
+        "events",
+        "_previous",
+    )
+
+    def __init__(self, name: str, parent: Span | None, attributes: dict):
+        self.name = name
+        self.trace_id = parent.trace_id if parent else os.urandom(16).hex()
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent.span_id if parent else None
+        self.attributes = attributes
+        self.events: list[tuple[str, int]] = []
+        self.start_ns = time.time_ns()
+        self.end_ns: int | None = None
+        self._previous: Span | None = None
+
+    def set(self, **attributes) -> None:
+        self.attributes.update(attributes)
+
+    def event(self, name: str) -> None:
+        self.events.append((name, time.time_ns()))
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+    def __enter__(self) -> Span:
+        self._previous = _current.get()
+        _current.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.end_ns = time.time_ns()
+        if exc_type is not None and not issubclass(exc_type, (SystemExit, GeneratorExit)):
+            self.attributes["error"] = exc_type.__name__
+        # Restore rather than reset: a generator's span may close in another context
+        _current.set(self._previous)
+        _finish(self)
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "attributes": self.attributes,
+            "events": [{"name": name, "time_ns": at} for name, at in self.events],
+        }
+
+
+def enabled() -> bool:
+    return bool(_exporters)
+
+
+def span(name: str, **attributes):
+    """A context manager timing `name` as a child of the current span."""
+    if not _exporters:
+        return _NOOP
+    return Span(name, _current.get(), attributes)
+
+
+def current() -> Span | None:
+    """The innermost open span, if tracing is enabled."""
+    return _current.get() if _exporters else None
+
+
+def event(name: str) -> None:
+    """Mark a moment in the current span."""
+    if _exporters:
+        active = _current.get()
+        if active is not None:
+            active.event(name)
+
+
+def _finish(finished: Span) -> None:
+    with _pending_lock:
+        spans = _pending.setdefault(finished.trace_id, [])
+        spans.append(finished)
+        if finished.parent_id is not None:
+            return
+        del _pending[finished.trace_id]
+    for exporter in list(_exporters):
+        try:
+            exporter.export(spans)
+        except Exception as e:  # tracing must never fail the command
+            sys.stderr.write(f"agentctl: trace export failed: {e}\n")
+
+
+def enable(exporter) -> None:
+    """Start tracing and hand finished traces to `exporter`."""
+    _exporters.append(exporter)
+
+
+def disable(exporter=None) -> None:
+    """Stop handing traces to `exporter`, or to any exporter."""
+    if exporter is None:
+        _exporters.clear()
+    elif exporter in _exporters:
+        _exporters.remove(exporter)
+    if not _exporters:
+        with _pending_lock:
+            _pending.clear()
+
+
+def enable_from_env() -> None:
+    """Enable the exporters named in $AGENTCTL_TRACE (comma-separated), once."""
+    global _env_loaded
+    if _env_loaded:
+        return
+    _env_loaded = True
+    for name in filter(None, os.environ.get(TRACE_ENV, "").split(",")):
+        name = name.strip()
+        if name == "jsonl":
+            enable(JsonlExporter())
+        elif name == "otlp":
+            enable(OtlpExporter())
+        else:
+            sys.stderr.write(f"agentctl: unknown {TRACE_ENV} exporter '{name}'\n")
+
+
+async def http_trace(event_name: str, info: dict) -> None:
+    """httpx "trace" extension callback: connection phases as span events."""
+    name = _HTTP_EVENTS.get(event_name)
+    if name:
+        event(name)
+
+
+# --- exporters ------------------------------------------------------------
+
+
+class JsonlExporter:
+    """Appends one JSON line per span to a daily file."""
+
+    def __init__(self, directory=None):
+        self.directory = directory or TRACES_DIR
+
+    def export(self, spans: list[Span]) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        data = "".join(json.dumps(s.to_dict()) + "\n" for s in spans)
+        with open(self.directory / f"{date.today().isoformat()}.jsonl", "a") as f:
+            f.write(data)
+
+
+def _otlp_value(value) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class OtlpExporter:
+    """Sends traces to an OpenTelemetry collector over OTLP/HTTP with JSON bodies."""
+
+    def __init__(self, endpoint: str | None = None, timeout: float = 2.0):
+        endpoint = endpoint or os.environ.get(OTLP_ENDPOINT_ENV) or DEFAULT_OTLP_ENDPOINT
+        self.url = endpoint.rstrip("/") + "/v1/traces"
+        self.timeout = timeout
+
+    def payload(self, spans: list[Span]) -> dict:
+        from agentctl import __version__
+
+        def attributes(values: dict) -> list[dict]:
+            return [{"key": k, "value": _otlp_value(v)} for k, v in values.items()]
+
+        return {
+            "resourceSpans": [
+                {
+                    "resource": {"attributes": attributes({"service.name": "agentctl"})},
+                    "scopeSpans": [
+                        {
+                            "scope": {"name": "agentctl", "version": __version__},
+                            "spans": [
+                                {
+                                    "traceId": s.trace_id,
+                                    "spanId": s.span_id,
+                                    "parentSpanId": s.parent_id or "",
+                                    "name": s.name,
+                                    "kind": 1,  # internal
+                                    "startTimeUnixNano": str(s.start_ns),
+                                    "endTimeUnixNano": str(s.end_ns),
+                                    "attributes": attributes(s.attributes),
+                                    "events": [
+                                        {"name": name, "timeUnixNano": str(at)}
+                                        for name, at in s.events
+                                    ],
+                                }
+                                for s in spans
+                            ],
+                        }
+                    ],
+                }
+            ]
+        }
+
+    def export(self, spans: list[Span]) -> None:
+        import urllib.request
+
+        request = urllib.request.Request(
+            self.url,
+            data=json.dumps(self.payload(spans)).encode(),
+            headers={"Content-Type": "application/json"},
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout):
+            pass
+
+
+class Profiler:
+    """Prints a breakdown of each finished trace to stderr (`agentctl --profile`)."""
+
+    def __init__(self, stream=None):
+        self.stream = stream
+
+    def export(self, spans: list[Span]) -> None:
+        children: dict[str | None, list[Span]] = {}
+        for s in sorted(spans, key=lambda s: s.start_ns):
+            children.setdefault(s.parent_id, []).append(s)
+        root = children[None][0]
+        total = root.duration_ms or 1.0
+        lines = [f"\nProfile: {root.name} — {root.duration_ms:.1f} ms"]
+
+        def walk(node: Span, depth: int) -> None:
+            kids = children.get(node.span_id, [])
+            own = node.duration_ms - sum(k.duration_ms for k in kids)
+            label = "  " * depth + node.name
+            lines.append(
+                f"  {label:<40} {node.duration_ms:9.1f} ms {node.duration_ms / total:6.1%}"
+                f"   self {max(own, 0.0):8.1f} ms"
+            )
+            details = [f"{k}={v}" for k, v in node.attributes.items()]
+            details += [f"{name} +{(at - node.start_ns) / 1e6:.1f}ms" for name, at in node.events]
+            if details:
+                lines.append("  " + "  " * (depth + 1) + ", ".join(details))
+            for kid in kids:
+                walk(kid, depth + 1)
+
+        for kid in children.get(root.span_id, []):
+            walk(kid, 0)
+        (self.stream or sys.stderr).write("\n".join(lines) + "\n")
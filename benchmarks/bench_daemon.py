@@ -0,0 +1,79 @@
+"""Benchmark command latency with and without `agentctl daemon`.
+
+Runs each command N times as a fresh `agentctl` process, as a script would,
+first in process and then forwarded to a daemon, against the local stub
+server from the test suite. Reports p50/p99 wall-clock latency per command.
+
+    python benchmarks/bench_daemon.py
+    python benchmarks/bench_daemon.py -n 200
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from tests.stub_server import StubServer  # noqa: E402
+
+COMMANDS = {
+    "costs": ["costs"],
+    "run": ["run", "--no-stream", "stub", "hello"],
+    "run (stream)": ["run", "--raw", "stub", "hello"],
+}
+
+
+def time_command(args: list[str], env: dict, n: int) -> list[float]:
+    samples = []
+    for _ in range(n):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "-m", "agentctl.cli", *args],
+            env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True,
+        )
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def percentile(samples: list[float], p: float) -> float:
+    return statistics.quantiles(samples, n=100, method="inclusive")[int(p) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", type=int, default=50, help="Invocations per command")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as home, StubServer() as server:
+        (Path(home) / ".agentctl").mkdir()
+        (Path(home) / ".agentctl" / "config.yaml").write_text(
+            f"providers:\n  ollama:\n    endpoint: {server.url}\n    default_model: stub\n"
+            "defaults:\n  provider: ollama\n"
+        )
+        env = {**os.environ, "HOME": home}
+        cli = [sys.executable, "-m", "agentctl.cli"]
+
+        results = {}
+        for name, command in COMMANDS.items():
+            results[name, "in process"] = time_command(command, env, args.n)
+
+        subprocess.run([*cli, "daemon", "start"], env=env, check=True, stdout=subprocess.DEVNULL)
+        try:
+            for name, command in COMMANDS.items():
+                results[name, "daemon"] = time_command(command, env, args.n)
+        finally:
+            subprocess.run([*cli, "daemon", "stop"], env=env, stdout=subprocess.DEVNULL)
+
+    print(f"{'command':<14}{'mode':<12}{'p50':>10}{'p99':>10}")
+    for (name, mode), samples in results.items():
+        p50, p99 = percentile(samples, 50), percentile(samples, 99)
+        print(f"{name:<14}{mode:<12}{p50:>8.1f}ms{p99:>8.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Benchmark `--last N` reads on a large session file.
+
+Compares the reverse block reader in agentctl.sessions with the old approach
+of reading the whole file and keeping the last N lines.
+
+    python benchmarks/bench_session_tail.py               # 1 GB file
+    python benchmarks/bench_session_tail.py --size-mb 100 --skip-full-read
+"""
+
+import argparse
+import json
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from agentctl.sessions import tail_lines
+
+
+def make_session_file(path: Path, size_mb: int) -> int:
+    """Write a synthetic messages.jsonl of roughly `size_mb` MB; return the line count."""
+    record = {
+        "role": "assistant",
+        "content": "lorem ipsum dolor sit amet " * 20,
+        "timestamp": "2026-01-01T00:00:00",
+    }
+    lines = [json.dumps({**record, "seq": i}) + "\n" for i in range(1000)]
+    block = "".join(lines).encode()
+    target = size_mb * 1024 * 1024
+    written = count = 0
+    with open(path, "wb") as f:
+        while written < target:
+            f.write(block)
+            written += len(block)
+            count += len(lines)
+    return count
+
+
+def full_read(path: Path, n: int) -> list[str]:
+    lines = path.read_text().strip().split("\n")
+    lines = [line for line in lines if line.strip()]
+    return lines[-n:]
+
+
+def measure(fn, *args) -> tuple[float, float]:
+    """Return (seconds, peak MB) for one call."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn(*args)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 1024 / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=int, default=1024)
+    parser.add_argument("--skip-full-read", action="store_true")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "messages.jsonl"
+        count = make_session_file(path, args.size_mb)
+        print(f"{path.stat().st_size / 1024 / 1024:.0f} MB, {count:,} messages\n")
+
+        print(f"{'reader':<14}{'N':>8}{'time':>12}{'peak mem':>12}")
+        for n in (10, 100, 1000, 10000):
+            elapsed, peak = measure(tail_lines, path, n)
+            print(f"{'tail_lines':<14}{n:>8}{elapsed * 1000:>10.2f}ms{peak:>10.1f}MB")
+
+        if not args.skip_full_read:
+            elapsed, peak = measure(full_read, path, 10)
+            print(f"{'full read':<14}{10:>8}{elapsed * 1000:>10.2f}ms{peak:>10.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Benchmark decoding of streamed provider responses.
+
+Replays the recorded streams in tests/fixtures/streams through an httpx
+response in network-sized chunks and reports events per second for each
+provider format, comparing the shared decoder in agentctl.providers.streaming
+with the old per-provider loop (`aiter_lines()` plus `json.loads` per line).
+Run once with and once without orjson installed to compare JSON backends.
+
+    python benchmarks/bench_stream_decode.py
+    python benchmarks/bench_stream_decode.py --repeat 500 --chunk-size 256
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from pathlib import Path
+
+import httpx
+
+from agentctl.providers import streaming
+from agentctl.providers.anthropic_provider import _NO_CONTENT_EVENTS
+from agentctl.providers.streaming import iter_ndjson, iter_sse
+
+FIXTURES = Path(__file__).parent.parent / "tests" / "fixtures" / "streams"
+
+
+def response(data: bytes, chunk_size: int) -> httpx.Response:
+    async def chunks():
+        for i in range(0, len(data), chunk_size):
+            yield data[i : i + chunk_size]
+
+    return httpx.Response(200, content=chunks())
+
+
+async def old_sse(resp: httpx.Response) -> int:
+    count = 0
+    async for line in resp.aiter_lines():
+        if line.startswith("data: ") and line.strip() != "data: [DONE]":
+            json.loads(line[6:])
+            count += 1
+    return count
+
+
+async def old_ndjson(resp: httpx.Response) -> int:
+    count = 0
+    async for line in resp.aiter_lines():
+        json.loads(line)
+        count += 1
+    return count
+
+
+async def new_anthropic(resp: httpx.Response) -> int:
+    return len([e async for e in iter_sse(resp.aiter_bytes(), skip=_NO_CONTENT_EVENTS)])
+
+
+async def new_openai(resp: httpx.Response) -> int:
+    return len([e async for e in iter_sse(resp.aiter_bytes())])
+
+
+async def new_ollama(resp: httpx.Response) -> int:
+    return len([e async for e in iter_ndjson(resp.aiter_bytes())])
+
+
+CASES = [
+    ("anthropic", "anthropic.sse", old_sse, new_anthropic),
+    ("openai", "openai.sse", old_sse, new_openai),
+    ("ollama", "ollama.ndjson", old_ndjson, new_ollama),
+]
+
+
+async def measure(decode, data: bytes, chunk_size: int, repeat: int) -> tuple[float, int]:
+    """Return (seconds, events in one stream) for `repeat` replays."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        events = await decode(response(data, chunk_size))
+    return time.perf_counter() - start, events
+
+
+async def run(repeat: int, chunk_size: int) -> None:
+    backend = "orjson" if streaming.loads.__module__ == "orjson" else "json"
+    print(f"JSON backend: {backend}, {chunk_size}-byte chunks, {repeat} replays\n")
+    print(f"{'provider':<11}{'decoder':<9}{'events':>8}{'time':>10}{'events/s':>12}")
+    for provider, fixture, old, new in CASES:
+        data = (FIXTURES / fixture).read_bytes()
+        total = data.count(b"\n\n") if fixture.endswith(".sse") else data.count(b"\n")
+        for name, decode in (("old", old), ("shared", new)):
+            elapsed, _ = await measure(decode, data, chunk_size, repeat)
+            # Rate over every event on the wire, including the ones skipped
+            rate = total * repeat / elapsed
+            print(f"{provider:<11}{name:<9}{total:>8}{elapsed:>9.2f}s{rate:>12,.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--chunk-size", type=int, default=1024)
+    args = parser.parse_args()
+    asyncio.run(run(args.repeat, args.chunk_size))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Benchmark rendering of a long streamed reply in `agentctl run`.
+
+Compares the incremental renderer in agentctl.render with the old loop that
+appended to a string and re-parsed the whole reply as Markdown on every
+chunk. The old loop is quadratic, so by default it only runs on the smaller
+sizes; the time it spends is CPU the terminal cannot spend keeping up.
+
+    python benchmarks/bench_stream_render.py                  # up to 100k tokens
+    python benchmarks/bench_stream_render.py --naive-max 5000   # the old loop takes ~100s at 5k
+"""
+
+import argparse
+import io
+import time
+
+from rich.console import Console
+from rich.live import Live
+from rich.markdown import Markdown
+
+from agentctl.render import MarkdownStream, RawStream
+
+PARAGRAPH = (
+    "The **scheduler** admits a request once a token bucket has capacity, "
+    "then retries throttled calls with `jittered` backoff. "
+)
+CODE = "```python\nfor attempt in range(retries):\n    await asyncio.sleep(delay)\n```\n\n"
+
+
+def make_chunks(tokens: int) -> list[str]:
+    """Roughly `tokens` chunks of one word each, as a provider would stream them."""
+    chunks: list[str] = []
+    section = 0
+    while len(chunks) < tokens:
+        section += 1
+        text = f"## Section {section}\n\n" + PARAGRAPH * 6 + "\n\n" + CODE + "- item\n- item\n\n"
+        chunks.extend(word + " " for word in text.split(" "))
+    return chunks[:tokens]
+
+
+def console() -> Console:
+    return Console(file=io.StringIO(), force_terminal=True, width=100)
+
+
+def naive(chunks: list[str]) -> None:
+    with Live(console=console(), refresh_per_second=10) as live:
+        collected = ""
+        for chunk in chunks:
+            collected += chunk
+            live.update(Markdown(collected))
+
+
+def incremental(chunks: list[str]) -> None:
+    with MarkdownStream(console()) as stream:
+        for chunk in chunks:
+            stream.feed(chunk)
+
+
+def raw(chunks: list[str]) -> None:
+    with RawStream(io.StringIO()) as stream:
+        for chunk in chunks:
+            stream.feed(chunk)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tokens", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--naive-max", type=int, default=2000, help="Largest size for the old loop")
+    args = parser.parse_args()
+
+    print(f"{'renderer':<14}{'tokens':>10}{'time':>12}{'chunks/s':>14}")
+    for tokens in args.tokens:
+        chunks = make_chunks(tokens)
+        for name, fn in (("naive", naive), ("incremental", incremental), ("raw", raw)):
+            if fn is naive and tokens > args.naive_max:
+                continue
+            start = time.perf_counter()
+            fn(chunks)
+            elapsed = time.perf_counter() - start
+            print(f"{name:<14}{tokens:>10,}{elapsed:>11.2f}s{tokens / elapsed:>14,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Shared setup for the benchmark suite.
+
+Every benchmark runs against a throwaway ~/.agentctl: HOME is pointed at a
+temporary directory before agentctl is imported, so its paths resolve there.
+The mock provider answers instantly (no TTFT, no token pacing) so what is
+measured is agentctl's own overhead; `run` is also measured through the real
+OpenAI provider against the local stub server replaying a recorded stream.
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+HOME = Path(tempfile.mkdtemp(prefix="agentctl-bench-"))
+os.environ["HOME"] = str(HOME)
+os.environ["AGENTCTL_NO_DAEMON"] = "1"
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pytest  # noqa: E402
+from click.testing import CliRunner  # noqa: E402
+
+from tests.stub_server import StubServer  # noqa: E402
+
+FIXTURES = Path(__file__).parent.parent / "tests" / "fixtures" / "streams"
+
+
+@pytest.fixture(scope="session", autouse=True)
+def stub_server():
+    """The stub server, and a config with the mock and stubbed OpenAI providers.
+
+    The response cache is off so every round reaches the provider.
+    """
+    with StubServer() as server:
+        server.streams["/v1/chat/completions"] = (FIXTURES / "openai.sse").read_bytes()
+        (HOME / ".agentctl").mkdir(exist_ok=True)
+        (HOME / ".agentctl" / "config.yaml").write_text(
+            "defaults:\n"
+            "  provider: mock\n"
+            "cache:\n"
+            "  enabled: false\n"
+            "providers:\n"
+            "  mock:\n"
+            "    default_model: mock\n"
+            "    extra:\n"
+            f"      fixture: {FIXTURES / 'openai.sse'}\n"
+            "  openai:\n"
+            "    api_key: test\n"
+            f"    endpoint: {server.url}\n"
+            "    default_model: gpt-4o\n"
+        )
+        yield server
+
+
+@pytest.fixture
+def cli():
+    """Run an agentctl command in this process; fails the benchmark on a non-zero exit."""
+    from agentctl.cli import main
+
+    runner = CliRunner()
+
+    def invoke(*args: str) -> str:
+        result = runner.invoke(main, list(args), env={"COLUMNS": "120"})
+        assert result.exit_code == 0, result.output
+        return result.output
+
+    return invoke
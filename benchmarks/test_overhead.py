@@ -0,0 +1,175 @@
+"""agentctl's own overhead, offline, as a pytest-benchmark suite.
+
+    pip install -e ".[dev,bench]"
+    pytest benchmarks --benchmark-autosave          # saves to .benchmarks/
+    pytest benchmarks --benchmark-compare --benchmark-compare-fail=mean:15%
+
+Each saved run is named after the commit it measured, so `--benchmark-compare`
+(the latest saved run by default, or `--benchmark-compare=0003`) shows what a
+change did, and `pytest-benchmark compare` lists runs side by side.
+"""
+
+import itertools
+import os
+import subprocess
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+SESSIONS = 1000
+SESSION_MESSAGES = 20_000
+LEDGER_ENTRIES = 50_000
+LEDGER_MONTH = "2026-01"
+MODELS = [f"mock:m{i}" for i in range(8)]
+
+
+# --- startup --------------------------------------------------------------
+
+
+@pytest.mark.benchmark(group="startup")
+@pytest.mark.parametrize("args", [("--version",), ("costs",)], ids=" ".join)
+def test_startup(benchmark, args):
+    command = [sys.executable, "-m", "agentctl.cli", *args]
+    benchmark.pedantic(
+        subprocess.run,
+        args=(command,),
+        kwargs={"capture_output": True, "check": True},
+        rounds=10,
+        warmup_rounds=1,
+    )
+
+
+# --- run ------------------------------------------------------------------
+
+
+@pytest.mark.benchmark(group="run")
+@pytest.mark.parametrize(
+    "args",
+    [
+        ("run", "mock", "hi"),
+        ("run", "--raw", "mock", "hi"),
+        ("run", "--no-stream", "mock", "hi"),
+        ("run", "-p", "openai", "gpt-4o", "hi"),
+    ],
+    ids=["markdown", "raw", "no-stream", "openai-stub"],
+)
+def test_run(benchmark, cli, args):
+    output = benchmark(cli, *args)
+    # Both providers replay the same recorded stream
+    assert "pooling" in output
+
+
+# --- compare --------------------------------------------------------------
+
+
+@pytest.mark.benchmark(group="compare")
+@pytest.mark.parametrize("stream", [False, True], ids=["panels", "live"])
+def test_compare_fan_out(benchmark, cli, stream):
+    args = ["compare", "hi", "--models", ",".join(MODELS)] + (["--stream"] if stream else [])
+    benchmark(cli, *args)
+
+
+# --- costs ----------------------------------------------------------------
+
+
+@pytest.fixture(scope="module")
+def ledger():
+    from agentctl.ledger import record_costs
+
+    start = datetime.fromisoformat(f"{LEDGER_MONTH}-01")
+    entries = [
+        {
+            "timestamp": (start + timedelta(seconds=i * 50)).isoformat(),
+            "model": f"model-{i % 7}",
+            "provider": ("anthropic", "openai", "ollama")[i % 3],
+            "input_tokens": 100 + i % 900,
+            "output_tokens": 50 + i % 400,
+            "cost": 0.001 * (i % 13),
+            "session": f"session-{i % 40}",
+        }
+        for i in range(LEDGER_ENTRIES)
+    ]
+    for i in range(0, len(entries), 5000):
+        record_costs(entries[i : i + 5000])
+
+
+@pytest.mark.benchmark(group="costs")
+@pytest.mark.parametrize("by", ["model", "day", "session"])
+def test_costs_aggregation(benchmark, cli, ledger, by):
+    output = benchmark(cli, "costs", "--month", LEDGER_MONTH, "--by", by)
+    assert "Total" in output
+
+
+# --- sessions -------------------------------------------------------------
+
+
+@pytest.fixture(scope="module")
+def sessions():
+    from agentctl.sessions import append_messages, create_session, list_sessions
+
+    for i in range(SESSIONS):
+        create_session(f"bench-{i:04d}", provider="mock", model="mock")
+        append_messages(
+            f"bench-{i:04d}", [{"role": "user", "content": "hi"}], fsync=False
+        )
+    create_session("bench-long", provider="mock", model="mock")
+    records = [
+        {"role": ("user", "assistant")[i % 2], "content": f"message {i} " + "x" * 200}
+        for i in range(SESSION_MESSAGES)
+    ]
+    for i in range(0, len(records), 1000):
+        append_messages("bench-long", records[i : i + 1000], fsync=False)
+    list_sessions()  # build the index
+
+
+@pytest.mark.benchmark(group="sessions")
+def test_logs_last(benchmark, cli, sessions):
+    output = benchmark(cli, "logs", "bench-long", "--last", "50")
+    assert f"message {SESSION_MESSAGES - 1}" in output
+
+
+@pytest.fixture(scope="module")
+def follower(sessions):
+    """An `agentctl logs --follow` process, following a session of its own."""
+    from agentctl.sessions import create_session
+
+    create_session("bench-follow", provider="mock", model="mock")
+    process = subprocess.Popen(
+        [sys.executable, "-m", "agentctl.cli", "logs", "bench-follow", "--follow", "--last", "0"],
+        stdout=subprocess.PIPE,
+        text=True,
+        env={**os.environ, "PYTHONUNBUFFERED": "1", "COLUMNS": "200"},
+    )
+    while "Following" not in process.stdout.readline():
+        pass
+    yield process
+    process.terminate()
+    process.wait()
+
+
+@pytest.mark.benchmark(group="sessions")
+def test_logs_follow_latency(benchmark, follower):
+    """Time from appending a message to `logs --follow` printing it."""
+    from agentctl.sessions import append_messages
+
+    seq = itertools.count()
+
+    def append_and_wait():
+        content = f"followed {next(seq)}"
+        append_messages("bench-follow", [{"role": "user", "content": content}], fsync=False)
+        while content not in follower.stdout.readline():
+            pass
+
+    benchmark.pedantic(append_and_wait, rounds=50, warmup_rounds=2)
+
+
+@pytest.mark.benchmark(group="sessions")
+@pytest.mark.parametrize(
+    "args", [(), ("--sort", "last_active", "--limit", "20")], ids=["all", "top"]
+)
+def test_session_list(benchmark, cli, sessions, args):
+    output = benchmark(cli, "session", "list", *args)
+    assert "bench-" in output
@@ -0,0 +1,190 @@
+"""A local HTTP/1.1 stub that imitates the provider chat endpoints.
+
+Counts accepted TCP connections so tests can assert on connection reuse, and
+can inject throttling or server errors: queue `(status, headers)` pairs on
+`server.faults` and the next requests are answered with them.
+
+Requests that mark a prompt as cacheable (Anthropic `cache_control`, OpenAI
+`prompt_cache_key`) get prompt cache usage back, as on a cache hit.
+
+Set `server.streams[path]` to the bytes of a recorded stream (see
+tests/fixtures/streams) to answer streaming requests to that endpoint with
+it, and `server.delay` to hold every answer back by that many seconds.
+
+Ollama's model management is imitated too: `/api/pull` streams download
+progress (or an error for a model named "missing") and `/api/generate`
+without a prompt answers as if it had loaded or unloaded the model.
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+REPLY = "Hello from the stub."
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        with self.server.lock:
+            self.server.requests += 1
+            self.server.last_payload = payload
+            fault = self.server.faults.pop(0) if self.server.faults else None
+
+        if self.server.delay:
+            time.sleep(self.server.delay)
+        if fault is not None:
+            status, headers = fault
+            self._send_json({"error": {"type": "injected", "status": status}}, status, headers)
+            return
+
+        if payload.get("stream"):
+            self._send_stream(payload)
+            return
+        if self.path == "/api/pull":
+            self._send_pull(payload["model"])
+            return
+
+        if self.path == "/v1/messages":
+            body = {
+                "content": [{"type": "text", "text": REPLY}],
+                "usage": {"input_tokens": 10, "output_tokens": 5, **_anthropic_cache(payload)},
+            }
+        elif self.path == "/v1/chat/completions":
+            body = {
+                "choices": [{"message": {"role": "assistant", "content": REPLY}}],
+                "usage": {"prompt_tokens": 10, "completion_tokens": 5, **_openai_cache(payload)},
+            }
+        elif self.path == "/api/chat":
+            body = {
+                "model": payload.get("model"),
+                "message": {"role": "assistant", "content": REPLY},
+                "prompt_eval_count": 10,
+                "eval_count": 5,
+            }
+        elif self.path == "/api/generate":
+            unload = payload.get("keep_alive") == 0
+            body = {"model": payload.get("model"), "response": "", "done": True}
+            body["done_reason"] = "unload" if unload else "load"
+        else:
+            self.send_error(404)
+            return
+        self._send_json(body)
+
+    def do_GET(self):
+        if self.path == "/api/tags":
+            self._send_json({"models": [{"name": "stub:latest"}]})
+        else:
+            self.send_error(404)
+
+    def _send_stream(self, payload: dict):
+        """Answer a streaming request with REPLY word by word, then usage."""
+        words = [w + " " for w in REPLY.split(" ")[:-1]] + [REPLY.split(" ")[-1]]
+        if self.path in self.server.streams:
+            lines = [self.server.streams[self.path].decode()]
+        elif self.path == "/v1/messages":
+            usage = {"input_tokens": 10, **_anthropic_cache(payload)}
+            events = [{"type": "message_start", "message": {"usage": usage}}]
+            events += [{"type": "content_block_delta", "delta": {"text": w}} for w in words]
+            events += [{"type": "message_delta", "usage": {"output_tokens": 5}}]
+            events.insert(1, {"type": "ping"})
+            lines = [f"event: {e['type']}\ndata: {json.dumps(e)}\n\n" for e in events]
+        elif self.path == "/v1/chat/completions":
+            events = [{"choices": [{"delta": {"content": w}}]} for w in words]
+            if payload.get("stream_options", {}).get("include_usage"):
+                usage = {"prompt_tokens": 10, "completion_tokens": 5, **_openai_cache(payload)}
+                events.append({"choices": [], "usage": usage})
+            lines = [f"data: {json.dumps(e)}\n\n" for e in events] + ["data: [DONE]\n\n"]
+        elif self.path == "/api/chat":
+            events = [{"message": {"role": "assistant", "content": w}} for w in words]
+            events.append({"done": True, "prompt_eval_count": 10, "eval_count": 5})
+            lines = [json.dumps(e) + "\n" for e in events]
+        else:
+            self.send_error(404)
+            return
+        data = "".join(lines).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_pull(self, model: str):
+        """Answer /api/pull with the progress of two layers, as NDJSON."""
+        if model == "missing":
+            events = [{"status": "pulling manifest"}, {"error": "file does not exist"}]
+        else:
+            events = [{"status": "pulling manifest"}]
+            for digest, total in (("sha256:aa", 4000), ("sha256:bb", 1000)):
+                events += [
+                    {"status": "pulling", "digest": digest, "total": total, "completed": done}
+                    for done in (0, total // 2, total)
+                ]
+            events += [{"status": "verifying sha256 digest"}, {"status": "success"}]
+        data = "".join(json.dumps(e) + "\n" for e in events).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_json(self, body: dict, status: int = 200, headers: dict | None = None):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def _anthropic_cache(payload: dict) -> dict:
+    if "cache_control" not in json.dumps(payload):
+        return {}
+    return {"cache_read_input_tokens": 2000, "cache_creation_input_tokens": 100}
+
+
+def _openai_cache(payload: dict) -> dict:
+    if "prompt_cache_key" not in payload:
+        return {}
+    # OpenAI counts cached tokens within prompt_tokens
+    return {"prompt_tokens": 2010, "prompt_tokens_details": {"cached_tokens": 2000}}
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, handler=StubHandler):
+        super().__init__(("127.0.0.1", 0), handler)
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.requests = 0
+        self.last_payload: dict | None = None
+        self.faults: list[tuple[int, dict]] = []
+        self.streams: dict[str, bytes] = {}
+        self.delay = 0.0
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+        self.server_close()
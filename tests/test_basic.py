@@ -1,5 +1,6 @@
 """Basic tests for agentctl."""
 
+import os
 import subprocess
 import sys
 
@@ -47,3 +48,19 @@ def test_compare_help():
     r = run_cli("compare", "--help")
     assert r.returncode == 0
     assert "--models" in r.stdout
+
+
+def test_run_with_mock_provider(tmp_path):
+    (tmp_path / ".agentctl").mkdir()
+    (tmp_path / ".agentctl" / "config.yaml").write_text(
+        "defaults:\n  provider: mock\nproviders:\n  mock:\n    default_model: mock\n"
+        "    extra:\n      reply: Hello offline.\n"
+    )
+    r = subprocess.run(
+        [sys.executable, "-m", "agentctl.cli", "run", "--raw", "mock", "hi"],
+        capture_output=True, text=True, timeout=10,
+        env={**os.environ, "HOME": str(tmp_path), "AGENTCTL_NO_DAEMON": "1"},
+    )
+    assert r.returncode == 0, r.stderr
+    assert r.stdout.strip() == "Hello offline."
+    assert list((tmp_path / ".agentctl" / "costs").glob("*.jsonl"))
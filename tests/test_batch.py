@@ -0,0 +1,89 @@
+"""Tests for `agentctl batch` against the local stub server."""
+
+import json
+import os
+import subprocess
+import sys
+
+from tests.stub_server import StubServer
+
+
+def run_batch(home, *args: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, "-m", "agentctl.cli", "batch"] + list(args),
+        capture_output=True, text=True, timeout=30,
+        env={**os.environ, "HOME": str(home)},
+    )
+
+
+def write_config(home, url: str):
+    (home / ".agentctl").mkdir()
+    (home / ".agentctl" / "config.yaml").write_text(
+        f"providers:\n  ollama:\n    endpoint: {url}\n    default_model: stub\n"
+        "defaults:\n  provider: ollama\n"
+    )
+
+
+def test_batch_writes_results_in_input_order_and_resumes(tmp_path):
+    inp = tmp_path / "in.jsonl"
+    out = tmp_path / "out.jsonl"
+    inp.write_text(
+        "".join(json.dumps({"id": f"q{i}", "prompt": f"p{i}"}) + "\n" for i in range(20))
+    )
+
+    with StubServer() as server:
+        write_config(tmp_path, server.url)
+        r = run_batch(tmp_path, str(inp), "--out", str(out), "-j", "4")
+        assert r.returncode == 0, r.stderr
+
+        results = [json.loads(line) for line in out.read_text().splitlines()]
+        assert [r["id"] for r in results] == [f"q{i}" for i in range(20)]
+        assert all(r["output_tokens"] == 5 for r in results)
+
+        # Simulate a crash: keep 12 complete records plus a torn line
+        lines = out.read_text().splitlines(keepends=True)
+        out.write_text("".join(lines[:12]) + lines[12][:10])
+        requests_before = server.requests
+
+        r = run_batch(tmp_path, str(inp), "--out", str(out))
+        assert r.returncode == 0, r.stderr
+        assert server.requests - requests_before == 8
+
+    results = [json.loads(line) for line in out.read_text().splitlines()]
+    assert [r["index"] for r in results] == list(range(20))
+
+    ledger = list((tmp_path / ".agentctl" / "costs").glob("*.jsonl"))
+    assert sum(len(p.read_text().splitlines()) for p in ledger) == 28
+
+
+def test_bad_lines_and_failures_become_results_and_failures_are_retried(tmp_path):
+    inp = tmp_path / "in.jsonl"
+    out = tmp_path / "out.jsonl"
+    inp.write_text(
+        '{"prompt": "a"}\n{"prompt": \n[1, 2]\n{"prompt": "b"}\n'
+        '{"messages": [{"role": "user"}]}\n{"id": "x"}\n'
+    )
+
+    with StubServer() as server:
+        write_config(tmp_path, server.url)
+        server.faults.append((400, {}))  # the first request fails, not retried
+        r = run_batch(tmp_path, str(inp), "--out", str(out), "-j", "1")
+        assert r.returncode == 0, r.stderr
+
+        results = [json.loads(line) for line in out.read_text().splitlines()]
+        assert [r["index"] for r in results] == [0, 1, 2, 3, 4, 5]
+        assert "400" in results[0]["error"]
+        assert results[1]["error"].startswith("Invalid JSON on line 2")
+        assert results[2]["error"] == "Line 3 is not a JSON object"
+        assert results[3]["output_tokens"] == 5
+        assert results[4]["error"] == 'Line 5 has a message 1 without a "role" and "content" string'
+        assert results[5]["error"] == 'Line 6 has no "prompt" string or "messages" list'
+
+        r = run_batch(tmp_path, str(inp), "--out", str(out))
+        assert r.returncode == 0, r.stderr
+        assert "retrying 5 that failed" in r.stderr
+
+    # The retried results are put back in input order
+    results = [json.loads(line) for line in out.read_text().splitlines()]
+    assert [r["index"] for r in results] == [0, 1, 2, 3, 4, 5]
+    assert results[0]["output_tokens"] == 5 and "error" in results[1] and "error" in results[2]
@@ -0,0 +1,84 @@
+"""Tests for the on-disk response cache."""
+
+import asyncio
+import os
+
+from agentctl.cache import CachedProvider, ResponseCache
+from agentctl.providers import BaseProvider, Message, Response
+
+MESSAGES = [Message(role="user", content="hi")]
+
+
+class CountingProvider(BaseProvider):
+    name = "counting"
+
+    def __init__(self):
+        self.calls = 0
+
+    async def complete(self, messages, **kwargs):
+        self.calls += 1
+        return Response("answer", kwargs.get("model", "m"), self.name, 10, 5, 0.25, 100.0)
+
+    async def stream(self, messages, **kwargs):
+        yield "answer"
+
+    def list_models(self):
+        return []
+
+
+def test_deterministic_requests_hit_the_cache(tmp_path):
+    inner = CountingProvider()
+    provider = CachedProvider(inner, ResponseCache(tmp_path))
+
+    async def go():
+        first = await provider.complete(MESSAGES, model="m", temperature=0)
+        second = await provider.complete(MESSAGES, model="m", temperature=0)
+        await provider.complete(MESSAGES, model="m", temperature=0.7)  # not cached by default
+        await provider.complete(MESSAGES, model="other", temperature=0)  # different key
+        return first, second
+
+    first, second = asyncio.run(go())
+    assert inner.calls == 3
+    assert first.cost == 0.25 and not first.metadata.get("cache_hit")
+    assert second.cost == 0.0
+    assert second.metadata == {"cache_hit": True, "original_cost": 0.25}
+    assert (second.input_tokens, second.output_tokens) == (10, 5)
+
+
+def test_prune_evicts_least_recently_used(tmp_path):
+    cache = ResponseCache(tmp_path)
+    keys = [cache.key("p", "m", [Message(role="user", content=str(i))]) for i in range(3)]
+    for age, key in zip((300, 200, 100), keys):
+        cache.put(key, Response("x" * 100, "m", "p"))
+        path = cache._path(key)
+        os.utime(path, (path.stat().st_atime, path.stat().st_mtime - age))
+
+    assert cache.get(keys[0]) is not None  # touch the oldest entry
+    entry_size = cache._path(keys[0]).stat().st_size
+    removed, _ = cache.prune(max_bytes=2 * entry_size)
+
+    assert removed == 1
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) is not None and cache.get(keys[2]) is not None
+
+
+def test_vanished_and_unreadable_entries_are_misses(tmp_path, monkeypatch):
+    cache = ResponseCache(tmp_path)
+    keys = [cache.key("p", "m", [Message(role="user", content=str(i))]) for i in range(3)]
+    for key in keys:
+        cache.put(key, Response("x", "m", "p"))
+    cache._path(keys[0]).write_text("{not json")
+    cache._path(keys[1]).write_text('{"content": "x", "renamed_field": 1}')
+    assert cache.get(keys[0]) is None and cache.get(keys[1]) is None
+
+    # An entry evicted by another process between listing and stat()
+    glob = type(tmp_path).glob
+    vanished = cache._path(keys[2])
+
+    def glob_then_evict(self, pattern):
+        paths = list(glob(self, pattern))
+        vanished.unlink()
+        return paths
+
+    monkeypatch.setattr(type(tmp_path), "glob", glob_then_evict)
+    assert cache.stats()["entries"] == 2
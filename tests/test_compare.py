@@ -0,0 +1,85 @@
+"""compare: models are queried concurrently, within --max-concurrency."""
+
+import asyncio
+import time
+
+import pytest
+from click.testing import CliRunner
+
+from agentctl import config, metrics
+from agentctl.commands.compare import compare
+from agentctl.providers.mock import MockProvider
+
+DELAY = 0.3
+MODELS = "mock:a,mock:b,mock:c,mock:d"
+
+
+@pytest.fixture
+def calls(tmp_path, monkeypatch):
+    """Mock requests take DELAY seconds, model "broken" fails; tracks calls in flight."""
+    (tmp_path / "config.yaml").write_text(
+        "providers:\n  mock: {}\ncosts:\n  track: false\ncache:\n  enabled: false\n"
+    )
+    monkeypatch.setattr(config, "CONFIG_FILE", tmp_path / "config.yaml")
+    monkeypatch.setattr(config, "CONFIG_SNAPSHOT", tmp_path / "config.pickle")
+    monkeypatch.setattr(config, "_loaded", None)
+    monkeypatch.setattr(config, "_instances", {})
+    monkeypatch.setattr(metrics, "METRICS_DIR", tmp_path / "metrics")
+
+    state = {"in_flight": 0, "peak": 0}
+    complete, stream = MockProvider.complete, MockProvider.stream
+
+    async def start(model: str):
+        state["in_flight"] += 1
+        state["peak"] = max(state["peak"], state["in_flight"])
+        await asyncio.sleep(DELAY)
+        if model == "broken":
+            raise RuntimeError("no such model")
+
+    async def slow_complete(self, messages, **kwargs):
+        try:
+            await start(kwargs["model"])
+            return await complete(self, messages, **kwargs)
+        finally:
+            state["in_flight"] -= 1
+
+    async def slow_stream(self, messages, **kwargs):
+        try:
+            await start(kwargs["model"])
+            async for chunk in stream(self, messages, **kwargs):
+                yield chunk
+        finally:
+            state["in_flight"] -= 1
+
+    monkeypatch.setattr(MockProvider, "complete", slow_complete)
+    monkeypatch.setattr(MockProvider, "stream", slow_stream)
+    return state
+
+
+def run_compare(*args: str) -> tuple[str, float]:
+    start = time.monotonic()
+    result = CliRunner().invoke(compare, ["hi", *args])
+    assert result.exit_code == 0, result.output
+    return result.output, time.monotonic() - start
+
+
+@pytest.mark.parametrize("stream", [False, True], ids=["panels", "live"])
+def test_models_are_queried_concurrently(calls, stream):
+    output, elapsed = run_compare("--models", MODELS, *(["--stream"] if stream else []))
+    assert calls["peak"] == 4
+    assert elapsed < 2 * DELAY  # about the slowest model, not the sum of all four
+    assert "Speedup" in output
+    # Time to first token is only measured, and only shown, when streaming
+    assert ("TTFT" in output) == stream
+
+
+def test_max_concurrency_caps_calls_in_flight(calls):
+    _, elapsed = run_compare("--models", MODELS, "-j", "2")
+    assert calls["peak"] == 2
+    assert elapsed >= 2 * DELAY
+
+
+def test_a_failing_model_does_not_cancel_the_others(calls):
+    output, _ = run_compare("--models", "mock:a,mock:broken,mock:b")
+    assert "Error with mock:broken: no such model" in output
+    assert output.count("Error with") == 1 and "Comparison Summary" in output
@@ -0,0 +1,77 @@
+"""Tests for config loading, its snapshot cache and the provider factory."""
+
+import asyncio
+import os
+import pickle
+
+import pytest
+
+from agentctl import config
+from agentctl.config import AgentctlConfig, ProviderConfig
+from agentctl.providers.mock import MockProvider
+
+
+@pytest.fixture(autouse=True)
+def config_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "AGENTCTL_DIR", tmp_path)
+    monkeypatch.setattr(config, "CONFIG_FILE", tmp_path / "config.yaml")
+    monkeypatch.setattr(config, "CONFIG_SNAPSHOT", tmp_path / "config.pickle")
+    monkeypatch.setattr(config, "_loaded", None)
+    return tmp_path
+
+
+def test_snapshot_is_used_until_the_file_changes(config_dir):
+    path = config_dir / "config.yaml"
+    path.write_text("defaults:\n  provider: openai\n")
+    assert AgentctlConfig.load().defaults.provider == "openai"
+
+    # A new process: no in-memory copy, the snapshot answers without parsing
+    config._loaded = None
+    key, snapshot = pickle.loads((config_dir / "config.pickle").read_bytes())
+    snapshot.defaults.temperature = 0.1
+    (config_dir / "config.pickle").write_bytes(pickle.dumps((key, snapshot)))
+    assert AgentctlConfig.load().defaults.temperature == 0.1
+
+    path.write_text("defaults:\n  provider: ollama\n")
+    os.utime(path, ns=(0, 1))
+    config._loaded = None
+    loaded = AgentctlConfig.load()
+    assert loaded.defaults.provider == "ollama" and loaded.defaults.temperature == 0.7
+
+
+def test_a_broken_snapshot_falls_back_to_the_yaml(config_dir):
+    (config_dir / "config.yaml").write_text("defaults:\n  provider: openai\n")
+    (config_dir / "config.pickle").write_bytes(b"not a pickle")
+    assert AgentctlConfig.load().defaults.provider == "openai"
+
+
+def test_save_replaces_the_file_atomically(config_dir):
+    path = config_dir / "config.yaml"
+    path.write_text("defaults:\n  provider: openai\n")
+    path.chmod(0o600)
+    inode = path.stat().st_ino
+
+    cfg = AgentctlConfig.load()
+    cfg.providers["ollama"] = ProviderConfig(endpoint="http://gpu:11434")
+    cfg.save()
+
+    assert path.stat().st_ino != inode and path.stat().st_mode & 0o777 == 0o600
+    assert not list(config_dir.glob("*.tmp"))
+    assert AgentctlConfig.load().providers["ollama"].endpoint == "http://gpu:11434"
+
+
+def test_providers_are_shared_until_the_last_user_closes_them(monkeypatch):
+    monkeypatch.setattr(config, "_instances", {})
+    pcfg = ProviderConfig(extra={"reply": "hi"})
+
+    first = pcfg.create(MockProvider)
+    assert pcfg.create(MockProvider) is first
+    assert ProviderConfig(extra={"reply": "bye"}).create(MockProvider) is not first
+
+    closed = []
+    monkeypatch.setattr(first.inner, "aclose", lambda: asyncio.sleep(0, closed.append(1)))
+    asyncio.run(first.aclose())
+    assert not closed
+    asyncio.run(first.aclose())
+    assert closed == [1]
+    assert pcfg.create(MockProvider) is not first
@@ -0,0 +1,83 @@
+"""Tests for fitting session history into the context window."""
+
+import asyncio
+
+import pytest
+
+from agentctl.context import ContextManager, ContextPolicy, context_window
+from agentctl.providers import BaseProvider, Response
+
+
+class Summarizer(BaseProvider):
+    name = "fake"
+
+    def __init__(self):
+        self.calls = []
+
+    async def complete(self, messages, **kwargs):
+        self.calls.append(messages)
+        return Response(content="summary " * 20, model="m", provider="fake", output_tokens=40)
+
+    async def stream(self, messages, **kwargs):
+        yield ""
+
+    def list_models(self):
+        return []
+
+
+def _turns(n):
+    for i in range(n):
+        yield {"role": "user", "content": f"question {i} " + "x" * 400}
+        yield {"role": "assistant", "content": f"answer {i} " + "y" * 800, "tokens": 200}
+
+
+def test_context_window_prefers_the_longest_match():
+    assert context_window("gpt-4o-mini") == 128_000
+    assert context_window("gpt-4-0613") == 8_192
+    assert context_window("claude-sonnet-4-20250514") == 200_000
+    assert context_window("something-else") == 8_192
+
+
+@pytest.mark.parametrize("strategy", ["sliding", "last_k", "summarize"])
+def test_input_stays_within_budget_as_the_session_grows(strategy):
+    provider = Summarizer()
+    policy = ContextPolicy(strategy=strategy, budget=3000, keep_last=6)
+    context = ContextManager(provider, policy)
+    history = []
+
+    async def converse():
+        plans = []
+        for record in _turns(100):
+            history.append(record)
+            if record["role"] == "user":
+                plans.append(await context.prepare("Be brief.", history))
+        return plans
+
+    plans = asyncio.run(converse())
+    assert max(plan.tokens for plan in plans) <= 3000
+    last = plans[-1]
+    assert last.messages[0].role == "system" and last.messages[0].content.startswith("Be brief.")
+    assert last.messages[1].role == "user"
+    assert last.messages[-1].content.startswith("question 99")
+    if strategy == "last_k":
+        assert len(last.messages) == 1 + 5  # the window is moved up to a user message
+    if strategy == "summarize":
+        assert "Summary of the earlier conversation" in last.messages[0].content
+        assert last.summarized == last.dropped > 0
+        # Folding runs every few turns, not every turn
+        assert 0 < len(provider.calls) <= 100 // 3
+        # ...and each call stays within the budget too
+        for call in provider.calls:
+            assert sum(len(m.content) for m in call) // 4 <= 3000
+
+
+def test_summary_is_discarded_when_the_history_changes():
+    context = ContextManager(Summarizer(), ContextPolicy(strategy="summarize", budget=2000))
+    history = list(_turns(30))
+    asyncio.run(context.prepare(None, history))
+    summary = context.summary
+    assert summary and 0 < summary["upto"] < len(history)
+
+    # e.g. after `session restore`, the same position holds another message
+    history[summary["upto"] - 1] = {"role": "assistant", "content": "different"}
+    assert context._valid_summary(history) is None
@@ -0,0 +1,98 @@
+"""`agentctl daemon` serves forwarded commands from one warm process."""
+
+import os
+import subprocess
+import sys
+import time
+
+from tests.stub_server import REPLY, StubServer
+
+
+def cli(home, *args: str, **env) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, "-m", "agentctl.cli", *args],
+        capture_output=True, text=True, timeout=30,
+        env={**os.environ, "HOME": str(home), **env},
+    )
+
+
+def write_config(home, url: str):
+    (home / ".agentctl").mkdir()
+    (home / ".agentctl" / "config.yaml").write_text(
+        f"providers:\n  ollama:\n    endpoint: {url}\n    default_model: stub\n"
+        "defaults:\n  provider: ollama\n"
+    )
+
+
+def test_forwarded_commands_share_the_daemon_connection_pool(tmp_path):
+    with StubServer() as server:
+        write_config(tmp_path, server.url)
+        daemon = subprocess.Popen(
+            [sys.executable, "-m", "agentctl.daemon"],
+            env={**os.environ, "HOME": str(tmp_path)},
+        )
+        try:
+            deadline = time.monotonic() + 10
+            while cli(tmp_path, "daemon", "status").returncode != 0:
+                assert time.monotonic() < deadline, "daemon did not start"
+                time.sleep(0.1)
+
+            for _ in range(3):
+                r = cli(tmp_path, "run", "stub", "hello")
+                assert r.returncode == 0, r.stderr
+                assert REPLY in r.stdout
+
+            r = cli(tmp_path, "costs", "--format", "json")
+            assert '"calls": 3' in r.stdout
+            assert cli(tmp_path, "costs", "--month", "bad").returncode == 2
+
+            status = cli(tmp_path, "daemon", "status").stdout
+            assert "Requests served: 5" in status
+            # Three processes, one TCP connection: the pool lives in the daemon
+            assert server.connections == 1
+
+            # Bypassing the daemon runs in process with its own connection
+            r = cli(tmp_path, "run", "stub", "hello", AGENTCTL_NO_DAEMON="1")
+            assert r.returncode == 0 and server.connections == 2
+
+            assert cli(tmp_path, "daemon", "stop").returncode == 0
+            daemon.wait(timeout=10)
+        finally:
+            daemon.kill()
+
+        # A stale socket left behind falls back to running in process
+        (tmp_path / ".agentctl" / "daemon.sock").touch()
+        r = cli(tmp_path, "run", "stub", "hello")
+        assert r.returncode == 0 and REPLY in r.stdout
+
+
+def test_socket_is_private_and_refusals_fall_back_to_running_in_process(
+    tmp_path, monkeypatch, capsys
+):
+    import json
+    import socket
+    import stat
+    import threading
+
+    from agentctl import daemon
+
+    monkeypatch.setattr(daemon, "DAEMON_SOCKET", tmp_path / "d.sock")
+    listener = daemon._listen()
+
+    def refuse():
+        conn, _ = listener.accept()
+        with conn:
+            _, fds, _, _ = socket.recv_fds(conn, 65536, 3)
+            for fd in fds:
+                os.close(fd)
+            conn.sendall(json.dumps({"error": "busy"}).encode() + b"\n")
+
+    thread = threading.Thread(target=refuse)
+    thread.start()
+    try:
+        assert stat.S_IMODE(os.stat(tmp_path / "d.sock").st_mode) == 0o600
+        assert daemon.forward(["run", "hi"]) is None
+        assert "refused the command (busy)" in capsys.readouterr().err
+    finally:
+        thread.join(timeout=5)
+        listener.close()
@@ -0,0 +1,86 @@
+"""Tests for the cost ledger and its rollups."""
+
+import json
+
+import pytest
+
+from agentctl import ledger
+
+
+@pytest.fixture(autouse=True)
+def costs_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(ledger, "COSTS_DIR", tmp_path)
+    return tmp_path
+
+
+def _entry(day: str, model: str, cost: float, **extra) -> dict:
+    return {
+        "timestamp": f"2026-03-{day}T12:00:00",
+        "model": model,
+        "provider": "openai",
+        "input_tokens": 10,
+        "output_tokens": 5,
+        "cost": cost,
+        **extra,
+    }
+
+
+def _raw_totals(month: str) -> dict:
+    groups = {}
+    ledger._fold(groups, ledger.iter_records(month))
+    return groups
+
+
+def test_rollup_matches_ledger():
+    ledger.record_costs([_entry("01", "a", 0.5), _entry("01", "b", 0.25)])
+    ledger.record_costs([_entry("02", "a", 1.0, cache_hit=True, saved=1.0)])
+
+    groups = ledger.load_rollup("2026-03")
+    assert groups == _raw_totals("2026-03")
+    assert groups[("2026-03-01", "openai", "a")].cost == 0.5
+    assert groups[("2026-03-02", "openai", "a")].cache_hits == 1
+
+
+def test_rollup_catches_up_with_external_appends(costs_dir):
+    ledger.record_costs([_entry("01", "a", 0.5)])
+    # An older writer appends without touching the rollup, and leaves a torn line
+    with open(costs_dir / "2026-03.jsonl", "a") as f:
+        f.write(json.dumps(_entry("03", "a", 2.0)) + "\n")
+        f.write('{"timestamp": "2026-03-0')
+
+    groups = ledger.load_rollup("2026-03")
+    assert sum(t.cost for t in groups.values()) == 2.5
+
+    ledger.record_costs([_entry("04", "a", 1.0)])
+    assert ledger.load_rollup("2026-03") == _raw_totals("2026-03")
+    assert sum(t.calls for t in ledger.load_rollup("2026-03").values()) == 3
+
+
+def test_reindex_rebuilds_after_rewrite(costs_dir):
+    ledger.record_costs([_entry("01", "a", 0.5), _entry("02", "a", 0.5)])
+    ledger.load_rollup("2026-03")
+    (costs_dir / "2026-03.jsonl").write_text(json.dumps(_entry("05", "b", 3.0)) + "\n")
+
+    # Shrunk behind the rollup's back: rebuilt on read
+    assert list(ledger.load_rollup("2026-03")) == [("2026-03-05", "openai", "b")]
+    assert ledger.reindex("2026-03") == _raw_totals("2026-03")
+
+
+def test_ranges_span_months_and_skip_files_outside(costs_dir, monkeypatch):
+    ledger.record_costs(
+        [
+            {**_entry("31", "a", 1.0), "timestamp": "2026-01-31T23:00:00"},
+            _entry("01", "a", 2.0),
+            {**_entry("01", "a", 4.0), "timestamp": "2026-04-01T00:00:00"},
+        ]
+    )
+    opened = []
+    real_iter = ledger.iter_records
+    monkeypatch.setattr(ledger, "iter_records", lambda m: opened.append(m) or real_iter(m))
+
+    costs = [e["cost"] for e in ledger.records_between("2026-02-01", "2026-03-31")]
+    assert costs == [2.0]
+    assert opened == ["2026-03"]
+
+    rows = dict(ledger.rollups_between("2026-01-31", None))
+    assert sorted(key[0] for key in rows) == ["2026-01-31", "2026-03-01", "2026-04-01"]
@@ -0,0 +1,98 @@
+"""Tests for the request metrics store and `agentctl stats`."""
+
+import asyncio
+import json
+import random
+import time
+
+import pytest
+from click.testing import CliRunner
+
+from agentctl import metrics
+from agentctl.commands.stats import stats
+from agentctl.metrics import RECORD, QuantileSketch
+from agentctl.providers import Message, get_provider
+from agentctl.providers.scheduler import RateLimitPolicy, ScheduledProvider, scheduler
+
+from tests.stub_server import REPLY, StubServer
+
+MESSAGES = [Message(role="user", content="hi")]
+
+
+@pytest.fixture(autouse=True)
+def metrics_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, "METRICS_DIR", tmp_path)
+    scheduler.reset()
+    yield tmp_path
+    scheduler.reset()
+
+
+def test_sketch_quantiles_are_within_relative_error():
+    rng = random.Random(7)
+    values = [rng.lognormvariate(6, 1) for _ in range(20_000)]
+    halves = QuantileSketch(), QuantileSketch()
+    for i, value in enumerate(values):
+        halves[i % 2].add(value)
+    sketch = QuantileSketch.from_dict(json.loads(json.dumps(halves[0].to_dict())))
+    sketch.merge(halves[1])
+
+    values.sort()
+    for q in (0.5, 0.9, 0.99):
+        exact = values[int(q * (len(values) - 1))]
+        assert sketch.quantile(q) == pytest.approx(exact, rel=0.011)
+    assert QuantileSketch().quantile(0.5) is None
+    # ~1% buckets: a few hundred of them cover six orders of magnitude
+    assert len(sketch.bins) < 800
+
+
+def test_scheduled_calls_are_recorded(metrics_dir):
+    async def go(url):
+        inner = get_provider("openai")(api_key="test", endpoint=url)
+        policy = RateLimitPolicy(max_retries=0)
+        async with ScheduledProvider(inner, policy) as instance:
+            await instance.complete(MESSAGES, model="gpt-4o")
+            reply = instance.stream_response(MESSAGES, model="gpt-4o")
+            async for _ in reply:
+                pass
+            with pytest.raises(Exception):
+                await instance.complete(MESSAGES, model="gpt-4o")
+
+    with StubServer() as server:
+        server.faults = [None, None, (503, {})]
+        asyncio.run(go(server.url))
+
+    files = list(metrics_dir.glob("*.bin"))
+    assert len(files) == 1 and files[0].stat().st_size == 3 * RECORD.size
+    day = files[0].stem
+    plain, streamed, failed = metrics.iter_samples(day)
+    assert plain[2] != plain[2]  # no time to first token without streaming
+    assert 0 < streamed[2] <= streamed[1]
+    assert streamed[9] & metrics.FLAG_STREAM
+    assert plain[4] == len("hi") and plain[5] == streamed[5] == len(REPLY.encode())
+    assert (plain[7], failed[7]) == (200, 503)
+
+    (key, series), = metrics.query(time.time() - 60).items()
+    assert key == ("openai", "gpt-4o")
+    assert (series.requests, series.errors) == (3, 1)
+    assert series.latency_ms.count == 2 and series.ttft_ms.count == 1
+
+
+def test_stats_reads_rollups_and_scans_partial_days(metrics_dir):
+    now = time.time()
+    for i in range(500):
+        metrics.record("anthropic", "claude-sonnet-4", 100.0 + i, at=now - 3 * 86400 + i)
+        metrics.record("ollama", "llama3.1", 20.0, ttft_ms=5.0, stream=True, at=now - i)
+
+    runner = CliRunner()
+    result = runner.invoke(stats, ["--since", "30d", "--format", "json"])
+    assert result.exit_code == 0, result.output
+    rows = {row["model"]: row for row in json.loads(result.output)}
+    assert rows["claude-sonnet-4"]["requests"] == 500
+    assert rows["claude-sonnet-4"]["latency_ms"]["p50"] == pytest.approx(350, rel=0.011)
+    assert rows["llama3.1"]["ttft_ms"]["p99"] == pytest.approx(5.0, rel=0.011)
+    assert list(metrics_dir.glob("*.rollup.json"))
+
+    result = runner.invoke(stats, ["--since", "1h", "-p", "ollama"], env={"COLUMNS": "200"})
+    assert result.exit_code == 0 and "llama3.1" in result.output
+    assert "claude" not in result.output
+    assert runner.invoke(stats, ["--since", "soon"]).exit_code == 2
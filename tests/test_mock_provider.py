@@ -0,0 +1,85 @@
+"""The mock provider: replayed streams, pacing and injected errors."""
+
+import asyncio
+import time
+from pathlib import Path
+
+import httpx
+import pytest
+
+from agentctl import metrics
+from agentctl.providers import Message, get_provider
+from agentctl.providers.mock import MockProvider
+from agentctl.providers.scheduler import RateLimitPolicy, ScheduledProvider, scheduler
+
+from tests.stub_server import StubServer
+
+FIXTURES = Path(__file__).parent / "fixtures" / "streams"
+MESSAGES = [Message(role="user", content="hi")]
+ENDPOINTS = {
+    "anthropic": ("anthropic.sse", "/v1/messages"),
+    "openai": ("openai.sse", "/v1/chat/completions"),
+    "ollama": ("ollama.ndjson", "/api/chat"),
+}
+
+
+@pytest.fixture(autouse=True)
+def isolated(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, "METRICS_DIR", tmp_path)
+    scheduler.reset()
+    yield
+    scheduler.reset()
+
+
+def _collect(provider, **kwargs):
+    async def go():
+        reply = provider.stream_response(MESSAGES, model="m", **kwargs)
+        chunks = [chunk async for chunk in reply]
+        return chunks, reply
+
+    return asyncio.run(go())
+
+
+@pytest.mark.parametrize("provider", sorted(ENDPOINTS))
+def test_replays_what_the_real_provider_decodes(provider):
+    fixture, path = ENDPOINTS[provider]
+    mock = MockProvider(fixture=FIXTURES / fixture)
+
+    async def real(url):
+        async with get_provider(provider)(api_key="test", endpoint=url) as instance:
+            reply = instance.stream_response(MESSAGES, model="m")
+            return [chunk async for chunk in reply], reply.response
+
+    with StubServer() as server:
+        server.streams[path] = (FIXTURES / fixture).read_bytes()
+        chunks, response = asyncio.run(real(server.url))
+
+    replayed, reply = _collect(mock)
+    assert "".join(replayed) == "".join(chunks) == response.content
+    assert reply.response.output_tokens == response.output_tokens
+
+
+def test_paces_the_first_token_and_the_rest():
+    mock = MockProvider(reply="one two three four five six seven eight", ttft_ms=50, token_rate=100)
+    start = time.monotonic()
+    chunks, reply = _collect(mock)
+    elapsed = time.monotonic() - start
+
+    assert len(chunks) == 8 and reply.ttft_ms >= 50
+    assert 0.05 + 7 / 100 <= elapsed < 1.0
+    assert reply.response.provider == "mock" and reply.response.cost == 0.0
+    assert not reply.response.metadata.get("unpriced")
+
+
+def test_injected_errors_are_retried_by_the_scheduler():
+    mock = MockProvider(error_rate=0.5, error_status=529, seed=3)
+    policy = RateLimitPolicy(max_retries=10, backoff_base=0.001, backoff_max=0.005)
+    response = asyncio.run(ScheduledProvider(mock, policy).complete(MESSAGES, model="m"))
+    assert response.metadata["retries"] == mock.requests - 1 > 0
+
+    # Limits are kept per provider and model: another model gets the new policy
+    failing = MockProvider(error_rate=1.0)
+    policy = RateLimitPolicy(max_retries=2, backoff_base=0.001, backoff_max=0.005)
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(ScheduledProvider(failing, policy).complete(MESSAGES, model="m2"))
+    assert failing.requests == 3
@@ -0,0 +1,84 @@
+"""Ollama model management: pulls, warm-up, unloading and keep_alive."""
+
+import asyncio
+
+import pytest
+from click.testing import CliRunner
+
+from agentctl import config
+from agentctl.cli import main
+from agentctl.providers import Message
+from agentctl.providers import ollama
+from agentctl.providers.ollama import OllamaProvider
+
+from tests.stub_server import StubServer
+
+MESSAGES = [Message(role="user", content="hi")]
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    monkeypatch.setattr(ollama, "_models_cache", {})
+    with StubServer() as server:
+        (tmp_path / "config.yaml").write_text(
+            f"providers:\n  ollama:\n    endpoint: {server.url}\n"
+        )
+        monkeypatch.setattr(config, "CONFIG_FILE", tmp_path / "config.yaml")
+        monkeypatch.setattr(config, "CONFIG_SNAPSHOT", tmp_path / "config.pickle")
+        monkeypatch.setattr(config, "_loaded", None)
+        yield server
+
+
+def test_keep_alive_per_provider_and_per_request(server):
+    async def go():
+        async with OllamaProvider(endpoint=server.url, keep_alive="30m") as provider:
+            await provider.complete(MESSAGES, model="m")
+            assert server.last_payload["keep_alive"] == "30m"
+            await provider.complete(MESSAGES, model="m", keep_alive="-1")
+            assert server.last_payload["keep_alive"] == -1
+        async with OllamaProvider(endpoint=server.url) as provider:
+            await provider.complete(MESSAGES, model="m")
+            assert "keep_alive" not in server.last_payload
+
+    asyncio.run(go())
+
+
+def test_model_list_is_reused_for_a_while(server):
+    async def models():
+        async with OllamaProvider(endpoint=server.url) as provider:
+            return await provider.list_models()
+
+    assert asyncio.run(models()) == ["stub:latest"]
+    server.shutdown()
+    assert asyncio.run(models()) == ["stub:latest"]
+
+
+def test_pull_warm_and_unload(server):
+    runner = CliRunner()
+
+    result = runner.invoke(main, ["models", "pull", "llama3.1:8b", "missing"])
+    assert result.exit_code == 1
+    assert "✓ llama3.1:8b pulled" in result.output
+    assert "✗ missing: Pulling missing: file does not exist" in result.output
+
+    result = runner.invoke(main, ["models", "warm", "llama3.1:8b", "--keep-alive", "1h"])
+    assert result.exit_code == 0, result.output
+    assert "✓ llama3.1:8b loaded in" in result.output
+    assert server.last_payload == {"model": "llama3.1:8b", "keep_alive": "1h"}
+
+    result = runner.invoke(main, ["models", "unload", "llama3.1:8b"])
+    assert result.exit_code == 0, result.output
+    assert server.last_payload == {"model": "llama3.1:8b", "keep_alive": 0}
+
+    result = runner.invoke(main, ["models", "warm", "-p", "openai", "gpt-4o"])
+    assert result.exit_code == 2 and "has no local models" in result.output
+
+
+def test_wrappers_unwrap_to_the_provider(tmp_path):
+    from agentctl.cache import CachedProvider, ResponseCache
+    from agentctl.providers.scheduler import ScheduledProvider
+
+    provider = OllamaProvider()
+    wrapped = CachedProvider(ScheduledProvider(provider), ResponseCache(tmp_path))
+    assert wrapped.unwrapped is provider and provider.unwrapped is provider
+    asyncio.run(wrapped.aclose())
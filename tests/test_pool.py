@@ -0,0 +1,62 @@
+"""Connection reuse through the shared provider client pool."""
+
+import asyncio
+from contextlib import AsyncExitStack
+
+import pytest
+
+from agentctl.providers import Message, get_provider
+from agentctl.providers.pool import pool
+
+from tests.stub_server import StubServer
+
+N_REQUESTS = 10
+
+
+@pytest.mark.parametrize("provider", ["anthropic", "openai", "ollama"])
+def test_connections_reused_across_sequential_requests(provider):
+    messages = [Message(role="user", content="hi")]
+
+    async def go(url):
+        # A fresh provider per request, as separate commands would build them
+        async with AsyncExitStack() as stack:
+            for _ in range(N_REQUESTS):
+                cls = get_provider(provider)
+                instance = await stack.enter_async_context(cls(api_key="test", endpoint=url))
+                resp = await instance.complete(messages, model="stub")
+                assert resp.output_tokens == 5
+
+    with StubServer() as server:
+        asyncio.run(go(server.url))
+
+    assert server.requests == N_REQUESTS
+    assert server.connections == 1
+
+
+def test_providers_share_one_client_until_released():
+    cls = get_provider("ollama")
+
+    async def go():
+        a = cls(endpoint="http://127.0.0.1:1")
+        b = cls(endpoint="http://127.0.0.1:1")
+        assert a.client is b.client
+        assert pool.stats()["references"] == 2
+
+        await a.aclose()
+        assert not b.client.is_closed
+
+        await b.aclose()
+        assert b.client.is_closed
+        assert pool.stats()["clients"] == 0
+
+    asyncio.run(go())
+
+
+def test_different_credentials_get_different_clients():
+    cls = get_provider("openai")
+
+    async def go():
+        async with cls(api_key="one") as a, cls(api_key="two") as b:
+            assert a.client is not b.client
+
+    asyncio.run(go())
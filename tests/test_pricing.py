@@ -0,0 +1,120 @@
+"""Tests for the price table and repricing the ledger."""
+
+import json
+
+import pytest
+from click.testing import CliRunner
+
+from agentctl import ledger, pricing
+from agentctl.commands.costs import costs
+from agentctl.pricing import Price, PriceTable
+
+
+@pytest.fixture(autouse=True)
+def pricing_file(tmp_path, monkeypatch):
+    path = tmp_path / "pricing.yaml"
+    monkeypatch.setattr(pricing, "PRICING_FILE", path)
+    monkeypatch.setattr(ledger, "COSTS_DIR", tmp_path / "costs")
+    return path
+
+
+def test_longest_prefix_wins():
+    table = PriceTable(pricing.BUILTIN_PRICES)
+    assert table.lookup("openai", "gpt-4o-mini-2024-07-18").input == 0.15
+    assert table.lookup("openai", "gpt-4o-2024-08-06", "2025-01-01").input == 2.50
+    assert table.lookup("anthropic", "claude-opus-4-5-20251101").input == 5.0
+    assert table.lookup("anthropic", "claude-opus-4-1").input == 15.0
+    assert table.lookup("openai", "davinci") is None
+    assert table.lookup("ollama", "anything:7b").output == 0.0
+
+
+def test_versions_apply_from_their_date():
+    table = PriceTable(pricing.BUILTIN_PRICES)
+    assert table.lookup("openai", "gpt-4o", "2024-10-01").input == 5.0
+    assert table.lookup("openai", "gpt-4o", "2024-10-02T09:00:00").input == 2.50
+    assert table.lookup("openai", "gpt-4o", "2020-01-01").input == 5.0
+
+
+def test_fees_and_discounts():
+    price = Price(input=2.0, output=8.0, cache_read=0.5, batch_discount=0.5, per_request=0.01)
+    assert price.cost(1_000_000, 0) == pytest.approx(2.01)
+    assert price.cost(0, 0, cache_read_tokens=1_000_000) == pytest.approx(0.51)
+    # Cache writes without their own price are billed as input
+    assert price.cost(0, 0, cache_write_tokens=1_000_000) == pytest.approx(2.01)
+    assert price.cost(1_000_000, 1_000_000, batch=True) == pytest.approx(5.01)
+
+
+def test_pricing_yaml_overrides_and_extends(pricing_file):
+    assert pricing.estimate_cost("openai", "my-finetune", 1000, 1000) is None
+    pricing_file.write_text(
+        "openai:\n"
+        "  my-finetune: {input: 3.0, output: 12.0}\n"
+        "  gpt-4o:\n"
+        "    - {since: 2026-01-01, input: 1.0, output: 4.0}\n"
+    )
+    assert pricing.estimate_cost("openai", "my-finetune-v2", 1_000_000, 0) == 3.0
+    assert pricing.estimate_cost("openai", "gpt-4o", 1_000_000, 0, at="2026-02-01") == 1.0
+    # Built-in versions before the override stay in place
+    assert pricing.estimate_cost("openai", "gpt-4o", 1_000_000, 0, at="2025-02-01") == 2.5
+
+
+@pytest.mark.parametrize(
+    "entry, error",
+    [
+        ("my-finetune: {input: 3.0, output: 12.0, cached: 1.0}", "unknown field 'cached'"),
+        ("my-finetune: 3.0", "my-finetune: expected a mapping"),
+        ("my-finetune: {input: cheap, output: 12.0}", "input must be a number"),
+        ("my-finetune: {output: 12.0}", "my-finetune: missing input"),
+        ("my-finetune: {input: 3.0", "while parsing"),
+    ],
+    ids=["unknown-field", "not-a-mapping", "not-a-number", "missing-field", "bad-yaml"],
+)
+def test_a_malformed_pricing_yaml_is_reported_and_ignored(pricing_file, capsys, entry, error):
+    pricing_file.write_text(f"openai:\n  gpt-4o-mini: {{input: 9.0, output: 9.0}}\n  {entry}\n")
+
+    # The built-in prices apply, and no part of the file does
+    assert pricing.estimate_cost("openai", "gpt-4o-mini", 1_000_000, 0) == 0.15
+    assert pricing.estimate_cost("openai", "my-finetune", 1_000_000, 0) is None
+    err = capsys.readouterr().err
+    assert f"ignoring {pricing_file}" in err and error in err
+
+
+def test_price_sheets_are_validated():
+    with pytest.raises(ValueError, match="openai: expected a mapping"):
+        PriceTable({"openai": ["gpt-4o"]})
+    table = PriceTable(pricing.BUILTIN_PRICES)
+    with pytest.raises(ValueError, match="openai.o1: unknown field 'inputs'"):
+        table.update({"openai": {"gpt-4o": {"input": 1.0, "output": 1.0}, "o1": {"inputs": 1}}})
+    assert table.lookup("openai", "gpt-4o").input == 2.50
+
+
+def test_reprice_fixes_unpriced_entries(pricing_file, tmp_path):
+    entry = {
+        "timestamp": "2026-03-01T12:00:00",
+        "model": "my-finetune",
+        "provider": "openai",
+        "input_tokens": 1_000_000,
+        "output_tokens": 0,
+        "cost": 0.0,
+        "unpriced": True,
+    }
+    ledger.record_costs([entry, {**entry, "cache_hit": True, "saved": 0.0}])
+    assert ledger.load_rollup("2026-03")[("2026-03-01", "openai", "my-finetune")].unpriced == 2
+
+    pricing_file.write_text("openai:\n  my-finetune: {input: 3.0, output: 12.0}\n")
+    runner = CliRunner()
+    result = runner.invoke(costs, ["reprice", "--month", "2026-03", "--dry-run"])
+    assert result.exit_code == 0 and "$0.0000 → $3.0000" in result.output
+    assert all(e.get("unpriced") for e in ledger.iter_records("2026-03"))
+
+    result = runner.invoke(costs, ["reprice", "--month", "2026-03"])
+    assert result.exit_code == 0, result.output
+    repriced = list(ledger.iter_records("2026-03"))
+    assert [(e["cost"], e.get("saved")) for e in repriced] == [(3.0, None), (0.0, 3.0)]
+    assert not any(e.get("unpriced") for e in repriced)
+
+    totals = ledger.load_rollup("2026-03")[("2026-03-01", "openai", "my-finetune")]
+    assert (totals.cost, totals.saved, totals.unpriced) == (3.0, 3.0, 0)
+    assert json.loads((tmp_path / "costs" / "2026-03.rollup.json").read_text())["offset"] == (
+        (tmp_path / "costs" / "2026-03.jsonl").stat().st_size
+    )
@@ -0,0 +1,113 @@
+"""Prompt caching: cache breakpoints, cache usage and its cost."""
+
+import asyncio
+
+import pytest
+
+from agentctl.ledger import Totals
+from agentctl.providers import Message, get_provider
+from agentctl.providers.anthropic_provider import _min_cacheable_tokens, _prompt
+
+from tests.stub_server import StubServer
+
+SYSTEM = "You are a meticulous reviewer. " * 200  # ~1500 tokens
+
+
+def _cached(content):
+    return isinstance(content, list) and "cache_control" in content[-1]
+
+
+def test_anthropic_marks_system_prompt_and_conversation_prefix():
+    turns = [Message(role="system", content=SYSTEM)]
+    for i in range(3):
+        turns += [Message(role="user", content=f"q{i}"), Message(role="assistant", content="a")]
+    turns.append(Message(role="user", content="q3"))
+
+    system, chat = _prompt(turns, "claude-sonnet-4", prompt_caching=True)
+    assert _cached(system)
+    # The last message caches the whole prompt; the user message before it
+    # reads what the previous turn cached
+    assert [i for i, m in enumerate(chat) if _cached(m["content"])] == [4, 6]
+
+    system, chat = _prompt(turns, "claude-sonnet-4", prompt_caching=False)
+    assert system == SYSTEM and not any(_cached(m["content"]) for m in chat)
+    # Haiku needs longer prefixes before it caches anything
+    system, chat = _prompt(turns, "claude-haiku-3-5", prompt_caching=True)
+    assert system == SYSTEM and not any(_cached(m["content"]) for m in chat)
+    # Short prompts go out exactly as before
+    system, chat = _prompt(turns[-2:], "claude-sonnet-4", prompt_caching=True)
+    assert system is None and chat == [
+        {"role": "assistant", "content": "a"}, {"role": "user", "content": "q3"}
+    ]
+
+
+@pytest.mark.parametrize(
+    "model,minimum",
+    [
+        ("claude-sonnet-4-5-20250929", 1024),
+        ("claude-3-7-sonnet-20250219", 1024),
+        ("claude-opus-4-1-20250805", 1024),
+        ("claude-3-opus-20240229", 1024),
+        ("claude-opus-4-5-20251101", 4096),
+        ("claude-haiku-4-5-20251001", 4096),
+        ("claude-3-5-haiku-20241022", 2048),
+        ("claude-3-haiku-20240307", 2048),
+        # Matched from the start of the ID, not anywhere in it
+        ("ft:claude-3-haiku", 1024),
+    ],
+)
+def test_minimum_cacheable_prefix_per_model_family(model, minimum):
+    assert _min_cacheable_tokens(model) == minimum
+    for tokens, cached in ((minimum - 10, False), (minimum + 10, True)):
+        system, _ = _prompt(
+            [Message(role="system", content="x" * tokens * 4), Message(role="user", content="hi")],
+            model,
+            prompt_caching=True,
+        )
+        assert _cached(system) == cached
+
+
+@pytest.mark.parametrize(
+    "provider,model,usage,cost",
+    [
+        # 10 × $3 + 5 × $15 + 2000 reads × $0.30 + 100 writes × $3.75 per 1M
+        ("anthropic", "claude-sonnet-4", (10, 5, 2000, 100), 0.00108),
+        # 10 × $2.50 + 5 × $10 + 2000 cached × $1.25 per 1M
+        ("openai", "gpt-4o", (10, 5, 2000, 0), 0.002575),
+    ],
+)
+@pytest.mark.parametrize("stream", [False, True])
+def test_cache_usage_is_parsed_and_priced(provider, model, usage, cost, stream):
+    messages = [Message(role="system", content=SYSTEM), Message(role="user", content="hi")]
+
+    async def go(url):
+        async with get_provider(provider)(api_key="test", endpoint=url) as instance:
+            if not stream:
+                return await instance.complete(messages, model=model)
+            reply = instance.stream_response(messages, model=model)
+            async for _ in reply:
+                pass
+            return reply.response
+
+    with StubServer() as server:
+        response = asyncio.run(go(server.url))
+        payload = server.last_payload
+
+    if provider == "openai":
+        assert len(payload["prompt_cache_key"]) == 32
+    got = (
+        response.input_tokens,
+        response.output_tokens,
+        response.cache_read_tokens,
+        response.cache_write_tokens,
+    )
+    assert got == usage
+    assert response.cost == pytest.approx(cost)
+
+
+def test_totals_report_prompt_cache_ratio():
+    totals = Totals()
+    assert totals.prompt_cache_ratio is None
+    totals.add({"input_tokens": 100, "cache_read_tokens": 800, "cache_write_tokens": 100})
+    totals.add({"input_tokens": 100})
+    assert totals.prompt_cache_ratio == pytest.approx(800 / 1100)
@@ -0,0 +1,68 @@
+"""Incremental rendering of streamed Markdown."""
+
+import io
+import time
+
+from rich.console import Console
+
+from agentctl.render import MarkdownStream, RawStream
+
+REPLY = """# Title
+
+First paragraph
+spans two lines.
+
+```python
+def f():
+
+    return 1
+```
+
+- one
+- two
+"""
+
+
+def render(chunks, frame_interval=0.0) -> str:
+    out = io.StringIO()
+    console = Console(file=out, width=60, color_system=None)
+    with MarkdownStream(console, frame_interval=frame_interval) as stream:
+        for chunk in chunks:
+            stream.feed(chunk)
+    return out.getvalue()
+
+
+def test_streamed_output_matches_the_text():
+    chunks = [REPLY[i : i + 3] for i in range(0, len(REPLY), 3)]
+    text = render(chunks)
+    for expected in ("Title", "First paragraph spans two lines.", "return 1", "• one", "• two"):
+        assert expected in text
+    # The blank line inside the fence must not split the code block
+    assert "```" not in text
+
+
+def test_completed_blocks_are_frozen():
+    out = io.StringIO()
+    with MarkdownStream(Console(file=out, width=60), frame_interval=0.0) as stream:
+        for chunk in REPLY.split(" "):
+            stream.feed(chunk + " ")
+        assert stream._frozen == 3
+        assert stream._block == ["- one", "- two"]
+
+
+def test_text_shows_within_a_frame_when_the_stream_stalls():
+    out = io.StringIO()
+    console = Console(file=out, width=60, force_terminal=True, color_system=None)
+    with MarkdownStream(console, frame_interval=0.02) as stream:
+        stream.feed("Hello")
+        stream.feed(" stalled")  # within the first frame: not drawn by feed()
+        time.sleep(0.2)
+        assert "Hello stalled" in out.getvalue()
+
+
+def test_raw_stream_passes_chunks_through():
+    out = io.StringIO()
+    with RawStream(out) as stream:
+        for chunk in ("a", "*b*", "\n"):
+            stream.feed(chunk)
+    assert out.getvalue() == "a*b*\n\n"
@@ -0,0 +1,98 @@
+"""Rate limiting and retries, against a stub server that injects throttling."""
+
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from agentctl import metrics
+from agentctl.providers import Message, get_provider
+from agentctl.providers.scheduler import (
+    RateLimitPolicy,
+    ScheduledProvider,
+    TokenBucket,
+    retry_after,
+    scheduler,
+)
+
+from tests.stub_server import StubServer
+
+MESSAGES = [Message(role="user", content="hi")]
+FAST = RateLimitPolicy(max_retries=3, backoff_base=0.01, backoff_max=0.05, max_concurrency=8)
+
+
+@pytest.fixture(autouse=True)
+def fresh_scheduler(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, "METRICS_DIR", tmp_path)
+    scheduler.reset()
+    yield
+    scheduler.reset()
+
+
+def complete(server: StubServer, policy: RateLimitPolicy = FAST, provider: str = "openai"):
+    async def go():
+        inner = get_provider(provider)(api_key="test", endpoint=server.url)
+        async with ScheduledProvider(inner, policy) as instance:
+            return await instance.complete(MESSAGES, model="stub")
+
+    return asyncio.run(go())
+
+
+def test_throttled_requests_are_retried_after_retry_after():
+    with StubServer() as server:
+        server.faults = [(429, {"Retry-After": "0.1"})] * 2
+        start = time.monotonic()
+        resp = complete(server)
+        elapsed = time.monotonic() - start
+
+    assert resp.content == "Hello from the stub."
+    assert resp.metadata["retries"] == 2
+    assert server.requests == 3
+    assert elapsed >= 0.2
+
+    limits = scheduler.limits("openai", "stub", FAST)
+    assert limits.throttled == 2
+    assert limits.concurrency.limit < FAST.max_concurrency
+
+
+def test_server_errors_retry_with_backoff():
+    with StubServer() as server:
+        server.faults = [(503, {}), (529, {"anthropic-ratelimit-requests-reset": "50ms"})]
+        resp = complete(server, provider="anthropic")
+
+    assert resp.metadata["retries"] == 2
+
+
+def test_client_errors_are_not_retried():
+    with StubServer() as server:
+        server.faults = [(400, {})]
+        with pytest.raises(httpx.HTTPStatusError):
+            complete(server)
+    assert server.requests == 1
+
+
+def test_gives_up_after_max_retries():
+    with StubServer() as server:
+        server.faults = [(429, {"Retry-After": "0"})] * 10
+        with pytest.raises(httpx.HTTPStatusError):
+            complete(server)
+    assert server.requests == FAST.max_retries + 1
+
+
+def test_requests_per_minute_paces_calls():
+    async def go():
+        bucket = TokenBucket(per_minute=600, capacity=1)  # one call per 100ms
+        start = time.monotonic()
+        for _ in range(4):
+            await bucket.acquire()
+        return time.monotonic() - start
+
+    assert asyncio.run(go()) >= 0.29
+
+
+def test_retry_after_header_formats():
+    assert retry_after(httpx.Headers({"retry-after": "3"})) == 3
+    assert retry_after(httpx.Headers({"retry-after-ms": "250"})) == 0.25
+    assert retry_after(httpx.Headers({"x-ratelimit-reset-requests": "1m30s"})) == 90
+    assert retry_after(httpx.Headers({})) is None
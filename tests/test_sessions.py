@@ -0,0 +1,286 @@
+"""Tests for session storage."""
+
+import pytest
+
+from agentctl.sessions import tail_lines
+
+
+def test_tail_lines_reads_last_complete_records(tmp_path):
+    path = tmp_path / "messages.jsonl"
+    lines = [f"line {i}".encode() * (i % 7 + 1) for i in range(200)]
+    path.write_bytes(b"\n".join(lines) + b"\n\n" + b'{"partial')
+
+    for n in (0, 1, 5, 199, 200, 500):
+        got, end = tail_lines(path, n, block_size=16)
+        assert got == (lines[-n:] if n else [])
+        assert end == path.stat().st_size - len(b'{"partial')
+
+
+def test_tail_lines_empty_file(tmp_path):
+    path = tmp_path / "messages.jsonl"
+    path.touch()
+    assert tail_lines(path, 10) == ([], 0)
+
+
+def test_concurrent_appends_never_interleave(tmp_path, monkeypatch):
+    import json
+    import multiprocessing
+
+    from agentctl import sessions
+
+    monkeypatch.setattr(sessions, "SESSIONS_DIR", tmp_path)
+    (tmp_path / "s").mkdir()
+    sessions.messages_path("s").write_bytes(b'{"torn')
+
+    def writer(k):
+        for i in range(50):
+            record = {"role": "user", "content": f"{k}:{i}" + "x" * 5000}
+            sessions.append_messages("s", [record, record], fsync=False)
+
+    procs = [multiprocessing.Process(target=writer, args=(k,)) for k in range(4)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+
+    lines = sessions.messages_path("s").read_bytes().split(b"\n")
+    assert lines[0] == b'{"torn' and lines[-1] == b""
+    records = [json.loads(line) for line in lines[1:-1]]
+    assert len(records) == 400
+    # Each call's two records stay adjacent
+    assert all(a == b for a, b in zip(records[::2], records[1::2]))
+
+
+def test_session_send_appends_the_exchange(tmp_path):
+    import json
+    import os
+    import subprocess
+    import sys
+
+    from tests.stub_server import REPLY, StubServer
+
+    def cli(*args):
+        return subprocess.run(
+            [sys.executable, "-m", "agentctl.cli", *args],
+            capture_output=True, text=True, timeout=30,
+            env={**os.environ, "HOME": str(tmp_path)},
+        )
+
+    with StubServer() as server:
+        (tmp_path / ".agentctl").mkdir()
+        (tmp_path / ".agentctl" / "config.yaml").write_text(
+            f"providers:\n  openai:\n    endpoint: {server.url}\n    api_key: x\n"
+        )
+        assert cli("session", "new", "-n", "s", "-p", "openai", "-m", "gpt-4o").returncode == 0
+        for text in ("first", "second"):
+            r = cli("session", "send", "s", text, "--raw")
+            assert r.returncode == 0, r.stderr
+            assert r.stdout == REPLY + "\n"
+
+    messages_file = tmp_path / ".agentctl" / "sessions" / "s" / "messages.jsonl"
+    records = [json.loads(line) for line in messages_file.read_text().splitlines()]
+    assert [(m["role"], m["content"]) for m in records] == [
+        ("user", "first"), ("assistant", REPLY), ("user", "second"), ("assistant", REPLY),
+    ]
+    assert records[1]["output_tokens"] == 5 and records[1]["cost"] > 0
+
+    r = cli("costs", "--by", "session", "--format", "csv")
+    assert r.stdout.splitlines()[1].startswith("s,2,")
+
+
+def test_session_index_tracks_appends_and_repairs_stale_entries(tmp_path, monkeypatch):
+    from agentctl import sessions
+
+    monkeypatch.setattr(sessions, "SESSIONS_DIR", tmp_path)
+    sessions.create_session("a", model="gpt-4o")
+    sessions.create_session("b", model="claude-sonnet-4")
+    sessions.append_messages("a", [{"role": "user", "content": "hi"}] * 3, fsync=False)
+
+    listed = {e.name: e for e in sessions.list_sessions()}
+    assert listed["a"].messages == 3 and listed["b"].messages == 0
+    assert listed["a"].size == sessions.messages_path("a").stat().st_size
+    assert listed["b"].model == "claude-sonnet-4"
+
+    # Changes behind the index's back are picked up on the next listing
+    with open(sessions.messages_path("b"), "a") as f:
+        f.write('{"role": "user"}\n' * 2)
+    (tmp_path / "c").mkdir()
+    (tmp_path / "c" / "session.json").write_text('{"name": "c", "model": "llama3"}')
+    sessions.delete_session("a")
+
+    listed = {e.name: e for e in sessions.list_sessions()}
+    assert set(listed) == {"b", "c"}
+    assert listed["b"].messages == 2 and listed["c"].model == "llama3"
+    # ...and the repairs were written back
+    entries, _ = sessions._read_index()
+    assert entries["b"].messages == 2 and "c" in entries
+
+
+def test_forks_share_history_until_flattened(tmp_path, monkeypatch):
+    from agentctl import sessions
+
+    monkeypatch.setattr(sessions, "SESSIONS_DIR", tmp_path)
+
+    def add(name, *texts):
+        sessions.append_messages(name, [{"content": t} for t in texts], fsync=False)
+
+    def history(name):
+        return [m["content"] for m in sessions.iter_messages(name)]
+
+    sessions.create_session("a", model="gpt-4o")
+    add("a", "1", "2", "3", "4")
+    sessions.fork_session("a", "b", upto=2)
+    add("b", "b3")
+    sessions.fork_session("b", "c", upto=1)  # points straight at a
+    sessions.fork_session("b", "d")
+    add("a", "5")
+    add("d", "d4")
+
+    assert history("b") == ["1", "2", "b3"]
+    assert history("c") == ["1"] and sessions.load_meta("c")["parent"]["session"] == "a"
+    assert history("d") == ["1", "2", "b3", "d4"]
+    assert [m["content"] for m in sessions.last_messages("d", 3)] == ["2", "b3", "d4"]
+    assert sessions.message_count("d") == 4
+    # Only new messages are stored with a fork
+    assert sessions.messages_path("d").read_text().count("\n") == 1
+    listed = {e.name: e for e in sessions.list_sessions()}
+    assert (listed["d"].inherited, listed["d"].messages, listed["d"].model) == (3, 1, "gpt-4o")
+
+    # Flattening b keeps its history and that of d, which is forked from it
+    assert sessions.flatten_session("b")
+    assert history("b") == ["1", "2", "b3"] and "parent" not in sessions.load_meta("b")
+    assert history("d") == ["1", "2", "b3", "d4"]
+
+    # Restore cuts a back to the snapshot; c only needs message 1 and survives
+    sessions.snapshot_session("a", "a-snap")
+    add("a", "6")
+    sessions.fork_session("a", "e")
+    assert sessions.restore_session("a-snap", "a") == ["e"]
+    assert history("a") == ["1", "2", "3", "4", "5"]
+    assert history("e") == ["1", "2", "3", "4", "5", "6"]
+    assert history("c") == ["1"] and history("a-snap") == history("a")
+    add("a", "7")
+    assert history("a")[-1] == "7" and sessions.message_count("a") == 6
+
+    # Deleting a session flattens what still depends on it
+    assert sorted(sessions.delete_session("a")) == ["a-snap", "c"]
+    assert history("c") == ["1"] and len(history("a-snap")) == 5
+    assert {e.name for e in sessions.list_sessions()} == {"a-snap", "b", "c", "d", "e"}
+
+
+def test_session_new_never_overwrites_an_existing_session(tmp_path, monkeypatch):
+    from click.testing import CliRunner
+
+    from agentctl import sessions
+    from agentctl.commands import session as session_cmd
+
+    monkeypatch.setattr(sessions, "SESSIONS_DIR", tmp_path)
+    monkeypatch.setattr(session_cmd, "SESSIONS_DIR", tmp_path)
+    runner = CliRunner()
+
+    assert runner.invoke(session_cmd.session, ["new", "-n", "s"]).exit_code == 0
+    sessions.append_messages("s", [{"role": "user", "content": "keep me"}], fsync=False)
+
+    result = runner.invoke(session_cmd.session, ["new", "-n", "s", "-m", "gpt-4o"])
+    assert result.exit_code == 1 and "already exists" in result.output
+    assert [m["content"] for m in sessions.iter_messages("s")] == ["keep me"]
+    assert sessions.load_meta("s").get("model") is None
+    with pytest.raises(ValueError, match="already exists"):
+        sessions.create_session("s")
+
+
+def test_offsets_from_a_replaced_file_are_rebuilt(tmp_path, monkeypatch):
+    from agentctl import sessions
+
+    monkeypatch.setattr(sessions, "SESSIONS_DIR", tmp_path)
+    sessions.create_session("s")
+    sessions.append_messages("s", [{"content": "x"}] * 4, fsync=False)
+    assert sessions.message_count("s") == 4
+
+    # The file is recreated, longer than the old one but with fewer lines
+    sessions.messages_path("s").unlink()
+    sessions.messages_path("s").write_text('{"content": "' + "y" * 200 + '"}\n')
+    assert sessions.message_count("s") == 1
+    with pytest.raises(ValueError):
+        sessions.fork_session("s", "f", upto=2)
+
+    # ...and a new session of a name used before starts a fresh index
+    sessions.messages_path("s").unlink()
+    sessions.create_session("s")
+    sessions.append_messages("s", [{"content": "z" * 300}], fsync=False)
+    assert sessions.message_count("s") == 1
+
+
+@pytest.mark.parametrize("crash", ["before_replace", "after_replace"])
+def test_an_interrupted_flatten_is_settled_by_the_next_reader(tmp_path, monkeypatch, crash):
+    import os
+
+    from agentctl import sessions
+
+    monkeypatch.setattr(sessions, "SESSIONS_DIR", tmp_path)
+
+    def history(name):
+        return [m["content"] for m in sessions.iter_messages(name)]
+
+    sessions.create_session("a")
+    sessions.append_messages("a", [{"content": t} for t in ("1", "2")], fsync=False)
+    sessions.fork_session("a", "b")
+    sessions.append_messages("b", [{"content": "b3"}], fsync=False)
+    sessions.fork_session("b", "c")
+    sessions.append_messages("c", [{"content": "c4"}], fsync=False)
+
+    class Crash(Exception):
+        pass
+
+    def fail(*args):
+        raise Crash
+
+    with monkeypatch.context() as m:
+        if crash == "before_replace":
+            replace = os.replace
+
+            def replace_or_fail(src, dst):
+                if str(dst).endswith("messages.jsonl"):
+                    fail()
+                replace(src, dst)
+
+            m.setattr(sessions.os, "replace", replace_or_fail)
+        else:
+            m.setattr(sessions, "_finish_flatten", fail)
+        with pytest.raises(Crash):
+            sessions.flatten_session("b")
+        assert "flattening" in sessions.load_meta("b")
+
+    assert history("c") == ["1", "2", "b3", "c4"]
+    assert history("b") == ["1", "2", "b3"]
+    assert "flattening" not in sessions.load_meta("b")
+    assert ("parent" in sessions.load_meta("b")) == (crash == "before_replace")
+
+
+def test_a_failed_request_leaves_the_session_unchanged(tmp_path):
+    import os
+    import subprocess
+    import sys
+
+    def cli(*args, **kwargs):
+        return subprocess.run(
+            [sys.executable, "-m", "agentctl.cli", *args],
+            capture_output=True, text=True, timeout=30,
+            env={**os.environ, "HOME": str(tmp_path)}, **kwargs,
+        )
+
+    (tmp_path / ".agentctl").mkdir()
+    (tmp_path / ".agentctl" / "config.yaml").write_text(
+        "providers:\n  mock:\n    extra:\n      error_rate: 1\n      error_status: 401\n"
+    )
+    assert cli("session", "new", "-n", "s", "-p", "mock").returncode == 0
+    messages_file = tmp_path / ".agentctl" / "sessions" / "s" / "messages.jsonl"
+
+    r = cli("session", "send", "s", "hi", "--raw")
+    assert r.returncode == 1 and "Injected error 401" in r.stderr
+
+    # One failure doesn't end the chat: each message gets its error and a new prompt
+    r = cli("session", "chat", "s", input="first\nsecond\n")
+    assert r.returncode == 0, r.stderr
+    assert r.stdout.count("Error: Injected error 401") == 2
+    assert messages_file.read_text() == ""
@@ -0,0 +1,55 @@
+"""Import-time regression budget for agentctl's cold start.
+
+Runs the CLI under `python -X importtime` and checks that fast paths stay fast:
+heavy dependencies must not be imported, and the total import time must stay
+under a budget. Override the budget with AGENTCTL_IMPORT_BUDGET_MS on slow
+machines.
+"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+BUDGET_MS = float(os.environ.get("AGENTCTL_IMPORT_BUDGET_MS", "200"))
+
+# Modules that only the heavier commands should ever pull in
+HEAVY_MODULES = {
+    "httpx",
+    "pydantic",
+    "yaml",
+    "rich.markdown",
+    "rich.live",
+    "agentctl.providers.anthropic_provider",
+    "agentctl.providers.openai_provider",
+    "agentctl.providers.ollama",
+}
+
+
+def import_profile(*args: str) -> dict[str, int]:
+    """Return {module: self-time in µs} for one CLI invocation."""
+    r = subprocess.run(
+        [sys.executable, "-X", "importtime", "-m", "agentctl.cli"] + list(args),
+        capture_output=True, text=True, timeout=30,
+    )
+    assert r.returncode == 0, r.stderr
+    profile = {}
+    for line in r.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        profile[name.strip()] = int(self_us)
+    return profile
+
+
+@pytest.mark.parametrize("args", [("--help",), ("--version",), ("costs",)])
+def test_import_budget(args):
+    profile = import_profile(*args)
+
+    loaded_heavy = HEAVY_MODULES & profile.keys()
+    assert not loaded_heavy, f"`agentctl {' '.join(args)}` imported {sorted(loaded_heavy)}"
+
+    total_ms = sum(profile.values()) / 1000
+    slowest = sorted(profile.items(), key=lambda kv: kv[1], reverse=True)[:10]
+    assert total_ms < BUDGET_MS, f"import time {total_ms:.0f}ms > {BUDGET_MS:.0f}ms: {slowest}"
@@ -0,0 +1,48 @@
+"""SSE and NDJSON decoding over arbitrary byte-chunk boundaries."""
+
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from agentctl.providers.streaming import SSEDecoder, iter_ndjson, iter_sse
+
+FIXTURES = Path(__file__).parent / "fixtures" / "streams"
+
+
+async def _chunks(data: bytes, size: int):
+    for i in range(0, len(data), size):
+        yield data[i : i + size]
+
+
+def collect(agen) -> list:
+    async def go():
+        return [item async for item in agen]
+
+    return asyncio.run(go())
+
+
+def test_sse_framing():
+    decoder = SSEDecoder()
+    events = decoder.feed(b": keep-alive\r\nevent: a\r\ndata: line one\r\ndata:line two\r\n\r\n")
+    events += decoder.feed(b"data: {}\n\nid: 7\nretry: 10\n\n")
+    assert events == [("a", b"line one\nline two"), ("", b"{}")]
+    assert decoder.feed(b"data: tail") == []
+    assert decoder.flush() == [("", b"tail")]
+
+
+@pytest.mark.parametrize("size", [1, 7, 4096])
+def test_recorded_streams_decode_identically_at_any_chunk_size(size):
+    anthropic = (FIXTURES / "anthropic.sse").read_bytes()
+    events = collect(iter_sse(_chunks(anthropic, size), skip={"ping"}))
+    assert [name for name, _ in events][:2] == ["message_start", "content_block_start"]
+    assert all(event["type"] == name for name, event in events)
+    assert not any(name == "ping" for name, _ in events)
+
+    openai = (FIXTURES / "openai.sse").read_bytes()
+    chunks = [event for _, event in collect(iter_sse(_chunks(openai, size)))]
+    assert chunks[-1]["usage"]["completion_tokens"] == 69  # stopped at [DONE]
+
+    ollama = (FIXTURES / "ollama.ndjson").read_bytes() + b"\n\n"
+    lines = collect(iter_ndjson(_chunks(ollama, size)))
+    assert len(lines) == 70 and lines[-1]["done"]
@@ -0,0 +1,83 @@
+"""Streamed replies report usage and cost through a final Response."""
+
+import asyncio
+
+import pytest
+
+from agentctl import metrics
+from agentctl.cache import CachedProvider, ResponseCache
+from agentctl.providers import Message, get_provider
+from agentctl.providers.scheduler import ScheduledProvider
+
+from tests.stub_server import REPLY, StubServer
+
+MESSAGES = [Message(role="user", content="hi")]
+
+
+@pytest.fixture(autouse=True)
+def metrics_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, "METRICS_DIR", tmp_path / "metrics")
+
+
+@pytest.mark.parametrize(
+    "provider,model,cost",
+    [
+        ("anthropic", "claude-sonnet-4", 0.000105),
+        ("openai", "gpt-4o", 0.000075),
+        ("ollama", "x", 0),
+    ],
+)
+def test_stream_response_collects_usage(provider, model, cost):
+    async def go(url):
+        inner = get_provider(provider)(api_key="test", endpoint=url)
+        async with ScheduledProvider(inner) as instance:
+            reply = instance.stream_response(MESSAGES, model=model)
+            chunks = [chunk async for chunk in reply]
+        return chunks, reply.response
+
+    with StubServer() as server:
+        chunks, response = asyncio.run(go(server.url))
+
+    assert all(isinstance(c, str) for c in chunks)
+    assert "".join(chunks) == response.content == REPLY
+    assert (response.input_tokens, response.output_tokens) == (10, 5)
+    assert response.cost == pytest.approx(cost)
+    assert response.metadata["ttft_ms"] <= response.latency_ms
+    assert response.metadata["itl_ms"] is not None
+    assert response.metadata["retries"] == 0
+
+
+def test_streamed_cache_hits_keep_usage(tmp_path):
+    async def go(url):
+        inner = get_provider("openai")(api_key="test", endpoint=url)
+        async with CachedProvider(inner, ResponseCache(tmp_path)) as instance:
+            replies = []
+            for _ in range(2):
+                reply = instance.stream_response(MESSAGES, model="gpt-4o", temperature=0)
+                async for _chunk in reply:
+                    pass
+                replies.append(reply.response)
+            return replies
+
+    with StubServer() as server:
+        miss, hit = asyncio.run(go(server.url))
+        assert server.requests == 1
+
+    assert hit.content == miss.content == REPLY
+    assert hit.output_tokens == miss.output_tokens == 5
+    assert hit.cost == 0.0
+    assert hit.metadata["cache_hit"] and hit.metadata["original_cost"] == miss.cost
+
+
+@pytest.mark.parametrize("provider", ["anthropic", "openai", "ollama"])
+def test_streamed_requests_send_the_temperature(provider):
+    # A temperature 0 request is cached as deterministic, so it must be sent as such
+    async def go(url):
+        async with get_provider(provider)(api_key="test", endpoint=url) as instance:
+            async for _chunk in instance.stream(MESSAGES, model="m", temperature=0):
+                pass
+
+    with StubServer() as server:
+        asyncio.run(go(server.url))
+        payload = server.last_payload
+    assert payload.get("temperature", payload.get("options", {}).get("temperature")) == 0
@@ -0,0 +1,35 @@
+"""Tests for the incremental file tailer behind `logs --follow`."""
+
+import os
+
+from agentctl.tail import FileTailer
+
+
+def test_reads_only_appended_complete_lines(tmp_path):
+    path = tmp_path / "messages.jsonl"
+    path.write_bytes(b"one\ntwo\n")
+    tailer = FileTailer(path)
+    assert tailer.read_new() == [b"one", b"two"]
+    assert tailer.read_new() == []
+
+    with open(path, "ab") as f:
+        f.write(b"thr")
+    assert tailer.read_new() == []  # partial line held back
+    with open(path, "ab") as f:
+        f.write(b"ee\nfour\n")
+    assert tailer.read_new() == [b"three", b"four"]
+
+
+def test_detects_truncation_and_rotation(tmp_path):
+    path = tmp_path / "messages.jsonl"
+    path.write_bytes(b"old line one\nold line two\n")
+    tailer = FileTailer(path)
+    tailer.read_new()
+
+    # Rewritten in place with more bytes than we had read
+    path.write_bytes(b"a brand new first line that is longer\n")
+    assert tailer.read_new() == [b"a brand new first line that is longer"]
+
+    os.rename(path, tmp_path / "rotated.jsonl")
+    path.write_bytes(b"after rotation\n")
+    assert tailer.read_new() == [b"after rotation"]
@@ -0,0 +1,102 @@
+"""Tests for tracing spans, their exporters and `--profile`."""
+
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from click.testing import CliRunner
+
+from agentctl import ledger, tracing
+from agentctl.cli import main
+
+
+class Collect:
+    def __init__(self):
+        self.traces = []
+
+    def export(self, spans):
+        self.traces.append(spans)
+
+
+@pytest.fixture(autouse=True)
+def no_exporters():
+    tracing.disable()
+    yield
+    tracing.disable()
+
+
+def test_disabled_spans_cost_nothing():
+    assert tracing.span("a") is tracing.span("b", x=1)
+    with tracing.span("a") as span:
+        assert span is None and tracing.current() is None
+        tracing.event("ignored")
+
+
+def test_traces_follow_tasks_and_export_when_the_root_ends(tmp_path):
+    collect = Collect()
+    tracing.enable(collect)
+    tracing.enable(tracing.JsonlExporter(tmp_path))
+
+    async def work(i):
+        with tracing.span("work", i=i):
+            await asyncio.sleep(0.01)
+            tracing.event("halfway")
+
+    async def command():
+        with tracing.span("command"):
+            await asyncio.gather(work(1), work(2))
+            assert not collect.traces
+
+    asyncio.run(command())
+    (spans,) = collect.traces
+    root = spans[-1]
+    assert root.name == "command" and root.parent_id is None
+    assert [s.parent_id for s in spans[:2]] == [root.span_id] * 2
+    assert {s.trace_id for s in spans} == {root.trace_id}
+    assert all(s.events[0][0] == "halfway" for s in spans[:2])
+
+    lines = [json.loads(line) for line in next(tmp_path.glob("*.jsonl")).read_text().splitlines()]
+    assert [line["name"] for line in lines] == ["work", "work", "command"]
+
+
+def test_otlp_exporter_posts_to_a_collector():
+    received = []
+
+    class Collector(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers["Content-Length"]))
+            received.append((self.path, json.loads(body)))
+            self.send_response(200)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Collector)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        tracing.enable(tracing.OtlpExporter(f"http://127.0.0.1:{server.server_address[1]}"))
+        with tracing.span("root", retries=2):
+            with tracing.span("child", cached=True):
+                pass
+    finally:
+        server.shutdown()
+
+    ((path, body),) = received
+    assert path == "/v1/traces"
+    spans = body["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    child, root = spans
+    assert child["parentSpanId"] == root["spanId"] and root["parentSpanId"] == ""
+    assert root["attributes"] == [{"key": "retries", "value": {"intValue": "2"}}]
+    assert child["attributes"] == [{"key": "cached", "value": {"boolValue": True}}]
+
+
+def test_profile_flag_prints_a_phase_breakdown(tmp_path, monkeypatch):
+    monkeypatch.setattr(ledger, "COSTS_DIR", tmp_path)
+    result = CliRunner().invoke(main, ["--profile", "costs"])
+    assert result.exit_code == 0, result.output
+    assert "Profile: agentctl costs" in result.output
+    assert "command.import" in result.output
+    assert not tracing.enabled()